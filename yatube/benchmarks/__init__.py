@@ -0,0 +1,78 @@
+"""Benchmarks run against a throwaway database.
+
+Run from the ``yatube`` directory, e.g. ``python -m benchmarks.thumbnails``.
+"""
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    django.setup()
+
+
+@contextmanager
+def temporary_environment():
+    """Test database, empty media root and cleared caches."""
+    from django.core.cache import cache
+    from django.test.utils import (setup_databases, setup_test_environment,
+                                   teardown_databases,
+                                   teardown_test_environment,
+                                   override_settings)
+
+    media_root = tempfile.mkdtemp()
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        with override_settings(MEDIA_ROOT=media_root):
+            cache.clear()
+            yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+        shutil.rmtree(media_root, ignore_errors=True)
+
+
+def timed(func, repeat):
+    """Mean seconds per call over ``repeat`` calls."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat
+
+
+class QueryCounter:
+    """Counts SQL statements on the default connection.
+
+    ``CaptureQueriesContext`` miscounts across test client requests, as
+    ``request_started`` resets the query log.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        from django.db import connection
+
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+
+def report(title, rows):
+    print(title)
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f'  {name:<{width}}  {value}')
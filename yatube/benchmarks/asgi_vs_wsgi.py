@@ -0,0 +1,101 @@
+"""Concurrency of WSGI (thread per connection) vs the ASGI handler.
+
+Simulates ``CLIENTS`` simultaneous slow clients (each needs ``NET_DELAY``
+seconds to receive its response) against the same number of threads.
+Under WSGI a worker thread is pinned while the response is being sent;
+under ASGI the send is awaited on the event loop and the thread is free.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import report, setup, temporary_environment
+
+setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.handlers.wsgi import WSGIHandler  # noqa: E402
+
+from core.asgi import ASGIHandler, build_environ  # noqa: E402
+from posts.models import Post  # noqa: E402
+
+THREADS = 20
+CLIENTS = 200
+NET_DELAY = 0.1
+PATHS = ('/', '/profile/bench/')
+
+
+def scope_for(path):
+    return {'type': 'http', 'method': 'GET', 'path': path,
+            'query_string': b'', 'headers': [(b'host', b'localhost')],
+            'server': ('localhost', 80), 'client': ('127.0.0.1', 1)}
+
+
+def run_wsgi(path):
+    handler = WSGIHandler()
+    latencies = []
+
+    def connection(started):
+        result = handler(build_environ(scope_for(path), b''),
+                         lambda status, headers, exc_info=None: None)
+        b''.join(result)
+        result.close()
+        time.sleep(NET_DELAY)  # the worker writes to a slow client
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as pool:
+        for _ in range(CLIENTS):
+            pool.submit(connection, time.perf_counter())
+    return time.perf_counter() - started, latencies
+
+
+def run_asgi(path):
+    app = ASGIHandler(threads=THREADS)
+    latencies = []
+
+    async def connection():
+        started = time.perf_counter()
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message['type'] == 'http.response.body' and not message.get(
+                'more_body'
+            ):
+                await asyncio.sleep(NET_DELAY)
+
+        await app(scope_for(path), receive, send)
+        latencies.append(time.perf_counter() - started)
+
+    async def main():
+        await asyncio.gather(*(connection() for _ in range(CLIENTS)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return time.perf_counter() - started, latencies
+
+
+def main():
+    with temporary_environment():
+        user = get_user_model().objects.create_user(username='bench')
+        Post.objects.bulk_create(Post(author=user, text=f'post {i}')
+                                 for i in range(30))
+        rows = []
+        for path in PATHS:
+            for name, run in (('wsgi', run_wsgi), ('asgi', run_asgi)):
+                total, latencies = run(path)
+                latencies.sort()
+                rows.append((f'{path} {name}',
+                             f'{CLIENTS / total:7.1f} req/s, '
+                             f'{CLIENTS * NET_DELAY / total:5.1f} '
+                             f'connections served concurrently, '
+                             f'p95 {latencies[int(len(latencies) * .95)]:.2f}'
+                             f' s'))
+        report(f'{CLIENTS} clients, {THREADS} threads, '
+               f'{NET_DELAY * 1000:.0f} ms to deliver each response', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Feed pages: database queries vs cached per-source post lists."""
+import random
+import time
+
+from benchmarks import QueryCounter, report, setup, temporary_environment
+
+setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db.models import Q  # noqa: E402
+
+from posts import feeds  # noqa: E402
+from posts.models import Follow, Group, GroupFollow, Post  # noqa: E402
+
+N_AUTHORS = 300
+N_GROUPS = 30
+N_POSTS = 30000
+N_FOLLOWED_AUTHORS = 60
+N_FOLLOWED_GROUPS = 6
+PAGE_SIZE = 10
+
+
+def populate(rng):
+    User = get_user_model()
+    User.objects.bulk_create((User(username=f'bench{i}')
+                              for i in range(N_AUTHORS + 1)), batch_size=400)
+    users = list(User.objects.filter(username__startswith='bench'))
+    reader, authors = users[0], users[1:]
+    Group.objects.bulk_create(Group(title=f'{i}', slug=f'bench-{i}')
+                              for i in range(N_GROUPS))
+    groups = list(Group.objects.filter(slug__startswith='bench-'))
+    Post.objects.bulk_create(
+        (Post(author=rng.choice(authors),
+              group=rng.choice(groups + [None]),
+              text=f'{i}')
+         for i in range(N_POSTS)),
+        batch_size=400
+    )
+    Follow.objects.bulk_create(
+        Follow(user=reader, author=author)
+        for author in rng.sample(authors, N_FOLLOWED_AUTHORS)
+    )
+    GroupFollow.objects.bulk_create(
+        GroupFollow(user=reader, group=group)
+        for group in rng.sample(groups, N_FOLLOWED_GROUPS)
+    )
+    return reader
+
+
+def or_join(reader, first, last):
+    posts = Post.objects.published().filter(
+        Q(author__following__user=reader)
+        | Q(group__followers__user=reader)
+    ).distinct().select_related('author', 'group').order_by(
+        '-pub_date', '-pk'
+    )
+    for page in range(first, last):
+        list(posts[page * PAGE_SIZE:(page + 1) * PAGE_SIZE])
+
+
+def merged(reader, first, last):
+    cursor = None
+    for page in range(last):
+        if page == first:
+            started = time.perf_counter()
+        _, cursor = feeds.personal_page(reader, cursor, PAGE_SIZE)
+    return started
+
+
+def offset_pages(first, last):
+    posts = Post.objects.published().select_related(
+        'author', 'group'
+    ).order_by('-pub_date', '-pk')
+    for page in range(first, last):
+        posts.count()
+        list(posts[page * PAGE_SIZE:(page + 1) * PAGE_SIZE])
+
+
+def cached_pages(first, last):
+    for page in range(first, last):
+        feed = feeds.SourceFeed(feeds.EVERYONE)
+        feed.count()
+        feed[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+
+
+def measure(func, *args):
+    with QueryCounter() as queries:
+        started = time.perf_counter()
+        # Cursor feeds walk the earlier pages and report where the
+        # measured ones start.
+        started = func(*args) or started
+        elapsed = time.perf_counter() - started
+    return f'{queries.count} queries in total, {elapsed * 1000:.1f} ms'
+
+
+def main():
+    with temporary_environment():
+        reader = populate(random.Random(0))
+        cache.clear()
+        # Warm the per-source lists first, as a running site would.
+        merged(reader, 0, 1)
+        cached_pages(0, 1)
+        cached = feeds.RECENT_POSTS // PAGE_SIZE
+        rows = []
+        for first, last in ((0, cached), (cached, 2 * cached)):
+            pages = f'pages {first + 1}-{last}'
+            rows += [
+                (f'follow, {pages}, OR-join',
+                 measure(or_join, reader, first, last)),
+                (f'follow, {pages}, k-way merge',
+                 measure(merged, reader, first, last)),
+                (f'index, {pages}, DB',
+                 measure(offset_pages, first, last)),
+                (f'index, {pages}, cached lists',
+                 measure(cached_pages, first, last)),
+            ]
+        report(f'{N_POSTS} posts; {N_FOLLOWED_AUTHORS} followed authors and '
+               f'{N_FOLLOWED_GROUPS} groups; {feeds.RECENT_POSTS} cached '
+               f'posts per source', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Next feed page: full render vs the fragment endpoint."""
+import re
+import time
+
+from benchmarks import report, setup, temporary_environment
+
+setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from posts.models import Comment, Follow, Group, Post  # noqa: E402
+
+N_POSTS = 200
+N_COMMENTS = 200
+REPEAT = 50
+MORE_RE = re.compile(r'class="[^"]*js-load-more" href="([^"]+)"')
+
+
+def populate():
+    User = get_user_model()
+    author = User.objects.create_user(username='bench-author')
+    reader = User.objects.create_user(username='bench-reader')
+    group = Group.objects.create(title='Bench', slug='bench')
+    Follow.objects.create(user=reader, author=author)
+    for i in range(N_POSTS):
+        Post.objects.create(author=author, group=group,
+                            text=f'Bench post {i} ' * 10)
+    post = Post.objects.first()
+    Comment.objects.bulk_create(
+        Comment(post=post, author=reader, text=f'Bench comment {i}',
+                path='')
+        for i in range(N_COMMENTS)
+    )
+    return author, reader, group, post
+
+
+def timed_get(client, url):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        # The index is behind ``cached_view``: measure the render.
+        cache.clear()
+        response = client.get(url)
+    elapsed = (time.perf_counter() - started) / REPEAT
+    return response, elapsed
+
+
+def compare(client, name, url):
+    first = client.get(url).content.decode()
+    fragment_url = MORE_RE.search(first).group(1).replace('&amp;', '&')
+    sep = '&' if '?' in url else '?'
+    full, full_time = timed_get(client, f'{url}{sep}page=2')
+    part, part_time = timed_get(client, fragment_url)
+    return (name, f'full page {len(full.content)} B, {full_time * 1000:.1f} '
+                  f'ms; fragment {len(part.content)} B, '
+                  f'{part_time * 1000:.1f} ms')
+
+
+def main():
+    with temporary_environment():
+        author, reader, group, post = populate()
+        # ``path`` is set by ``Comment.save``; bulk rows get it here.
+        for comment in Comment.objects.filter(path=''):
+            comment.path = Comment.path_segment(comment.pk)
+            comment.save(update_fields=('path',))
+        client = Client()
+        client.force_login(reader)
+        rows = [
+            compare(client, 'index', reverse('posts:index')),
+            compare(client, 'group',
+                    reverse('posts:group_list', args=(group.slug,))),
+            compare(client, 'profile',
+                    reverse('posts:profile', args=(author.username,))),
+            compare(client, 'comments',
+                    reverse('posts:post_detail', args=(post.pk,))),
+        ]
+        report(f'Second page, mean of {REPEAT} requests', rows)
+
+
+if __name__ == '__main__':
+    main()
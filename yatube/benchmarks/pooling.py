@@ -0,0 +1,88 @@
+"""Index throughput with and without the connection pool.
+
+Requests go through ``WSGIHandler``, which closes the connection after
+every response like a real server (the test client does not). Each
+request has its own query string, so the index is rendered, not served
+from the view cache. The database is a file: Django never closes
+in-memory ones.
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import report, setup, temporary_environment
+
+setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.handlers.wsgi import WSGIHandler  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from core import pool  # noqa: E402
+from core.asgi import build_environ  # noqa: E402
+from posts.models import Post  # noqa: E402
+
+REQUESTS = 400
+THREADS = (1, 8)
+CONFIGURATIONS = (
+    ('connect per request', None, 0),
+    ('persistent per thread', None, 60),
+    ('pool', {'SIZE': 4}, 0),
+)
+
+
+def request(handler, number):
+    environ = build_environ({
+        'method': 'GET', 'path': '/',
+        'query_string': f'n={number}'.encode(),
+        'headers': [(b'host', b'localhost')],
+    }, b'')
+    result = handler(environ, lambda status, headers, exc_info=None: None)
+    b''.join(result)
+    result.close()
+
+
+def throughput(threads):
+    handler = WSGIHandler()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(lambda number: request(handler, number),
+                          range(REQUESTS)))
+    return REQUESTS / (time.perf_counter() - started)
+
+
+def connections_opened():
+    return pool.opened.registry.totals().get(pool.opened.key('', {}), 0)
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    connection.settings_dict['TEST']['NAME'] = os.path.join(directory,
+                                                            'bench.sqlite3')
+    with temporary_environment(), override_settings(QUERY_LOG_SAMPLE_RATE=0):
+        user = get_user_model().objects.create_user(username='bench')
+        Post.objects.bulk_create(Post(author=user, text=f'post {i}')
+                                 for i in range(30))
+        rows = []
+        for name, options, max_age in CONFIGURATIONS:
+            connection.settings_dict['POOL'] = options
+            connection.settings_dict['CONN_MAX_AGE'] = max_age
+            for threads in THREADS:
+                connection.close()
+                pool.close_all()
+                before = connections_opened()
+                rate = throughput(threads)
+                opened = connections_opened() - before
+                rows.append((f'{name}, {threads} threads',
+                             f'{rate:7.1f} req/s'
+                             + (f', {opened:.0f} connections opened'
+                                if options else '')))
+        pool.close_all()
+        report(f'{REQUESTS} index renders', rows)
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Edit history storage and version rebuild time: deltas vs full copies."""
+import random
+
+from benchmarks import report, setup, temporary_environment, timed
+
+setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db.models import Sum  # noqa: E402
+from django.db.models.functions import Length  # noqa: E402
+
+from posts import revisions  # noqa: E402
+from posts.models import Post, PostRevision  # noqa: E402
+
+N_LINES = 100
+N_EDITS = 200
+REPEAT = 200
+
+
+def edits(seed=0):
+    """Texts of successive versions, each changing one or two lines."""
+    rng = random.Random(seed)
+    lines = [f'Line {i}: ' + 'lorem ipsum dolor sit amet ' * 3 + '\n'
+             for i in range(N_LINES)]
+    for version in range(N_EDITS):
+        for _ in range(rng.randint(1, 2)):
+            lines[rng.randrange(N_LINES)] = f'Edited in v{version}\n'
+        yield ''.join(lines)
+
+
+def stored_bytes():
+    return PostRevision.objects.aggregate(
+        total=Sum(Length('data'))
+    )['total'] or 0
+
+
+def main():
+    with temporary_environment():
+        author = get_user_model().objects.create_user(username='bench')
+        post = Post.objects.create(author=author, text='')
+        full_copies = 0
+        for text in edits():
+            previous, post.text = post.text, text
+            post.save()
+            revisions.record_edit(post, previous, '', author)
+            full_copies += len(text)
+        count = PostRevision.objects.count()
+        rng = random.Random(1)
+        rebuild = timed(
+            lambda: revisions.reconstruct(post.pk,
+                                          rng.randint(1, count)),
+            REPEAT
+        )
+        rows = [
+            ('full copies', f'{full_copies} bytes'),
+            ('deltas', f'{stored_bytes()} bytes in {count} revisions '
+                       f'(snapshot every {revisions.SNAPSHOT_EVERY})'),
+            ('rebuild', f'{rebuild * 1000:.2f} ms per random version'),
+        ]
+        deleted = revisions.compact_all()
+        rows.append(('after compaction',
+                     f'{stored_bytes()} bytes, {deleted} revisions '
+                     f'squashed'))
+        report(f'{N_EDITS} edits of a {N_LINES}-line post', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Suggestion scoring throughput on a synthetic power-law follow graph."""
+import time
+
+import numpy as np
+
+from benchmarks import report, setup
+
+setup()
+
+from posts.suggestions import FollowGraph  # noqa: E402
+
+N_USERS = 200000
+N_EDGES = 2000000
+SAMPLE = 5000
+
+
+def synthetic_graph(seed=0):
+    rng = np.random.default_rng(seed)
+    users = rng.integers(1, N_USERS + 1, N_EDGES)
+    # A few authors attract most of the follows.
+    authors = np.minimum(rng.zipf(1.5, N_EDGES), N_USERS)
+    keep = users != authors
+    return users[keep], authors[keep]
+
+
+def main():
+    users, authors = synthetic_graph()
+    started = time.perf_counter()
+    graph = FollowGraph(users, authors)
+    built = time.perf_counter() - started
+    sample = graph.followers()[:SAMPLE]
+    started = time.perf_counter()
+    for index in sample:
+        graph.suggest(index)
+    per_user = (time.perf_counter() - started) / len(sample)
+    followers = len(graph.followers())
+    report(f'{len(users)} edges, {len(graph)} users', [
+        ('build CSR', f'{built:.2f} s'),
+        ('suggest', f'{per_user * 1000:.2f} ms/user'),
+        ('all followers', f'~{per_user * followers / 60:.1f} min '
+                          f'for {followers} users'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Thumbnail overhead per feed page: stock sorl vs batched backend/store."""
+from io import BytesIO
+
+from benchmarks import (QueryCounter, report, setup, temporary_environment,
+                        timed)
+
+setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.files.base import ContentFile  # noqa: E402
+from django.test import Client  # noqa: E402
+from PIL import Image  # noqa: E402
+from sorl.thumbnail import default  # noqa: E402
+from sorl.thumbnail.base import ThumbnailBackend  # noqa: E402
+from sorl.thumbnail.kvstores import cached_db_kvstore  # noqa: E402
+
+from posts import thumbnails  # noqa: E402
+from posts.models import Post  # noqa: E402
+from posts.tasks import post_saved  # noqa: E402
+
+N_POSTS = 10
+REPEAT = 50
+
+
+class StockKVStore(cached_db_kvstore.KVStore):
+    lookups = 0
+
+    def _get_raw(self, key):
+        self.lookups += 1
+        return super()._get_raw(key)
+
+
+def make_posts():
+    user = get_user_model().objects.create_user(username='bench')
+    for i in range(N_POSTS):
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 800), (i * 20, 0, 0)).save(buffer, 'JPEG')
+        post = Post(author=user, text=f'post {i}')
+        post.image.save(f'{i}.jpg', ContentFile(buffer.getvalue()),
+                        save=False)
+        post.save()
+        post_saved(post_id=post.pk)
+    return user
+
+
+def measure(backend, store, url):
+    default.backend._wrapped = backend
+    default.kvstore._wrapped = store
+    client = Client()
+    cache.clear()
+    store.lookups = 0
+    with QueryCounter() as cold:
+        client.get(url)
+    cold_lookups = store.lookups
+    store.lookups = 0
+    seconds = timed(lambda: client.get(url), REPEAT)
+    with QueryCounter() as warm:
+        client.get(url)
+    return (cold_lookups, cold.count, store.lookups // REPEAT,
+            warm.count, seconds)
+
+
+def main():
+    with temporary_environment():
+        user = make_posts()
+        url = f'/profile/{user.username}/'
+        rows = []
+        for name, backend, store in (
+            ('stock', ThumbnailBackend(), StockKVStore()),
+            ('batched', thumbnails.ThumbnailBackend(), thumbnails.KVStore()),
+        ):
+            cold_kv, cold_sql, warm_kv, warm_sql, seconds = measure(
+                backend, store, url
+            )
+            rows.append((name, f'cold: {cold_kv} KV lookups, '
+                               f'{cold_sql} SQL | warm: {warm_kv} KV '
+                               f'lookups, {warm_sql} SQL, '
+                               f'{seconds * 1000:.2f} ms/page'))
+        report(f'Profile page with {N_POSTS} image posts '
+               f'({len(thumbnails.THUMBNAIL_VARIANTS)} variants each)', rows)
+
+
+if __name__ == '__main__':
+    main()
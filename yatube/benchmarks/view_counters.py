@@ -0,0 +1,77 @@
+"""Write amplification of view counting: per-view UPDATE vs buffered."""
+import random
+import time
+
+from benchmarks import QueryCounter, report, setup, temporary_environment
+
+setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db.models import F  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from posts import impressions  # noqa: E402
+from posts.models import Post  # noqa: E402
+
+N_POSTS = 200
+N_VIEWS = 20000
+N_VIEWERS = 2000
+# Views between flushes (e.g. one flush interval of a busy process).
+FLUSH_EVERY = 5000
+
+
+def view_stream(seed=0):
+    rng = random.Random(seed)
+    factory = RequestFactory()
+    viewers = [factory.get('/', REMOTE_ADDR=f'10.0.{i // 250}.{i % 250}')
+               for i in range(N_VIEWERS)]
+    # Skewed popularity: a few posts get most of the views.
+    weights = [1 / (rank + 1) for rank in range(N_POSTS)]
+    posts = rng.choices(range(N_POSTS), weights, k=N_VIEWS)
+    return [(rng.choice(viewers), post) for post in posts]
+
+
+def naive(post_ids, stream):
+    for _, index in stream:
+        Post.objects.filter(pk=post_ids[index]).update(
+            views_count=F('views_count') + 1
+        )
+
+
+def buffered(post_ids, stream):
+    counter = impressions.post_views
+    for number, (request, index) in enumerate(stream, 1):
+        impressions.record(counter, 'bench', request, [post_ids[index]])
+        if number % FLUSH_EVERY == 0:
+            counter.flush()
+    counter.flush()
+
+
+def measure(func, post_ids, stream):
+    Post.objects.update(views_count=0)
+    with QueryCounter() as queries:
+        started = time.perf_counter()
+        func(post_ids, stream)
+        elapsed = time.perf_counter() - started
+    total = sum(Post.objects.values_list('views_count', flat=True))
+    return queries.count, elapsed, total
+
+
+def main():
+    with temporary_environment():
+        author = get_user_model().objects.create_user(username='bench')
+        post_ids = [Post.objects.create(author=author, text=f'{i}').pk
+                    for i in range(N_POSTS)]
+        stream = view_stream()
+        rows = []
+        for name, func in (('per-view UPDATE', naive),
+                           ('buffered', buffered)):
+            statements, elapsed, total = measure(func, post_ids, stream)
+            rows.append((name, f'{statements} SQL statements, '
+                               f'{elapsed:.2f} s, {total} views counted'))
+        report(f'{N_VIEWS} views of {N_POSTS} posts by {N_VIEWERS} viewers '
+               f'(flush every {FLUSH_EVERY} views)', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""ASGI adapter for the project (Django < 3.0 ships no ASGI handler).
+
+Connections are held by the event loop, so slow clients do not pin
+threads. Requests run through the regular Django (WSGI) handler in a
+bounded thread pool, which also bounds concurrent database work. Read
+views registered in ``settings.ASGI_CACHED_VIEWS`` are first looked up in
+their ``cached_view`` cache right on the event loop: a fresh hit is sent
+without taking a pool thread. Stale entries are left to the view, which
+serves them while one request revalidates.
+
+Streaming responses (files, ``StreamingHttpResponse``) are not read into
+memory: their iterator is read ``STREAM_BLOCK`` bytes at a time in the
+pool, each block sent before the next is read.
+"""
+import asyncio
+import io
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.handlers.wsgi import WSGIHandler, WSGIRequest
+from django.middleware.clickjacking import XFrameOptionsMiddleware
+from django.middleware.security import SecurityMiddleware
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_cache_key
+
+from .middleware import CompressionMiddleware
+from .pool import close_all as close_pooled_connections
+from .viewcache import fresh_response, session_prefix
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THREADS: int = 20
+STREAM_BLOCK: int = 64 * 1024
+
+
+def read_block(chunks):
+    """Up to about ``STREAM_BLOCK`` bytes of the ``chunks`` iterator;
+    ``b''`` once it is exhausted."""
+    block = []
+    size = 0
+    for chunk in chunks:
+        block.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_BLOCK:
+            break
+    return b''.join(block)
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI HTTP ``scope``."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': unquote(scope['path']),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope.get('headers', ()):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name == 'CONTENT_LENGTH':
+            environ['CONTENT_LENGTH'] = value
+        elif name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        else:
+            key = f'HTTP_{name}'
+            environ[key] = (f'{environ[key]},{value}' if key in environ
+                            else value)
+    return environ
+
+
+class ASGIHandler:
+    def __init__(self, threads=None):
+        self.wsgi_handler = WSGIHandler()
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads or getattr(settings, 'ASGI_THREADS',
+                                           DEFAULT_THREADS),
+            thread_name_prefix='asgi'
+        )
+        self.cached_views = getattr(settings, 'ASGI_CACHED_VIEWS', {})
+        self.response_middleware = (
+            SecurityMiddleware(), XFrameOptionsMiddleware(),
+            CompressionMiddleware()
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Unsupported ASGI scope {scope["type"]!r}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                from yatube.startup import start
+
+                await asyncio.get_running_loop().run_in_executor(
+                    self.executor, start
+                )
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                close_pooled_connections()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    async def http(self, scope, receive, send):
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        environ = build_environ(scope, body)
+        response = await self.cached_response(environ)
+        if response is not None:
+            status = f'{response.status_code} {response.reason_phrase}'
+            headers = [*response.items(),
+                       *(('Set-Cookie', cookie.output(header=''))
+                         for cookie in response.cookies.values())]
+            body = b'' if scope['method'] == 'HEAD' else response.content
+            await self.send_response(send, status, headers, [body])
+            return
+        loop = asyncio.get_running_loop()
+        status, headers, chunks = await loop.run_in_executor(
+            self.executor, self.run_wsgi, environ
+        )
+        if isinstance(chunks, list):
+            await self.send_response(send, status, headers, chunks)
+        else:
+            await self.stream_response(send, status, headers, chunks)
+
+    def run_wsgi(self, environ):
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'], started['headers'] = status, headers
+
+        result = self.wsgi_handler(environ, start_response)
+        if getattr(result, 'streaming', False):
+            # Read and closed by ``stream_response``.
+            return started['status'], started['headers'], result
+        try:
+            chunks = list(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return started['status'], started['headers'], chunks
+
+    async def cached_response(self, environ):
+        """Fresh cached response of a registered read view, or ``None``."""
+        if environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            return None
+        try:
+            match = resolve(environ['PATH_INFO'])
+        except Resolver404:
+            return None
+        key_prefix = self.cached_views.get(match.view_name)
+        if key_prefix is None:
+            return None
+        request = WSGIRequest(environ)
+        cache = caches[settings.CACHE_MIDDLEWARE_ALIAS]
+        try:
+            if isinstance(cache, LocMemCache):
+                # In-process memory: no I/O to wait for.
+                return self.fetch(request, key_prefix, cache)
+            # The response middleware uses the cache as well.
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self.fetch, request, key_prefix, cache
+            )
+        except Exception:
+            logger.exception('ASGI cache lookup failed')
+            return None
+
+    def fetch(self, request, key_prefix, cache):
+        """The fresh cached response passed through the response
+        middleware, or ``None``."""
+        cache_key = get_cache_key(request, session_prefix(request, key_prefix),
+                                  'GET', cache=cache)
+        if cache_key is None:
+            return None
+        response = fresh_response(cache.get(cache_key))
+        if response is None:
+            return None
+        for middleware in self.response_middleware:
+            response = middleware.process_response(request, response)
+        return response
+
+    @staticmethod
+    async def send_start(send, status, headers):
+        await send({
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(name.lower().encode('latin-1'),
+                         value.strip().encode('latin-1'))
+                        for name, value in headers],
+        })
+
+    async def stream_response(self, send, status, headers, result):
+        loop = asyncio.get_running_loop()
+        chunks = iter(result)
+        try:
+            await self.send_start(send, status, headers)
+            while True:
+                block = await loop.run_in_executor(self.executor,
+                                                   read_block, chunks)
+                if not block:
+                    break
+                await send({'type': 'http.response.body', 'body': block,
+                            'more_body': True})
+        finally:
+            await loop.run_in_executor(self.executor, result.close)
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def send_response(self, send, status, headers, chunks):
+        await self.send_start(send, status, headers)
+        for chunk in chunks[:-1]:
+            await send({'type': 'http.response.body', 'body': chunk,
+                        'more_body': True})
+        await send({'type': 'http.response.body',
+                    'body': chunks[-1] if chunks else b''})
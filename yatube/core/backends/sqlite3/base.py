@@ -0,0 +1,11 @@
+from django.db.backends.sqlite3 import base
+
+from core.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """SQLite with pooled connections (``core.pool``)."""
+
+    def uses_pool(self):
+        # Closing an in-memory database drops it, so Django never does.
+        return super().uses_pool() and not self.is_in_memory_db()
@@ -0,0 +1,136 @@
+"""Write-buffered counters for hot integer columns.
+
+Increments are collected per process in ``SHARDS`` lock-striped dicts (so
+concurrent requests rarely wait for each other) and written with a few
+``UPDATE ... SET field = field + delta WHERE pk IN (...)`` statements:
+one per distinct delta, instead of one locked row write per event.
+Displayed values add the pending deltas of this process to the column.
+
+Buffers are flushed by a background thread (``start_flusher``, run by
+serving processes), whenever a buffer grows past ``MAX_PENDING`` keys and,
+once the flusher runs, at interpreter exit.
+"""
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.db import DatabaseError, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+SHARDS: int = 16
+MAX_PENDING: int = 10000
+UPDATE_BATCH_SIZE: int = 500
+FLUSH_INTERVAL: float = 5.0
+
+
+class BufferedCounter:
+    """Pending deltas of ``model.field`` keyed by primary key."""
+
+    instances = []
+
+    def __init__(self, model, field, shards=SHARDS):
+        self.model = model
+        self.field = field
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self._pending = 0
+        BufferedCounter.instances.append(self)
+
+    def _shard(self, pk):
+        return self._shards[hash(pk) % len(self._shards)]
+
+    def add(self, pk, delta=1):
+        deltas, lock = self._shard(pk)
+        with lock:
+            if pk not in deltas:
+                self._pending += 1
+            deltas[pk] = deltas.get(pk, 0) + delta
+        if self._pending > MAX_PENDING:
+            self.flush()
+
+    def pending(self, pk):
+        deltas, lock = self._shard(pk)
+        with lock:
+            return deltas.get(pk, 0)
+
+    def value(self, obj):
+        """Persisted value of ``obj`` plus the deltas not yet flushed."""
+        return getattr(obj, self.field) + self.pending(obj.pk)
+
+    def _drain(self):
+        drained = {}
+        for deltas, lock in self._shards:
+            with lock:
+                drained.update(deltas)
+                deltas.clear()
+        self._pending = 0
+        return drained
+
+    def clear(self):
+        """Drops pending deltas without writing them."""
+        self._drain()
+
+    def flush(self):
+        """Writes pending deltas; returns the number of UPDATE statements."""
+        drained = self._drain()
+        by_delta = defaultdict(list)
+        for pk, delta in drained.items():
+            if delta:
+                by_delta[delta].append(pk)
+        statements = 0
+        try:
+            with transaction.atomic():
+                for delta, pks in by_delta.items():
+                    for start in range(0, len(pks), UPDATE_BATCH_SIZE):
+                        self.model.objects.filter(
+                            pk__in=pks[start:start + UPDATE_BATCH_SIZE]
+                        ).update(**{self.field: F(self.field) + delta})
+                        statements += 1
+        except DatabaseError:
+            logger.exception('Flushing %s.%s failed',
+                             self.model.__name__, self.field)
+            for pk, delta in drained.items():
+                self.add(pk, delta)
+            return 0
+        return statements
+
+
+def flush_all():
+    return sum(counter.flush() for counter in BufferedCounter.instances)
+
+
+class Flusher(threading.Thread):
+    def __init__(self, interval):
+        super().__init__(name='counter-flusher', daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        from django.db import connection
+
+        while not self.stopped.wait(self.interval):
+            try:
+                flush_all()
+            finally:
+                connection.close()
+
+    def stop(self):
+        self.stopped.set()
+
+
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def start_flusher(interval=FLUSH_INTERVAL):
+    """Starts the background flusher of this process (once)."""
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            if _flusher is None:
+                atexit.register(flush_all)
+            _flusher = Flusher(interval)
+            _flusher.start()
+    return _flusher
@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core import tasks
+
+
+class Command(BaseCommand):
+    help = 'Runs background tasks stored in the database queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Process due tasks once and exit.')
+        parser.add_argument('--batch', type=int, default=100,
+                            help='Tasks claimed per poll.')
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Seconds after which running tasks '
+                                 'are considered lost and requeued.')
+        parser.add_argument('--purge-after', type=int, default=24,
+                            help='Hours to keep finished tasks.')
+
+    def handle(self, *args, **options):
+        requeued = tasks.requeue_stale(
+            timedelta(seconds=options['stale_after'])
+        )
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale tasks')
+        purge_after = timedelta(hours=options['purge_after'])
+        try:
+            while True:
+                processed = tasks.run_pending(options['batch'])
+                if options['once']:
+                    break
+                if not processed:
+                    tasks.purge_finished(purge_after)
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS('Worker stopped'))
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import querylog
+
+
+class Command(BaseCommand):
+    help = 'Prints the SQL statements (or views) with the most query time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--by', choices=('fingerprint', 'view'),
+                            default='fingerprint',
+                            help='Group timings by statement or by view.')
+        parser.add_argument('--view', default=None,
+                            help='Only statements run by this URL name.')
+        parser.add_argument('--order',
+                            choices=('total', 'count', 'mean', 'p95'),
+                            default='total', help='Sort key.')
+        parser.add_argument('--limit', type=int, default=10,
+                            help='Rows printed.')
+        parser.add_argument('--dir', default=None,
+                            help='Statistics directory (QUERY_LOG_DIR).')
+
+    def handle(self, *args, **options):
+        directory = options['dir'] or settings.QUERY_LOG_DIR
+        if not directory:
+            raise CommandError('QUERY_LOG_DIR is not set.')
+        rows = querylog.top(querylog.load(directory), options['by'],
+                            options['view'], options['order'],
+                            options['limit'])
+        if not rows:
+            self.stdout.write('No queries recorded')
+            return
+        self.stdout.write(f'{"count":>8} {"total ms":>10} {"mean ms":>8} '
+                          f'{"p50 ms":>8} {"p95 ms":>8}  {options["by"]}')
+        for name, count, total, mean, p50, p95 in rows:
+            self.stdout.write(f'{count:>8} {total * 1000:>10.1f} '
+                              f'{mean * 1000:>8.2f} {p50 * 1000:>8.2f} '
+                              f'{p95 * 1000:>8.2f}  {name}')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core import tasks
+
+
+class Command(BaseCommand):
+    help = 'Prints background queue depth and task latency.'
+
+    def handle(self, *args, **options):
+        for name, value in tasks.stats().items():
+            if isinstance(value, float):
+                value = f'{value * 1000:.1f} ms'
+            self.stdout.write(f'{name}: {value}')
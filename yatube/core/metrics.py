@@ -0,0 +1,363 @@
+"""Counters and histograms exported in the Prometheus text format.
+
+Every process adds to its own memory-mapped file in
+``settings.METRICS_DIR`` (an anonymous map when it is unset): an update is
+a locked read and write of one double, with no I/O or IPC. The endpoint
+sums the files of all processes, so a scrape of any worker reports the
+totals of the whole server. Files of exited processes are kept, so the
+totals do not go down when a worker is recycled; empty the directory
+before the server starts.
+
+Gauges are not stored: their functions are called on every scrape.
+"""
+import glob
+import json
+import mmap
+import os
+import threading
+from struct import Struct
+
+from django.conf import settings
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+INITIAL_SIZE: int = 64 * 1024
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+VIEW_NAMESPACES = ('posts', 'users')
+
+USED = Struct('<Q')
+LENGTH = Struct('<i')
+VALUE = Struct('<d')
+
+
+def entry_layout(length):
+    """Offset of the value and size of an entry with a key of ``length``."""
+    offset = LENGTH.size + length
+    offset += -offset % VALUE.size
+    return offset, offset + VALUE.size
+
+
+def read_entries(data):
+    """``(key, value, value position)`` of the entries in a store's bytes."""
+    if len(data) < USED.size:
+        return
+    used = USED.unpack_from(data, 0)[0]
+    position = USED.size
+    while position < used:
+        length = LENGTH.unpack_from(data, position)[0]
+        key = bytes(data[position + LENGTH.size:
+                         position + LENGTH.size + length]).decode()
+        offset, size = entry_layout(length)
+        yield key, VALUE.unpack_from(data, position + offset)[0], (
+            position + offset
+        )
+        position += size
+
+
+class Store:
+    """Doubles keyed by strings in a memory map.
+
+    The map holds the number of bytes in use followed by the entries: key
+    length, key padded to 8 bytes and value. A new entry is written before
+    the byte count that makes readers see it.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        if path:
+            self._file = open(path, 'a+b')
+            size = os.fstat(self._file.fileno()).st_size
+            if size < INITIAL_SIZE:
+                self._file.truncate(INITIAL_SIZE)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+        else:
+            self._map = mmap.mmap(-1, INITIAL_SIZE)
+        self._used = USED.unpack_from(self._map, 0)[0]
+        if not self._used:
+            self._used = USED.size
+            USED.pack_into(self._map, 0, self._used)
+        self._positions = {key: position
+                           for key, _, position in read_entries(self._map)}
+
+    def inc(self, key, amount=1.0):
+        with self._lock:
+            position = self._positions.get(key)
+            if position is None:
+                position = self._allocate(key)
+            value = VALUE.unpack_from(self._map, position)[0]
+            VALUE.pack_into(self._map, position, value + amount)
+
+    def _allocate(self, key):
+        encoded = key.encode()
+        offset, size = entry_layout(len(encoded))
+        if self._used + size > len(self._map):
+            self._grow(max(2 * len(self._map), self._used + size))
+        start = self._used
+        LENGTH.pack_into(self._map, start, len(encoded))
+        self._map[start + LENGTH.size:start + LENGTH.size + len(encoded)] = (
+            encoded
+        )
+        VALUE.pack_into(self._map, start + offset, 0.0)
+        self._used += size
+        USED.pack_into(self._map, 0, self._used)
+        self._positions[key] = start + offset
+        return start + offset
+
+    def _grow(self, size):
+        if self._file is None:
+            grown = mmap.mmap(-1, size)
+            grown[:self._used] = self._map[:self._used]
+        else:
+            self._file.truncate(size)
+            grown = mmap.mmap(self._file.fileno(), 0)
+        self._map.close()
+        self._map = grown
+
+    def items(self):
+        with self._lock:
+            return [(key, value)
+                    for key, value, _ in read_entries(self._map)]
+
+
+def sample_key(name, labels):
+    return json.dumps([name, labels], sort_keys=True)
+
+
+def format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', r'\\')
+                         .replace('\n', r'\n').replace('"', r'\"'))
+        for name, value in sorted(labels.items())
+    )
+    return f'{{{pairs}}}'
+
+
+class Metric:
+    type = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._keys = {}
+
+    def key(self, suffix, labels, **extra):
+        """Store key of a sample, remembered per label values."""
+        values = (suffix, *(labels[name] for name in self.labelnames),
+                  *extra.values())
+        key = self._keys.get(values)
+        if key is None:
+            key = self._keys[values] = sample_key(
+                self.name + suffix,
+                {**{name: str(labels[name]) for name in self.labelnames},
+                 **extra}
+            )
+        return key
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}',
+                f'# TYPE {self.name} {self.type}']
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self.registry.store.inc(self.key('', labels), amount)
+
+    def render(self, samples):
+        return self.header() + [
+            f'{self.name}{format_labels(labels)} {format_value(value)}'
+            for labels, value in samples.get(self.name, ())
+        ]
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(),
+                 buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self.bounds = [format_value(bound) for bound in self.buckets]
+
+    def observe(self, value, **labels):
+        # Buckets are stored per interval and made cumulative on export.
+        bound = '+Inf'
+        for limit, label in zip(self.buckets, self.bounds):
+            if value <= limit:
+                bound = label
+                break
+        store = self.registry.store
+        store.inc(self.key('_bucket', labels, le=bound))
+        store.inc(self.key('_sum', labels), value)
+        store.inc(self.key('_count', labels))
+
+    def render(self, samples):
+        lines = self.header()
+        buckets = {}
+        for labels, value in samples.get(self.name + '_bucket', ()):
+            bound = labels.pop('le')
+            buckets.setdefault(json.dumps(labels, sort_keys=True),
+                               {})[bound] = value
+        sums = {json.dumps(labels, sort_keys=True): value
+                for labels, value in samples.get(self.name + '_sum', ())}
+        for labels, count in samples.get(self.name + '_count', ()):
+            series = json.dumps(labels, sort_keys=True)
+            total = 0
+            for bound in self.bounds:
+                total += buckets.get(series, {}).get(bound, 0)
+                lines.append(f'{self.name}_bucket'
+                             f'{format_labels({**labels, "le": bound})} '
+                             f'{format_value(total)}')
+            lines += [
+                f'{self.name}_bucket{format_labels({**labels, "le": "+Inf"})}'
+                f' {format_value(count)}',
+                f'{self.name}_sum{format_labels(labels)} '
+                f'{format_value(sums.get(series, 0))}',
+                f'{self.name}_count{format_labels(labels)} '
+                f'{format_value(count)}',
+            ]
+        return lines
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def __init__(self, registry, name, documentation, function):
+        super().__init__(registry, name, documentation)
+        self.function = function
+
+    def render(self, samples):
+        return self.header() + [f'{self.name} '
+                                f'{format_value(self.function())}']
+
+
+class Registry:
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.metrics = {}
+        self._store = None
+        self._store_for = None
+        self._lock = threading.Lock()
+
+    def get_directory(self):
+        if self.directory is not None:
+            return self.directory
+        return getattr(settings, 'METRICS_DIR', None)
+
+    @property
+    def store(self):
+        # A forked worker must not write to its parent's map.
+        owner = (os.getpid(), self.get_directory())
+        if self._store_for != owner:
+            with self._lock:
+                if self._store_for != owner:
+                    pid, directory = owner
+                    path = None
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                        path = os.path.join(directory, f'{pid}.db')
+                    self._store = Store(path)
+                    self._store_for = owner
+        return self._store
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name!r} is already registered')
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(),
+                  buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(self, name, documentation, labelnames,
+                                       buckets))
+
+    def gauge(self, name, documentation, function):
+        return self.register(Gauge(self, name, documentation, function))
+
+    def totals(self):
+        """Stored values summed over all processes."""
+        directory = self.get_directory()
+        if not directory:
+            entries = self.store.items()
+        else:
+            entries = []
+            for path in glob.glob(os.path.join(directory, '*.db')):
+                with open(path, 'rb') as file:
+                    entries += [(key, value) for key, value, _
+                                in read_entries(file.read())]
+        totals = {}
+        for key, value in entries:
+            totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def samples(self):
+        """``{sample name: [(labels, value)]}`` of the stored values."""
+        samples = {}
+        for key, value in sorted(self.totals().items()):
+            name, labels = json.loads(key)
+            samples.setdefault(name, []).append((labels, value))
+        return samples
+
+    def render(self):
+        samples = self.samples()
+        lines = []
+        for metric in self.metrics.values():
+            lines += metric.render(samples)
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+request_latency = REGISTRY.histogram(
+    'yatube_http_request_duration_seconds',
+    'Time to produce a response, per URL name.', ('view',)
+)
+responses = REGISTRY.counter(
+    'yatube_http_responses_total',
+    'Responses per URL name and status code.', ('view', 'status')
+)
+request_queries = REGISTRY.histogram(
+    'yatube_http_request_queries',
+    'SQL queries run per request, per URL name.', ('view',), QUERY_BUCKETS
+)
+cache_requests = REGISTRY.counter(
+    'yatube_cache_requests_total',
+    'Application cache lookups per cache and result.', ('cache', 'result')
+)
+
+
+def view_label(request):
+    """URL name of the request's view for the namespaces we track."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None or match.namespace not in VIEW_NAMESPACES:
+        return 'other'
+    return match.view_name
+
+
+def record_request(request, response, duration, queries):
+    view = view_label(request)
+    request_latency.observe(duration, view=view)
+    request_queries.observe(queries, view=view)
+    responses.inc(view=view, status=response.status_code)
+
+
+def record_cache(cache, hits, misses=0):
+    if hits:
+        cache_requests.inc(hits, cache=cache, result='hit')
+    if misses:
+        cache_requests.inc(misses, cache=cache, result='miss')
@@ -0,0 +1,149 @@
+"""Response compression and request metrics.
+
+Text responses are compressed with brotli (when the ``brotli`` package is
+installed) or gzip, whichever the client accepts. Publicly cacheable
+responses such as cached view hits are served many times with the same
+body: their compressed bodies are kept in the cache for the response's
+max-age, keyed by a digest of the body, so a hit is not recompressed.
+
+As with Django's ``GZipMiddleware``, compressing pages that echo user
+input next to a secret (the CSRF token) may expose them to BREACH.
+"""
+import hashlib
+import random
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils.cache import get_max_age, patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+from . import metrics, querylog
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_LENGTH: int = 200
+BROTLI_QUALITY: int = 5
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript',
+                      'application/xml', 'image/svg+xml')
+ACCEPT_RE = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?')
+
+
+def accepted_encodings(header):
+    """Codings of an ``Accept-Encoding`` header not refused with q=0."""
+    accepted = set()
+    for item in header.split(','):
+        match = ACCEPT_RE.match(item)
+        if match is None:
+            continue
+        coding, quality = match.groups()
+        try:
+            if quality is not None and float(quality) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.lower())
+    return accepted
+
+
+def choose_encoding(request):
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING',
+                                                   ''))
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    return compress_string(content)
+
+
+def compressed_body(response, encoding):
+    """Compressed content, reused across hits of a cacheable response."""
+    max_age = get_max_age(response)
+    if not max_age:
+        return compress(response.content, encoding)
+    digest = hashlib.blake2b(response.content, digest_size=16).hexdigest()
+    key = f'compressed:{encoding}:{digest}'
+    body = cache.get(key)
+    if body is None:
+        body = compress(response.content, encoding)
+        cache.set(key, body, max_age)
+    return body
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if (response.streaming or response.has_header('Content-Encoding')
+                or len(response.content) < MIN_LENGTH):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request)
+        if encoding is None:
+            return response
+        body = compressed_body(response, encoding)
+        if len(body) >= len(response.content):
+            return response
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        if response.has_header('ETag'):
+            response['ETag'] = re.sub(r'"$', f';{encoding}"',
+                                      response['ETag'])
+        return response
+
+
+class QueryCounter:
+    """``execute_wrapper`` counting the statements run."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Latency, status and SQL query count per URL name."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        metrics.record_request(request, response,
+                               time.perf_counter() - started, queries.count)
+        return response
+
+
+class QueryLogMiddleware:
+    """Times the SQL of a sample of requests (``core.querylog``)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.QUERY_LOG_SAMPLE_RATE:
+            return self.get_response(request)
+        timer = querylog.QueryTimer(request)
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        querylog.record(request, timer.queries)
+        return response
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -13,3 +14,51 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Task(models.Model):
+    """Задача фоновой очереди."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(verbose_name='Задача', max_length=100)
+    payload = models.TextField(verbose_name='Аргументы', default='{}')
+    status = models.CharField(verbose_name='Статус',
+                              max_length=10,
+                              choices=STATUS_CHOICES,
+                              default=PENDING)
+    attempts = models.PositiveSmallIntegerField(verbose_name='Попытки',
+                                                default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Максимум попыток',
+        default=3
+    )
+    created = models.DateTimeField(verbose_name='Создана',
+                                   auto_now_add=True)
+    run_at = models.DateTimeField(verbose_name='Запустить после',
+                                  default=timezone.now)
+    started = models.DateTimeField(verbose_name='Запущена',
+                                   null=True, blank=True)
+    finished = models.DateTimeField(verbose_name='Завершена',
+                                    null=True, blank=True)
+    last_error = models.TextField(verbose_name='Последняя ошибка',
+                                  blank=True)
+
+    class Meta:
+        ordering = ('run_at',)
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = (models.Index(fields=['status', 'run_at'],
+                                name='task_status_run_at_idx'),)
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
@@ -0,0 +1,63 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Min
+from django.utils.functional import cached_property
+
+EXACT_COUNT_LIMIT: int = 10000
+
+
+def estimated_count(model, using='default'):
+    """Row count estimate of a whole table without scanning it.
+
+    PostgreSQL keeps it in the planner statistics; elsewhere the span of
+    the primary key (two index lookups) is used, which over-counts by the
+    number of deleted rows.
+    """
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s',
+                           [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return int(row[0])
+    bounds = model._default_manager.using(using).aggregate(low=Min('pk'),
+                                                           high=Max('pk'))
+    if bounds['high'] is None:
+        return 0
+    return bounds['high'] - bounds['low'] + 1
+
+
+class EstimatedCountPaginator(Paginator):
+    """Skips ``COUNT(*)`` over big unfiltered tables."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if queryset.query.has_filters():
+            return super().count
+        estimate = estimated_count(queryset.model, queryset.db)
+        if estimate <= EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
+
+
+class KeysetPaginator(EstimatedCountPaginator):
+    """Pages by ``pk`` below ``after`` instead of an OFFSET.
+
+    The object list must be ordered by descending primary key.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, after=None):
+        super().__init__(object_list, per_page, orphans,
+                         allow_empty_first_page)
+        self.after = after
+
+    def page(self, number):
+        if self.after is None:
+            return super().page(number)
+        object_list = self.object_list.filter(
+            pk__lt=self.after
+        )[:self.per_page]
+        return self._get_page(object_list, 1, self)
@@ -0,0 +1,223 @@
+"""Process-wide bounded pool of database connections.
+
+Django keeps one connection per thread and, with ``CONN_MAX_AGE = 0``,
+opens and closes it around every request. A backend using
+``PooledDatabaseWrapperMixin`` (``core.backends.sqlite3``) takes its
+connection from a pool when a thread first needs one and puts it back
+when Django closes it, so the threads of the ASGI, task and warm-up pools
+share at most ``SIZE`` open connections and rarely pay for connecting.
+A thread finding every connection taken waits up to ``TIMEOUT`` seconds,
+then gets an ``OperationalError``.
+
+A connection idle for more than ``CHECK_AFTER`` seconds is checked with
+``SELECT 1`` before it is handed out and replaced if it fails; one older
+than ``MAX_AGE`` seconds is replaced. Options come from the database's
+``POOL`` setting; without it the backend behaves like Django's.
+"""
+import os
+import threading
+import time
+
+from django.db.utils import OperationalError
+
+from . import metrics
+
+SIZE: int = 10
+TIMEOUT: float = 10.0
+MAX_AGE: float = 300.0
+CHECK_AFTER: float = 30.0
+WAIT_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+wait_time = metrics.REGISTRY.histogram(
+    'yatube_db_pool_wait_seconds',
+    'Time to get a database connection from the pool.', buckets=WAIT_BUCKETS
+)
+timeouts = metrics.REGISTRY.counter(
+    'yatube_db_pool_timeouts_total',
+    'Requests for a pooled connection that timed out.'
+)
+opened = metrics.REGISTRY.counter(
+    'yatube_db_connections_opened_total',
+    'Database connections opened by pools.'
+)
+
+
+def close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    def __init__(self, connect, size=SIZE, timeout=TIMEOUT, max_age=MAX_AGE,
+                 check_after=CHECK_AFTER):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.check_after = check_after
+        # Idle connections, most recently returned last.
+        self._idle = []
+        self._opened_at = {}
+        self._open = 0
+        self._condition = threading.Condition()
+
+    @property
+    def in_use(self):
+        with self._condition:
+            return self._open - len(self._idle)
+
+    def acquire(self):
+        """A connection for the caller's exclusive use until ``release``."""
+        started = time.monotonic()
+        with self._condition:
+            while not self._idle and self._open >= self.size:
+                remaining = started + self.timeout - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    if not self._idle and self._open >= self.size:
+                        timeouts.inc()
+                        raise OperationalError(
+                            f'No database connection free after '
+                            f'{self.timeout} s'
+                        )
+            if self._idle:
+                connection, returned = self._idle.pop()
+            else:
+                connection, returned = None, None
+                self._open += 1
+        wait_time.observe(time.monotonic() - started)
+        if connection is not None and not self.usable(connection, returned):
+            self._forget(connection)
+            close_quietly(connection)
+            connection = None
+        if connection is None:
+            # The slot taken above is this connection's.
+            try:
+                connection = self.connect()
+            except Exception:
+                self._free_slot()
+                raise
+            opened.inc()
+            with self._condition:
+                self._opened_at[id(connection)] = time.monotonic()
+        return connection
+
+    def usable(self, connection, returned):
+        now = time.monotonic()
+        with self._condition:
+            opened_at = self._opened_at.get(id(connection), now)
+        if now - opened_at > self.max_age:
+            return False
+        if now - returned <= self.check_after:
+            return True
+        try:
+            cursor = connection.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+        except Exception:
+            return False
+        return True
+
+    def release(self, connection, broken=False):
+        """Takes back a connection; a ``broken`` one is closed."""
+        try:
+            connection.rollback()
+        except Exception:
+            broken = True
+        if broken:
+            self._forget(connection)
+            close_quietly(connection)
+            self._free_slot()
+            return
+        with self._condition:
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def _forget(self, connection):
+        with self._condition:
+            self._opened_at.pop(id(connection), None)
+
+    def _free_slot(self):
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+
+    def close_idle(self):
+        """Closes the idle connections, e.g. before the database goes."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            for connection, _ in idle:
+                self._opened_at.pop(id(connection), None)
+            self._condition.notify_all()
+        for connection, _ in idle:
+            close_quietly(connection)
+
+
+def get_pool(key, connect, options):
+    # A forked worker must not share its parent's connections; changed
+    # options (e.g. ``override_settings``) make a new pool.
+    key = (os.getpid(), *key, tuple(sorted(options.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(
+                connect,
+                size=options.get('SIZE', SIZE),
+                timeout=options.get('TIMEOUT', TIMEOUT),
+                max_age=options.get('MAX_AGE', MAX_AGE),
+                check_after=options.get('CHECK_AFTER', CHECK_AFTER),
+            )
+        return pool
+
+
+def close_all():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_idle()
+
+
+def connections_in_use():
+    with _pools_lock:
+        return sum(pool.in_use for pool in _pools.values())
+
+
+metrics.REGISTRY.gauge('yatube_db_pool_in_use',
+                       'Pooled connections checked out in this process.',
+                       connections_in_use)
+
+
+class PooledDatabaseWrapperMixin:
+    """``DatabaseWrapper`` taking its connections from a ``ConnectionPool``."""
+
+    pool = None
+
+    def uses_pool(self):
+        return bool(self.settings_dict.get('POOL'))
+
+    def get_new_connection(self, conn_params):
+        if not self.uses_pool():
+            return super().get_new_connection(conn_params)
+        parent = super()
+
+        def connect():
+            return parent.get_new_connection(conn_params)
+
+        self.pool = get_pool((self.alias, self.settings_dict['NAME']),
+                             connect, self.settings_dict['POOL'])
+        return self.pool.acquire()
+
+    def _close(self):
+        pool, self.pool = self.pool, None
+        if pool is None or self.connection is None:
+            return super()._close()
+        # Closed inside ``atomic``, Django keeps referring to the
+        # connection: it must not be handed to another thread.
+        broken = self.in_atomic_block or (self.errors_occurred
+                                          and not self.is_usable())
+        pool.release(self.connection, broken)
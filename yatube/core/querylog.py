@@ -0,0 +1,218 @@
+"""Sampled SQL statistics and slow query log.
+
+A share of requests (``settings.QUERY_LOG_SAMPLE_RATE``) runs with an
+``execute_wrapper`` timing its statements. Statements are grouped by
+fingerprint, the SQL with literals and placeholder lists normalized, so
+``IN`` lists of any length and queries differing only in values fall
+together. Each process keeps the count, total time and recent timings
+per view and fingerprint and writes them to ``settings.QUERY_LOG_DIR``
+at most every ``FLUSH_INTERVAL`` seconds; ``manage.py slow_queries``
+merges the files of all processes.
+
+Statements slower than ``settings.QUERY_LOG_SLOW_MS`` are logged along
+with their query plan.
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+SAMPLES: int = 200
+FLUSH_INTERVAL: float = 10.0
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_RE = re.compile(r'%s')
+LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """``sql`` with its literals and value lists replaced by ``?``."""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = PLACEHOLDER_RE.sub('?', sql)
+    sql = LIST_RE.sub('(...)', sql)
+    return WHITESPACE_RE.sub(' ', sql).strip()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unresolved'
+
+
+def explain(connection, sql, params):
+    """Query plan of a statement, one row per line."""
+    prefix = ('EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite'
+              else 'EXPLAIN ')
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        return '\n'.join(' '.join(str(column) for column in row)
+                         for row in cursor.fetchall())
+
+
+class QueryStats:
+    """Count, total and recent timings (seconds) per view and fingerprint."""
+
+    def __init__(self, samples=SAMPLES):
+        self.samples = samples
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._flushed = time.monotonic()
+
+    def add(self, view, queries):
+        with self._lock:
+            for sql, duration in queries:
+                key = (view, fingerprint(sql))
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = [
+                        0, 0.0, deque(maxlen=self.samples)
+                    ]
+                entry[0] += 1
+                entry[1] += duration
+                entry[2].append(duration)
+
+    def snapshot(self):
+        with self._lock:
+            return [[view, sql, count, total, list(timings)]
+                    for (view, sql), (count, total, timings)
+                    in self._entries.items()]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def flush(self, directory=None):
+        """Writes this process's totals; returns the file name."""
+        directory = directory or settings.QUERY_LOG_DIR
+        if not directory:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        # Readers never see a half-written file.
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(handle, 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(temporary, path)
+        self._flushed = time.monotonic()
+        return path
+
+    def maybe_flush(self):
+        if time.monotonic() - self._flushed < FLUSH_INTERVAL:
+            return
+        self._flushed = time.monotonic()
+        try:
+            self.flush()
+        except OSError:
+            logger.exception('Writing query statistics failed')
+
+
+stats = QueryStats()
+
+
+@atexit.register
+def flush_at_exit():
+    if stats.snapshot():
+        try:
+            stats.flush()
+        except OSError:
+            logger.exception('Writing query statistics failed')
+
+
+class QueryTimer:
+    """``execute_wrapper`` timing the statements of one request."""
+
+    def __init__(self, request, slow_ms=None):
+        self.request = request
+        self.slow = (settings.QUERY_LOG_SLOW_MS if slow_ms is None
+                     else slow_ms) / 1000
+        self.queries = []
+        self.explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.explaining:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - started
+        self.queries.append((sql, duration))
+        if duration >= self.slow:
+            self.log_slow(context['connection'], sql, params, many, duration)
+        return result
+
+    def log_slow(self, connection, sql, params, many, duration):
+        plan = '-'
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.explaining = True
+            try:
+                plan = explain(connection, sql, params)
+            except DatabaseError:
+                plan = 'unavailable'
+            finally:
+                self.explaining = False
+        logger.warning('Slow query (%.1f ms) in %s: %s\nPlan:\n%s',
+                       duration * 1000, view_name(self.request),
+                       fingerprint(sql), plan)
+
+
+def record(request, queries):
+    stats.add(view_name(request), queries)
+    stats.maybe_flush()
+
+
+def load(directory=None):
+    """Entries written by all processes, merged per view and fingerprint."""
+    directory = directory or settings.QUERY_LOG_DIR
+    merged = {}
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        with open(path) as file:
+            entries = json.load(file)
+        for view, sql, count, total, timings in entries:
+            entry = merged.setdefault((view, sql), [0, 0.0, []])
+            entry[0] += count
+            entry[1] += total
+            entry[2] += timings
+    return merged
+
+
+def top(entries, by='fingerprint', view=None, order='total', limit=10):
+    """Rows of the heaviest fingerprints (or views), heaviest first.
+
+    Each row is ``(name, count, total, mean, p50, p95)`` in seconds.
+    """
+    groups = {}
+    for (entry_view, sql), (count, total, timings) in entries.items():
+        if view is not None and entry_view != view:
+            continue
+        name = entry_view if by == 'view' else sql
+        group = groups.setdefault(name, [0, 0.0, []])
+        group[0] += count
+        group[1] += total
+        group[2] += timings
+    rows = [(name, count, total, total / count,
+             percentile(timings, 0.5), percentile(timings, 0.95))
+            for name, (count, total, timings) in groups.items()]
+    column = {'count': 1, 'total': 2, 'mean': 3, 'p95': 5}[order]
+    rows.sort(key=lambda row: row[column], reverse=True)
+    return rows[:limit]
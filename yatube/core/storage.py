@@ -0,0 +1,123 @@
+"""Content-addressed file storage for user media and static files."""
+import gzip
+import hashlib
+import os
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HASH_LENGTH: int = 32
+# ``posts/ab/cd/<hash>.webp`` and sorl's ``cache/ab/cd/<md5>.jpg``: the
+# name changes whenever the content does, so responses never go stale.
+IMMUTABLE_NAME_RE = re.compile(
+    r'^[\w-]+/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{32,64}\.\w+$'
+)
+
+
+# ``ManifestStaticFilesStorage`` names: ``css/site.0123456789ab.css``.
+HASHED_STATIC_RE = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+PRECOMPRESSED_EXTENSIONS = ('.css', '.js', '.json', '.map', '.svg', '.txt',
+                            '.xml', '.html', '.ico', '.ttf', '.eot')
+# Sibling suffix -> ``Content-Encoding``, in order of preference.
+PRECOMPRESSED_SUFFIXES = (('.br', 'br'), ('.gz', 'gzip'))
+
+
+def hash_content(content):
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def sharded_name(directory, digest, ext):
+    """``directory/ab/cd/abcd....ext`` keeps directories small."""
+    return os.path.join(directory, digest[:2], digest[2:4],
+                        f'{digest}{ext.lower()}')
+
+
+def is_immutable(name):
+    return bool(IMMUTABLE_NAME_RE.match(name))
+
+
+def is_hashed_static(name):
+    return bool(HASHED_STATIC_RE.search(name))
+
+
+def precompress(content):
+    """``{suffix: body}`` of the compressed variants worth keeping."""
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content, quality=11)
+    return {suffix: body for suffix, body in variants.items()
+            if len(body) < len(content)}
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores files under the hash of their content.
+
+    The upload directory and extension of the requested name are kept,
+    the base name is replaced by the SHA-256 of the content (or by
+    ``content.content_hash`` if the caller already computed one).
+    Saving content that is already stored returns the existing name.
+    """
+
+    def hashed_name(self, name, digest):
+        directory, basename = os.path.split(name)
+        return sharded_name(directory, digest, os.path.splitext(basename)[1])
+
+    def _save(self, name, content):
+        digest = getattr(content, 'content_hash', None) or hash_content(
+            content
+        )
+        name = self.hashed_name(name, digest)
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
+
+
+content_storage = ContentAddressedStorage()
+
+
+class StaticStorage(ManifestStaticFilesStorage):
+    """``collectstatic`` storage: content-hashed names with a manifest and
+    precompressed ``.gz``/``.br`` siblings of the hashed text assets.
+
+    Before ``collectstatic`` has run (development, tests) names resolve to
+    themselves instead of failing on the missing manifest.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if (not dry_run and hashed_name
+                    and not isinstance(processed, Exception)
+                    and hashed_name.endswith(PRECOMPRESSED_EXTENSIONS)):
+                self.write_precompressed(hashed_name)
+            yield name, hashed_name, processed
+
+    def write_precompressed(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        for suffix, body in precompress(content).items():
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(body))
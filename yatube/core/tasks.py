@@ -0,0 +1,259 @@
+"""Lightweight background task queue.
+
+Tasks are plain functions registered with the ``task`` decorator and
+scheduled with ``func.delay(**kwargs)``. Depending on
+``settings.TASK_QUEUE_MODE`` they are:
+
+* ``db`` -- stored in the ``core.Task`` table and executed by
+  ``manage.py run_tasks``;
+* ``thread`` -- executed by an in-process thread pool after the current
+  transaction commits (handy for tests and single-box setups);
+* ``sync`` -- executed inline.
+"""
+import json
+import logging
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+MODE_DB = 'db'
+MODE_THREAD = 'thread'
+MODE_SYNC = 'sync'
+
+DEFAULT_WORKERS: int = 4
+LATENCY_WINDOW: int = 1000
+
+_registry = {}
+# (queue wait, run time) in seconds of recently finished tasks.
+_latencies = deque(maxlen=LATENCY_WINDOW)
+_thread_queue = None
+_thread_queue_lock = threading.Lock()
+
+
+def task(name, max_attempts=3, retry_delay=5):
+    """Registers a function as a background task."""
+    def decorator(func):
+        func.task_name = name
+        func.max_attempts = max_attempts
+        func.retry_delay = retry_delay
+        func.delay = lambda **kwargs: enqueue(name, **kwargs)
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_mode():
+    return getattr(settings, 'TASK_QUEUE_MODE', MODE_DB)
+
+
+def retry_backoff(func, attempt):
+    """Seconds to wait before the next attempt."""
+    return func.retry_delay * 2 ** (attempt - 1)
+
+
+def enqueue(name, **kwargs):
+    """Schedules task ``name`` with keyword arguments ``kwargs``."""
+    func = _registry[name]
+    mode = get_mode()
+    if mode == MODE_DB:
+        Task.objects.create(name=name,
+                            payload=json.dumps(kwargs),
+                            max_attempts=func.max_attempts)
+    elif mode == MODE_THREAD:
+        enqueued = time.monotonic()
+        transaction.on_commit(
+            lambda: get_thread_queue().submit(name, kwargs, enqueued)
+        )
+    else:
+        started = time.monotonic()
+        func(**kwargs)
+        _latencies.append((0.0, time.monotonic() - started))
+
+
+class ThreadQueue:
+    """In-process pool running tasks with retries."""
+
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='tasks')
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    @property
+    def depth(self):
+        return self._pending
+
+    def submit(self, name, kwargs, enqueued=None, attempt=1):
+        with self._idle:
+            self._pending += 1
+        self._executor.submit(self._run, name, kwargs,
+                              enqueued or time.monotonic(), attempt)
+
+    def join(self, timeout=None):
+        """Blocks until every submitted task (and retry) has finished."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0,
+                                       timeout=timeout)
+
+    def _done(self):
+        with self._idle:
+            self._pending -= 1
+            self._idle.notify_all()
+
+    def _run(self, name, kwargs, enqueued, attempt):
+        func = _registry[name]
+        started = time.monotonic()
+        close_old_connections()
+        try:
+            func(**kwargs)
+        except Exception:
+            logger.exception('Task %s failed (attempt %s)', name, attempt)
+            if attempt < func.max_attempts:
+                # Count the retry before this run is marked done so that
+                # ``join`` does not return in between.
+                with self._idle:
+                    self._pending += 1
+                timer = threading.Timer(
+                    retry_backoff(func, attempt),
+                    self._executor.submit,
+                    (self._run, name, kwargs, enqueued, attempt + 1)
+                )
+                timer.daemon = True
+                timer.start()
+        else:
+            _latencies.append((started - enqueued,
+                               time.monotonic() - started))
+        finally:
+            close_old_connections()
+            self._done()
+
+
+def get_thread_queue():
+    global _thread_queue
+    with _thread_queue_lock:
+        if _thread_queue is None:
+            _thread_queue = ThreadQueue(
+                getattr(settings, 'TASK_QUEUE_WORKERS', DEFAULT_WORKERS)
+            )
+        return _thread_queue
+
+
+def execute(task_row):
+    """Runs a claimed ``Task`` row and records the outcome."""
+    func = _registry.get(task_row.name)
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task {task_row.name!r}')
+        func(**json.loads(task_row.payload))
+    except Exception:
+        logger.exception('Task %s failed (attempt %s)',
+                         task_row.name, task_row.attempts)
+        task_row.last_error = traceback.format_exc()
+        if func is not None and task_row.attempts < task_row.max_attempts:
+            task_row.status = Task.PENDING
+            task_row.run_at = timezone.now() + timedelta(
+                seconds=retry_backoff(func, task_row.attempts)
+            )
+        else:
+            task_row.status = Task.FAILED
+            task_row.finished = timezone.now()
+        task_row.save(update_fields=('status', 'run_at', 'finished',
+                                     'last_error'))
+        return False
+    task_row.status = Task.DONE
+    task_row.finished = timezone.now()
+    task_row.save(update_fields=('status', 'finished'))
+    _latencies.append(
+        ((task_row.started - task_row.created).total_seconds(),
+         (task_row.finished - task_row.started).total_seconds())
+    )
+    return True
+
+
+def run_pending(limit=100):
+    """Claims and runs up to ``limit`` due tasks; returns their number."""
+    due = Task.objects.filter(
+        status=Task.PENDING, run_at__lte=timezone.now()
+    ).values_list('pk', flat=True)[:limit]
+    processed = 0
+    for pk in list(due):
+        # A conditional UPDATE is an atomic claim even without
+        # SELECT ... FOR UPDATE, so several workers can share the table.
+        claimed = Task.objects.filter(pk=pk, status=Task.PENDING).update(
+            status=Task.RUNNING,
+            started=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+        if not claimed:
+            continue
+        execute(Task.objects.get(pk=pk))
+        processed += 1
+    return processed
+
+
+def requeue_stale(older_than):
+    """Returns tasks stuck in ``running`` (e.g. after a crash) to the queue."""
+    return Task.objects.filter(
+        status=Task.RUNNING, started__lt=timezone.now() - older_than
+    ).update(status=Task.PENDING, run_at=timezone.now())
+
+
+def purge_finished(older_than):
+    return Task.objects.filter(
+        status=Task.DONE, finished__lt=timezone.now() - older_than
+    ).delete()[0]
+
+
+def queue_depth():
+    """Tasks waiting to run: in this process or in the table."""
+    if get_mode() == MODE_THREAD:
+        return get_thread_queue().depth
+    return Task.objects.filter(status=Task.PENDING).count()
+
+
+metrics.REGISTRY.gauge('yatube_task_queue_depth',
+                       'Background tasks waiting to run.', queue_depth)
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def stats():
+    """Queue depth and latency percentiles (seconds) of recent tasks."""
+    depth = queue_depth()
+    if get_mode() == MODE_THREAD:
+        latencies = list(_latencies)
+    else:
+        recent = Task.objects.filter(status=Task.DONE).order_by(
+            '-finished'
+        ).values_list('created', 'started', 'finished')[:LATENCY_WINDOW]
+        latencies = [((started - created).total_seconds(),
+                      (finished - started).total_seconds())
+                     for created, started, finished in recent]
+    waits = [wait for wait, _ in latencies]
+    runs = [run for _, run in latencies]
+    return {
+        'depth': depth,
+        'failed': Task.objects.filter(status=Task.FAILED).count(),
+        'wait_p50': _percentile(waits, 0.5),
+        'wait_p95': _percentile(waits, 0.95),
+        'run_p50': _percentile(runs, 0.5),
+        'run_p95': _percentile(runs, 0.95),
+    }
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.test import TransactionTestCase
+
+from ..asgi import STREAM_BLOCK, ASGIHandler
+
+
+def exchange(app, method, path, body=b'', headers=()):
+    scope = {'type': 'http', 'method': method, 'path': path,
+             'query_string': b'',
+             'headers': [(b'host', b'testserver'), *headers],
+             'server': ('testserver', 80), 'client': ('127.0.0.1', 1)}
+    messages = [{'type': 'http.request', 'body': body}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+
+def call(app, method, path, body=b'', headers=()):
+    start, *bodies = exchange(app, method, path, body, headers)
+    return start['status'], dict(start['headers']), b''.join(
+        message.get('body', b'') for message in bodies
+    )
+
+
+class ASGIHandlerTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.app = ASGIHandler(threads=2)
+        self.pool_calls = 0
+        run_wsgi = self.app.run_wsgi
+
+        def counting_run_wsgi(environ):
+            self.pool_calls += 1
+            return run_wsgi(environ)
+
+        self.app.run_wsgi = counting_run_wsgi
+
+    def test_cached_read_view_is_served_from_event_loop(self):
+        status, headers, body = call(self.app, 'GET', '/')
+        self.assertEqual(status, 200)
+        self.assertEqual(self.pool_calls, 1)
+        status, headers, cached_body = call(self.app, 'GET', '/')
+        self.assertEqual(status, 200)
+        self.assertEqual(self.pool_calls, 1)
+        self.assertEqual(cached_body, body)
+        self.assertEqual(headers[b'x-frame-options'], b'SAMEORIGIN')
+
+    def test_shared_cache_hits_run_middleware_off_the_loop(self):
+        call(self.app, 'GET', '/')
+        threads = []
+        middleware = self.app.response_middleware[0]
+        process_response = middleware.process_response
+
+        def recording_process_response(request, response):
+            threads.append(threading.current_thread())
+            return process_response(request, response)
+
+        # Any cache but the in-process one is looked up in the executor.
+        with mock.patch('core.asgi.LocMemCache', type(None)):
+            with mock.patch.object(middleware, 'process_response',
+                                   recording_process_response):
+                status, _, _ = call(self.app, 'GET', '/')
+        self.assertEqual(status, 200)
+        self.assertEqual(self.pool_calls, 1)
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    def test_sessions_do_not_share_the_cached_entry(self):
+        call(self.app, 'GET', '/')
+        status, _, _ = call(self.app, 'GET', '/',
+                            headers=[(b'cookie', b'sessionid=other')])
+        self.assertEqual(status, 200)
+        self.assertEqual(self.pool_calls, 2)
+
+    def test_other_views_run_in_pool(self):
+        status, headers, _ = call(self.app, 'GET', '/create/')
+        self.assertEqual(status, 302)
+        self.assertTrue(headers[b'location'].startswith(b'/auth/login/'))
+        status, _, _ = call(self.app, 'GET', '/about/author/')
+        self.assertEqual(status, 200)
+        self.assertEqual(self.pool_calls, 2)
+
+    def test_streaming_response_is_sent_in_blocks(self):
+        closed = []
+
+        def chunks():
+            try:
+                for _ in range(40):
+                    yield b'x' * 4096
+            finally:
+                closed.append(True)
+
+        def handler(environ, start_response):
+            response = StreamingHttpResponse(chunks())
+            start_response('200 OK', list(response.items()))
+            return response
+
+        self.app.wsgi_handler = handler
+        sent = exchange(self.app, 'GET', '/file/')
+        bodies = [message['body'] for message in sent[1:]]
+        self.assertEqual(b''.join(bodies), b'x' * 4096 * 40)
+        self.assertEqual([len(body) for body in bodies],
+                         [STREAM_BLOCK, STREAM_BLOCK, 4096 * 40
+                          - 2 * STREAM_BLOCK, 0])
+        self.assertEqual(closed, [True])
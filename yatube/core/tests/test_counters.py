@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.counters import BufferedCounter
+from posts.models import Post
+
+User = get_user_model()
+
+
+class BufferedCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='counted')
+        cls.posts = [Post.objects.create(author=author, text=f'post {i}')
+                     for i in range(3)]
+
+    def setUp(self):
+        self.counter = BufferedCounter(Post, 'likes_count')
+        self.addCleanup(BufferedCounter.instances.remove, self.counter)
+
+    def test_pending_deltas_are_visible_before_flush(self):
+        post = self.posts[0]
+        self.counter.add(post.pk)
+        self.counter.add(post.pk)
+        post.refresh_from_db()
+        self.assertEqual(post.likes_count, 0)
+        self.assertEqual(self.counter.value(post), 2)
+
+    def test_flush_groups_updates_by_delta(self):
+        for _ in range(5):
+            for post in self.posts[:2]:
+                self.counter.add(post.pk)
+        self.counter.add(self.posts[2].pk, 2)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.counter.flush(), 2)
+        # Two UPDATEs plus the savepoint around them.
+        self.assertLessEqual(len(queries), 4)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('likes_count',
+                                                         flat=True)),
+            [5, 5, 2]
+        )
+        self.assertEqual(self.counter.pending(self.posts[0].pk), 0)
+
+    def test_cancelled_deltas_are_not_written(self):
+        self.counter.add(self.posts[0].pk)
+        self.counter.add(self.posts[0].pk, -1)
+        self.assertEqual(self.counter.flush(), 0)
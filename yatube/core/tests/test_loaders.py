@@ -0,0 +1,32 @@
+from django.template import Context, Engine
+from django.test import SimpleTestCase
+
+from ..loaders import minify
+
+
+class MinifyTests(SimpleTestCase):
+    def test_strips_indentation_and_tag_lines(self):
+        source = (
+            '<ul>\n'
+            '    {% for item in items %}\n'
+            '      <li>\n'
+            '        {{ item }}\n'
+            '      </li>\n'
+            '\n'
+            '    {% endfor %}\n'
+            '</ul>\n'
+        )
+        self.assertEqual(minify(source), (
+            '<ul>\n{% for item in items %}<li>\n{{ item }}\n</li>\n'
+            '{% endfor %}</ul>\n'
+        ))
+        rendered = Engine().from_string(minify(source)).render(
+            Context({'items': ['a', 'b']})
+        )
+        self.assertEqual(rendered, '<ul>\n<li>\na\n</li>\n<li>\nb\n</li>\n'
+                                   '</ul>\n')
+
+    def test_keeps_preformatted_text(self):
+        source = '  <pre>\n  code\n\n  </pre>\n  <textarea>\n  x</textarea>'
+        self.assertEqual(minify(source), '<pre>\n  code\n\n  </pre>\n'
+                                         '<textarea>\n  x</textarea>')
@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..metrics import REGISTRY, Registry, Store
+
+
+class RegistryTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.registry = Registry(self.directory)
+        self.requests = self.registry.counter(
+            'test_requests_total', 'Requests.', ('view',)
+        )
+        self.latency = self.registry.histogram(
+            'test_latency_seconds', 'Latency.', buckets=(0.1, 1.0)
+        )
+
+    def test_render(self):
+        self.requests.inc(view='posts:index')
+        self.requests.inc(2, view='posts:index')
+        for value in (0.05, 0.5, 5):
+            self.latency.observe(value)
+        self.registry.gauge('test_depth', 'Depth.', lambda: 7)
+        self.assertEqual(self.registry.render(), '\n'.join((
+            '# HELP test_requests_total Requests.',
+            '# TYPE test_requests_total counter',
+            'test_requests_total{view="posts:index"} 3',
+            '# HELP test_latency_seconds Latency.',
+            '# TYPE test_latency_seconds histogram',
+            'test_latency_seconds_bucket{le="0.1"} 1',
+            'test_latency_seconds_bucket{le="1"} 2',
+            'test_latency_seconds_bucket{le="+Inf"} 3',
+            'test_latency_seconds_sum 5.55',
+            'test_latency_seconds_count 3',
+            '# HELP test_depth Depth.',
+            '# TYPE test_depth gauge',
+            'test_depth 7',
+        )) + '\n')
+
+    def test_processes_are_summed(self):
+        self.requests.inc(view='posts:index')
+        self.latency.observe(0.5)
+        worker = multiprocessing.get_context('fork').Process(
+            target=self.requests.inc, kwargs={'view': 'posts:index'}
+        )
+        worker.start()
+        worker.join()
+        self.requests.inc(view='posts:profile')
+        rendered = self.registry.render()
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        self.assertIn('test_requests_total{view="posts:index"} 2', rendered)
+        self.assertIn('test_requests_total{view="posts:profile"} 1',
+                      rendered)
+        self.assertIn('test_latency_seconds_count 1', rendered)
+
+    def test_store_survives_reopening_and_growth(self):
+        path = f'{self.directory}/store.db'
+        store = Store(path)
+        for number in range(3000):
+            store.inc(f'key {number}', number)
+        store.inc('key 1', 0.5)
+        self.assertEqual(dict(Store(path).items())['key 1'], 1.5)
+        self.assertEqual(len(Store(path).items()), 3000)
+
+
+class MetricsEndpointTests(TestCase):
+    def scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_requests_are_measured(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get('/missing/')
+        content = self.scrape()
+        self.assertIn('yatube_http_request_duration_seconds_count'
+                      '{view="posts:index"}', content)
+        self.assertIn('yatube_http_request_queries_bucket'
+                      '{le="+Inf",view="posts:index"}', content)
+        self.assertIn('yatube_http_responses_total'
+                      '{status="404",view="other"}', content)
+        self.assertIn('yatube_task_queue_depth 0', content)
+
+    def test_other_addresses_are_refused(self):
+        response = self.client.get(reverse('metrics'),
+                                   REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_addresses_come_from_settings(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_replaces_addresses(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('metrics'),
+                                   HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('metrics'),
+                                   HTTP_AUTHORIZATION='Bearer secret',
+                                   REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(response.status_code, 200)
+
+    def test_application_metrics_are_registered(self):
+        self.assertIn('yatube_thumbnails_generated_total', REGISTRY.metrics)
+        self.assertIn('yatube_cache_requests_total', REGISTRY.metrics)
@@ -0,0 +1,63 @@
+import gzip
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from django.utils.cache import patch_response_headers
+
+from .. import middleware
+from ..middleware import CompressionMiddleware
+
+BODY = b'<p>' + b'compressible ' * 100 + b'</p>'
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = CompressionMiddleware()
+
+    def process(self, response, accept='gzip, deflate'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept)
+        return self.middleware.process_response(request, response)
+
+    def test_gzip(self):
+        response = self.process(HttpResponse(BODY))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']),
+                         len(response.content))
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    def test_brotli_preferred(self):
+        fake = mock.Mock()
+        fake.compress.return_value = b'br'
+        with mock.patch.object(middleware, 'brotli', fake):
+            response = self.process(HttpResponse(BODY), 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response.content, b'br')
+
+    def test_skipped(self):
+        cases = (
+            (HttpResponse(BODY), 'identity'),
+            (HttpResponse(BODY), 'gzip;q=0'),
+            (HttpResponse(b'<p>short</p>'), 'gzip'),
+            (HttpResponse(BODY, content_type='image/png'), 'gzip'),
+            (StreamingHttpResponse([BODY]), 'gzip'),
+        )
+        for response, accept in cases:
+            with self.subTest(accept=accept):
+                self.assertFalse(self.process(response, accept).has_header(
+                    'Content-Encoding'
+                ))
+
+    def test_cacheable_body_compressed_once(self):
+        with mock.patch.object(middleware, 'compress',
+                               wraps=middleware.compress) as compress:
+            for _ in range(3):
+                response = HttpResponse(BODY)
+                patch_response_headers(response, 20)
+                self.process(response)
+            self.process(HttpResponse(BODY))
+        self.assertEqual(compress.call_count, 2)
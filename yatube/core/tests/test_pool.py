@@ -0,0 +1,100 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+from django.db.utils import ConnectionHandler, OperationalError
+from django.test import SimpleTestCase
+
+from .. import pool
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'db.sqlite3')
+        self.connects = 0
+
+    def connect(self):
+        self.connects += 1
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def make_pool(self, **options):
+        connections = pool.ConnectionPool(self.connect, **options)
+        self.addCleanup(connections.close_idle)
+        return connections
+
+    def test_connections_are_reused(self):
+        connections = self.make_pool(size=2)
+        first = connections.acquire()
+        connections.release(first)
+        self.assertIs(connections.acquire(), first)
+        self.assertEqual(self.connects, 1)
+
+    def test_size_is_bounded(self):
+        connections = self.make_pool(size=1, timeout=0.05)
+        connections.acquire()
+        with self.assertRaises(OperationalError):
+            connections.acquire()
+        self.assertEqual(self.connects, 1)
+
+    def test_waiter_gets_released_connection(self):
+        connections = self.make_pool(size=1, timeout=5)
+        held = connections.acquire()
+        timer = threading.Timer(0.05, connections.release, (held,))
+        timer.start()
+        self.assertIs(connections.acquire(), held)
+        timer.join()
+
+    def test_dead_idle_connection_is_replaced(self):
+        connections = self.make_pool(size=1, check_after=0)
+        first = connections.acquire()
+        connections.release(first)
+        first.close()
+        second = connections.acquire()
+        self.assertIsNot(second, first)
+        second.execute('SELECT 1')
+        self.assertEqual(self.connects, 2)
+
+    def test_old_connection_is_replaced(self):
+        connections = self.make_pool(size=1, max_age=0)
+        first = connections.acquire()
+        connections.release(first)
+        self.assertIsNot(connections.acquire(), first)
+
+    def test_broken_connection_frees_its_slot(self):
+        connections = self.make_pool(size=1, timeout=0.05)
+        connections.release(connections.acquire(), broken=True)
+        connections.acquire()
+        self.assertEqual(self.connects, 2)
+
+
+class PooledBackendTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.connections = ConnectionHandler({'default': {
+            'ENGINE': 'core.backends.sqlite3',
+            'NAME': os.path.join(directory, 'db.sqlite3'),
+            'POOL': {'SIZE': 2},
+        }})
+        self.addCleanup(pool.close_all)
+
+    def query(self, raw_connections):
+        connection = self.connections['default']
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        raw_connections.append(connection.connection)
+        connection.close()
+
+    def test_threads_share_connections(self):
+        raw_connections = []
+        for _ in range(3):
+            thread = threading.Thread(target=self.query,
+                                      args=(raw_connections,))
+            thread.start()
+            thread.join()
+        self.assertEqual(len(set(map(id, raw_connections))), 1)
+        self.assertEqual(pool.connections_in_use(), 0)
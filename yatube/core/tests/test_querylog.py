@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import querylog
+
+User = get_user_model()
+
+
+class FingerprintTests(TestCase):
+    def test_literals_and_lists_are_normalized(self):
+        self.assertEqual(
+            querylog.fingerprint(
+                'SELECT "a"."id" FROM "a"\n  WHERE "a"."name" = \'it\'\'s\' '
+                'AND "a"."id" IN (%s, %s, %s) LIMIT 21'
+            ),
+            'SELECT "a"."id" FROM "a" WHERE "a"."name" = ? '
+            'AND "a"."id" IN (...) LIMIT ?'
+        )
+        self.assertEqual(querylog.fingerprint('SELECT 1 WHERE x IN (%s)'),
+                         querylog.fingerprint('SELECT 2 WHERE x IN (%s,%s)'))
+
+
+@override_settings(QUERY_LOG_SAMPLE_RATE=1.0)
+class QueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        querylog.stats.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_statements_recorded_per_view(self):
+        self.client.get(reverse('posts:profile', args=(self.user.username,)))
+        querylog.stats.flush(self.directory)
+        entries = querylog.load(self.directory)
+        views = {view for view, _ in entries}
+        self.assertEqual(views, {'posts:profile'})
+        rows = querylog.top(entries)
+        self.assertTrue(any('FROM "auth_user"' in name
+                            for name, *_ in rows))
+        for name, count, total, mean, p50, p95 in rows:
+            self.assertGreater(count, 0)
+            self.assertLessEqual(p50, p95)
+
+    @override_settings(QUERY_LOG_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_timed(self):
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(querylog.stats.snapshot(), [])
+
+    @override_settings(QUERY_LOG_SLOW_MS=0)
+    def test_slow_statements_logged_with_plan(self):
+        with self.assertLogs('core.querylog', 'WARNING') as logs:
+            self.client.get(reverse('posts:profile',
+                                    args=(self.user.username,)))
+        self.assertIn('in posts:profile', logs.output[0])
+        self.assertRegex('\n'.join(logs.output), r'Plan:\n.*(SEARCH|SCAN)')
+
+    def test_command_prints_top_offenders(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:profile', args=(self.user.username,)))
+        querylog.stats.flush(self.directory)
+        out = StringIO()
+        call_command('slow_queries', '--dir', self.directory, '--by=view',
+                     stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertIn('p95 ms', lines[0])
+        self.assertEqual(
+            sorted(line.split()[-1] for line in lines[1:]),
+            ['posts:index', 'posts:profile']
+        )
+        out = StringIO()
+        call_command('slow_queries', '--dir', self.directory,
+                     '--view=posts:index', '--limit=1', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+    def test_command_reads_configured_directory(self):
+        self.client.get(reverse('posts:index'))
+        querylog.stats.flush(self.directory)
+        out = StringIO()
+        with self.settings(QUERY_LOG_DIR=self.directory):
+            call_command('slow_queries', '--by=view', stdout=out)
+        self.assertEqual(out.getvalue().splitlines()[1].split()[-1],
+                         'posts:index')
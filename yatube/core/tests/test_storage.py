@@ -0,0 +1,125 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+
+from ..storage import ContentAddressedStorage, is_hashed_static, is_immutable
+from ..views import IMMUTABLE_CACHE_CONTROL, media, static
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.storage = ContentAddressedStorage()
+
+    def test_names_are_sharded_content_hashes(self):
+        name = self.storage.save('posts/photo.JPG', ContentFile(b'one'))
+        directory, first, second, basename = name.split('/')
+        self.assertEqual(directory, 'posts')
+        self.assertTrue(basename.startswith(first + second))
+        self.assertTrue(basename.endswith('.jpg'))
+        self.assertTrue(is_immutable(name))
+
+    def test_same_content_is_stored_once(self):
+        first = self.storage.save('posts/a.png', ContentFile(b'same'))
+        second = self.storage.save('posts/b.png', ContentFile(b'same'))
+        other = self.storage.save('posts/c.png', ContentFile(b'other'))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(len(os.listdir(os.path.dirname(
+            self.storage.path(first)
+        ))), 1)
+
+    def test_media_view_sends_immutable_headers(self):
+        name = self.storage.save('posts/a.png', ContentFile(b'cached'))
+        legacy = 'posts/legacy.png'
+        with open(self.storage.path(legacy), 'wb') as file:
+            file.write(b'legacy')
+        factory = RequestFactory()
+        response = media(factory.get('/media/' + name), name)
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        response = media(factory.get('/media/' + legacy), legacy)
+        self.assertFalse(response.has_header('Cache-Control'))
+
+    def test_media_url_is_routed_to_the_view(self):
+        name = self.storage.save('posts/a.png', ContentFile(b'served'))
+        response = self.client.get(settings.MEDIA_URL + name)
+        self.assertEqual(b''.join(response.streaming_content), b'served')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+
+
+@override_settings(
+    STATIC_ROOT=TEMP_STATIC_ROOT,
+    STATICFILES_FINDERS=[
+        'django.contrib.staticfiles.finders.FileSystemFinder'
+    ],
+)
+class StaticStorageTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(TEMP_STATIC_ROOT,
+                               'staticfiles.json')) as manifest:
+            cls.paths = json.load(manifest)['paths']
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.css = self.paths['css/bootstrap.min.css']
+
+    def get(self, path, accept=''):
+        return static(self.factory.get('/static/' + path,
+                                       HTTP_ACCEPT_ENCODING=accept), path)
+
+    def test_hashed_names_with_compressed_siblings(self):
+        self.assertTrue(is_hashed_static(self.css))
+        with open(os.path.join(TEMP_STATIC_ROOT, self.css), 'rb') as css, \
+                open(os.path.join(TEMP_STATIC_ROOT,
+                                  self.css + '.gz'), 'rb') as compressed:
+            self.assertEqual(gzip.decompress(compressed.read()), css.read())
+        # Images are already compressed.
+        self.assertFalse(os.path.exists(os.path.join(
+            TEMP_STATIC_ROOT, self.paths['imgs/logo.png'] + '.gz'
+        )))
+
+    def test_serves_precompressed_with_immutable_headers(self):
+        response = self.get(self.css, 'gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        response.close()
+        response = self.get(self.css)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response.close()
+
+    def test_plain_names_are_not_immutable(self):
+        response = self.get('css/bootstrap.min.css', 'gzip')
+        self.assertFalse(response.has_header('Cache-Control'))
+        response.close()
+
+    def test_urls_use_manifest(self):
+        self.assertEqual(staticfiles_storage.stored_name(
+            'css/bootstrap.min.css'
+        ), self.css)
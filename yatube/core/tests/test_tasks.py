@@ -0,0 +1,59 @@
+from django.test import TestCase, override_settings
+
+from .. import tasks
+from ..models import Task
+
+CALLS = []
+
+
+@tasks.task('tests.record', retry_delay=0)
+def record(value):
+    CALLS.append(value)
+
+
+@tasks.task('tests.flaky', max_attempts=2, retry_delay=0)
+def flaky(value):
+    if value not in CALLS:
+        CALLS.append(value)
+        raise ValueError('first attempt fails')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    @override_settings(TASK_QUEUE_MODE=tasks.MODE_DB)
+    def test_db_mode_runs_in_worker(self):
+        record.delay(value=1)
+        self.assertEqual(CALLS, [])
+        self.assertEqual(tasks.stats()['depth'], 1)
+        self.assertEqual(tasks.run_pending(), 1)
+        self.assertEqual(CALLS, [1])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+        self.assertEqual(tasks.stats()['depth'], 0)
+
+    @override_settings(TASK_QUEUE_MODE=tasks.MODE_DB)
+    def test_db_mode_retries(self):
+        flaky.delay(value=2)
+        tasks.run_pending()
+        row = Task.objects.get()
+        self.assertEqual(row.status, Task.PENDING)
+        self.assertIn('ValueError', row.last_error)
+        tasks.run_pending()
+        row.refresh_from_db()
+        self.assertEqual(row.status, Task.DONE)
+        self.assertEqual(row.attempts, 2)
+
+    @override_settings(TASK_QUEUE_MODE=tasks.MODE_SYNC)
+    def test_sync_mode(self):
+        record.delay(value=3)
+        self.assertEqual(CALLS, [3])
+        self.assertFalse(Task.objects.exists())
+
+    def test_thread_queue_retries(self):
+        queue = tasks.ThreadQueue(workers=2)
+        queue.submit('tests.record', {'value': 4})
+        queue.submit('tests.flaky', {'value': 5})
+        self.assertTrue(queue.join(timeout=5))
+        self.assertEqual(sorted(CALLS), [4, 5])
+        self.assertEqual(queue.depth, 0)
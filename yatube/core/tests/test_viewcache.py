@@ -0,0 +1,98 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from ..viewcache import cached_view, lock_key
+
+CLIENTS = 100
+
+
+class CachedViewTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+        self.fail = False
+
+    def view(self, request):
+        with self.calls_lock:
+            self.calls += 1
+            number = self.calls
+        if self.fail:
+            raise OperationalError('database is locked')
+        # Long enough for every client to miss before it is stored.
+        time.sleep(0.2)
+        return HttpResponse(f'render {number}')
+
+    def get(self, view):
+        return view(self.factory.get('/feed/')).content
+
+    def test_one_render_for_simultaneous_misses(self):
+        view = cached_view(20, key_prefix='test')(self.view)
+        barrier = threading.Barrier(CLIENTS)
+        bodies = []
+
+        def client():
+            barrier.wait()
+            bodies.append(self.get(view))
+
+        clients = [threading.Thread(target=client) for _ in range(CLIENTS)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(bodies, [b'render 1'] * CLIENTS)
+
+    def test_fresh_entry_is_reused(self):
+        view = cached_view(20, key_prefix='test')(self.view)
+        self.assertEqual(self.get(view), b'render 1')
+        self.assertEqual(self.get(view), b'render 1')
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_entry_served_during_revalidation(self):
+        view = cached_view(0, 60, key_prefix='test')(self.view)
+        self.assertEqual(self.get(view), b'render 1')
+        request = self.factory.get('/feed/')
+        cache.add(lock_key(request, 'test'), 1)
+        self.assertEqual(view(request).content, b'render 1')
+        self.assertEqual(self.calls, 1)
+        cache.delete(lock_key(request, 'test'))
+        self.assertEqual(self.get(view), b'render 2')
+
+    def test_stale_entry_served_while_database_fails(self):
+        view = cached_view(0, 60, key_prefix='test')(self.view)
+        self.get(view)
+        self.fail = True
+        with self.assertLogs('core.viewcache', 'ERROR'):
+            self.assertEqual(self.get(view), b'render 1')
+        self.assertEqual(self.calls, 2)
+
+    def test_miss_while_database_fails_raises(self):
+        view = cached_view(20, key_prefix='test')(self.view)
+        self.fail = True
+        with self.assertRaises(OperationalError):
+            self.get(view)
+
+    def test_other_methods_are_not_cached(self):
+        view = cached_view(20, key_prefix='test')(self.view)
+        view(self.factory.post('/feed/'))
+        view(self.factory.post('/feed/'))
+        self.assertEqual(self.calls, 2)
+
+    def test_entries_are_per_session(self):
+        view = cached_view(20, key_prefix='test')(self.view)
+
+        def get(cookie):
+            return view(self.factory.get('/feed/', HTTP_COOKIE=cookie)).content
+
+        self.assertEqual(get('sessionid=first'), b'render 1')
+        self.assertEqual(get('sessionid=second'), b'render 2')
+        self.assertEqual(get(''), b'render 3')
+        self.assertEqual(get('csrftoken=token'), b'render 3')
+        self.assertEqual(get('sessionid=first; csrftoken=token'), b'render 1')
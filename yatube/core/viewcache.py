@@ -0,0 +1,152 @@
+"""Whole-response view cache with stampede protection.
+
+Like ``cache_page``, responses are keyed by URL and the ``Vary`` headers
+the view sent, and also by the session cookie: signed-in visitors get
+their own entries (``SessionMiddleware`` adds ``Vary: Cookie`` only after
+the key is learnt), visitors without a session share one. Each entry holds
+the response together with the time it stops being fresh (``soft_ttl``);
+the cache drops it after ``hard_ttl``. Between the two a stale response
+is still served while one request renders the new one, so an expiring
+entry of a busy page costs a single render instead of one per concurrent
+request. The same happens when the page cannot be rendered because the
+database is unavailable.
+
+Requests for a URL that has no entry at all wait for the request holding
+the lock of the URL and session (taken with ``cache.add``, so it holds
+across processes sharing the cache) instead of rendering it again, for up
+to ``LOCK_TIMEOUT`` seconds.
+"""
+import hashlib
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError
+from django.utils.cache import (get_cache_key, learn_cache_key,
+                                patch_response_headers)
+from django.utils.encoding import iri_to_uri
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+LOCK_TIMEOUT: float = 10.0
+POLL_INTERVAL: float = 0.02
+HARD_TTL_FACTOR: int = 15
+
+
+def session_prefix(request, key_prefix):
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not session:
+        return key_prefix
+    return f'{key_prefix}.{hashlib.md5(session.encode()).hexdigest()}'
+
+
+def lock_key(request, key_prefix):
+    url = hashlib.md5(
+        iri_to_uri(request.build_absolute_uri()).encode('ascii')
+    ).hexdigest()
+    return f'views.lock.{session_prefix(request, key_prefix)}.{url}'
+
+
+def fresh_response(entry):
+    """The response of a cache entry while it is fresh, else ``None``."""
+    if entry is None:
+        return None
+    response, fresh_until = entry
+    return response if time.time() < fresh_until else None
+
+
+def cacheable(request, response):
+    if (request.method != 'GET' or response.status_code != 200
+            or response.streaming):
+        return False
+    if 'private' in response.get('Cache-Control', ''):
+        return False
+    # A cookie set in reply to a visitor without a session would be
+    # handed to everyone sharing the entry.
+    return not (response.cookies
+                and settings.SESSION_COOKIE_NAME not in request.COOKIES)
+
+
+class CachedView:
+    def __init__(self, view, soft_ttl, hard_ttl, key_prefix, cache_alias):
+        self.view = view
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.key_prefix = key_prefix
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        # Cache connections are per thread.
+        return caches[self.cache_alias]
+
+    def __call__(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return self.view(request, *args, **kwargs)
+        lock = lock_key(request, self.key_prefix)
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        entry = self.lookup(request)
+        response = fresh_response(entry)
+        metrics.record_cache('view', int(response is not None),
+                             int(response is None))
+        while response is None:
+            if self.cache.add(lock, 1, LOCK_TIMEOUT):
+                try:
+                    return self.render(request, entry, args, kwargs)
+                finally:
+                    self.cache.delete(lock)
+            if entry is not None:
+                return entry[0]
+            if time.monotonic() > deadline:
+                return self.view(request, *args, **kwargs)
+            time.sleep(POLL_INTERVAL)
+            entry = self.lookup(request)
+            response = fresh_response(entry)
+        return response
+
+    def lookup(self, request):
+        cache_key = get_cache_key(request,
+                                  session_prefix(request, self.key_prefix),
+                                  'GET', cache=self.cache)
+        return self.cache.get(cache_key) if cache_key else None
+
+    def render(self, request, stale, args, kwargs):
+        try:
+            response = self.view(request, *args, **kwargs)
+        except DatabaseError:
+            if stale is None:
+                raise
+            logger.exception('Serving a stale %s', request.path)
+            return stale[0]
+        if cacheable(request, response):
+            patch_response_headers(response, self.soft_ttl)
+            cache_key = learn_cache_key(
+                request, response, self.hard_ttl,
+                session_prefix(request, self.key_prefix), cache=self.cache
+            )
+            self.cache.set(cache_key,
+                           (response, time.time() + self.soft_ttl),
+                           self.hard_ttl)
+        return response
+
+
+def cached_view(soft_ttl, hard_ttl=None, key_prefix='', cache_alias='default'):
+    """Caches the view's GET responses for ``soft_ttl`` seconds, then
+    serves them stale during revalidation up to ``hard_ttl``."""
+    if hard_ttl is None:
+        hard_ttl = soft_ttl * HARD_TTL_FACTOR
+
+    def decorator(view):
+        cached = CachedView(view, soft_ttl, hard_ttl, key_prefix, cache_alias)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return cached(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
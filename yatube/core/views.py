@@ -1,4 +1,18 @@
+import mimetypes
+import os
+from hmac import compare_digest
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.cache import patch_vary_headers
+from django.views.static import serve
+
+from . import metrics as registry
+from .middleware import accepted_encodings
+from .storage import PRECOMPRESSED_SUFFIXES, is_hashed_static, is_immutable
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
 
 
 def page_not_found(request, exception):
@@ -17,3 +31,59 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def media(request, path):
+    """Serves user media; content-addressed files are cached forever."""
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if is_immutable(path):
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def static(request, path):
+    """Serves collected static files for single-box deployments.
+
+    Hashed names are cached forever; a precompressed sibling written by
+    ``StaticStorage`` is sent to clients accepting its encoding.
+    """
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING',
+                                                   ''))
+    encoding = None
+    for suffix, coding in PRECOMPRESSED_SUFFIXES:
+        if coding in accepted and os.path.isfile(
+            os.path.join(settings.STATIC_ROOT, path + suffix)
+        ):
+            encoding = coding
+            break
+    if encoding is None:
+        response = serve(request, path, document_root=settings.STATIC_ROOT)
+    else:
+        response = serve(request, path + suffix,
+                         document_root=settings.STATIC_ROOT)
+        # Type of the original file, not of the archive.
+        content_type, _ = mimetypes.guess_type(path)
+        response['Content-Type'] = content_type or 'application/octet-stream'
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if is_hashed_static(path):
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def metrics_allowed(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        return compare_digest(
+            request.META.get('HTTP_AUTHORIZATION', '').encode(),
+            f'Bearer {token}'.encode()
+        )
+    return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+
+def metrics(request):
+    """Prometheus scrape endpoint for the scraper set in the settings."""
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(registry.REGISTRY.render(),
+                        content_type=registry.CONTENT_TYPE)
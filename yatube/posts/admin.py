@@ -1,15 +1,154 @@
-from django.contrib import admin
+from django import forms
+from django.core.exceptions import ValidationError
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.views.main import ChangeList, ORDER_VAR, PAGE_VAR
+from django.template.response import TemplateResponse
+
+from core.paginator import KeysetPaginator
+from . import feeds, revisions
 from .models import Post, Group
 
+KEYSET_VAR = 'after'
+DELETE_CHUNK_SIZE: int = 500
+
+
+class PostActionForm(helpers.ActionForm):
+    group = forms.ModelChoiceField(Group.objects.all(),
+                                   required=False,
+                                   label='Группа')
+
+
+class PostChangeList(ChangeList):
+    @property
+    def next_keyset_url(self):
+        """Link to the page after the last shown post (``-pk`` order only)."""
+        if ORDER_VAR in self.params:
+            return None
+        results = list(self.result_list)
+        if len(results) < self.list_per_page:
+            return None
+        return self.get_query_string({KEYSET_VAR: results[-1].pk},
+                                     [PAGE_VAR])
+
 
 class PostAdmin(admin.ModelAdmin):
     """Custom admin panel for posts."""
 
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
     list_editable = ('group',)
+    ordering = ('-pk',)
+    show_full_result_count = False
+    action_form = PostActionForm
+    actions = ('regroup', 'delete_in_chunks')
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Replaced by ``delete_in_chunks``: the stock action loads every
+        # selected post and its comments to build the confirmation page.
+        actions.pop('delete_selected', None)
+        return actions
+
+    def changelist_view(self, request, extra_context=None):
+        request.GET = request.GET.copy()
+        after = request.GET.pop(KEYSET_VAR, [''])[-1]
+        request.keyset_after = (
+            int(after) if after.isdigit() and ORDER_VAR not in request.GET
+            else None
+        )
+        return super().changelist_view(request, extra_context)
+
+    def save_model(self, request, obj, form, change):
+        previous = change and Post.objects.filter(pk=obj.pk).values_list(
+            'text', 'image', 'group_id'
+        ).first()
+        super().save_model(request, obj, form, change)
+        if previous:
+            text, image, group_id = previous
+            revisions.record_edit(obj, text, image, editor=request.user)
+            if group_id != obj.group_id:
+                feeds.invalidate([(feeds.GROUP, group_id),
+                                  (feeds.GROUP, obj.group_id)])
+
+    def get_changelist(self, request, **kwargs):
+        return PostChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        return KeysetPaginator(queryset, per_page, orphans,
+                               allow_empty_first_page,
+                               after=getattr(request, 'keyset_after', None))
+
+    def get_changelist_formset(self, request, **kwargs):
+        formset = super().get_changelist_formset(request, **kwargs)
+        # One query for the group dropdowns of the whole page.
+        # (A comprehension: ``list()`` would also run a COUNT for len().)
+        choices = [choice for choice in
+                   formset.form.base_fields['group'].choices]
+
+        class CachedChoicesFormSet(formset):
+            def _construct_form(self, i, **kwargs):
+                form = super()._construct_form(i, **kwargs)
+                form.fields['group'].choices = choices
+                return form
+
+        return CachedChoicesFormSet
+
+    def regroup(self, request, queryset):
+        try:
+            group = PostActionForm.base_fields['group'].clean(
+                request.POST.get('group')
+            )
+        except ValidationError:
+            group = None
+        if group is None:
+            self.message_user(request, 'Выберите группу.', messages.ERROR)
+            return
+        group_ids = set(queryset.order_by().values_list('group_id',
+                                                        flat=True).distinct())
+        updated = queryset.order_by().update(group=group)
+        feeds.invalidate([(feeds.GROUP, group_id)
+                          for group_id in group_ids | {group.pk}])
+        self.message_user(request, f'Группа изменена у {updated} постов.')
+    regroup.short_description = 'Перенести в выбранную группу'
+
+    def delete_in_chunks(self, request, queryset):
+        if not self.has_delete_permission(request):
+            return None
+        if request.POST.get('post') != 'yes':
+            return TemplateResponse(
+                request, 'admin/posts/post/delete_in_chunks.html', {
+                    **self.admin_site.each_context(request),
+                    'opts': self.model._meta,
+                    'count': queryset.count(),
+                    'select_across': (
+                        request.POST.get('select_across') == '1'
+                    ),
+                    'selected': request.POST.getlist(
+                        helpers.ACTION_CHECKBOX_NAME
+                    ),
+                    'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+                    'title': 'Удаление постов',
+                }
+            )
+        pks = queryset.order_by('pk').values_list('pk', flat=True)
+        deleted = last_pk = 0
+        while True:
+            chunk = list(pks.filter(pk__gt=last_pk)[:DELETE_CHUNK_SIZE])
+            if not chunk:
+                break
+            Post.objects.filter(pk__in=chunk).delete()
+            deleted += len(chunk)
+            last_pk = chunk[-1]
+        self.message_user(request, f'Удалено постов: {deleted}.',
+                          messages.SUCCESS)
+        return None
+    delete_in_chunks.short_description = 'Удалить выбранные посты'
+    delete_in_chunks.allowed_permissions = ('delete',)
 
 
 admin.site.register(Post, PostAdmin)
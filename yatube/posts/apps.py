@@ -3,3 +3,30 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save, pre_delete
+
+        from . import feeds, ranking, scheduling, tagging
+        from .models import Follow, GroupFollow, Post, User
+
+        pre_delete.connect(tagging.post_removed, sender=Post,
+                           dispatch_uid='posts.tag_counts')
+        scheduling.posts_published.connect(
+            tagging.notify_published, dispatch_uid='posts.mentions'
+        )
+        post_save.connect(feeds.post_saved, sender=Post,
+                          dispatch_uid='posts.feeds.saved')
+        post_delete.connect(feeds.post_removed, sender=Post,
+                            dispatch_uid='posts.feeds.removed')
+        post_save.connect(feeds.author_saved, sender=User,
+                          dispatch_uid='posts.feeds.author_saved')
+        for model in (Follow, GroupFollow):
+            for signal in (post_save, post_delete):
+                signal.connect(feeds.follows_changed, sender=model,
+                               dispatch_uid=f'posts.feeds.{model.__name__}')
+        post_delete.connect(ranking.post_removed, sender=Post,
+                            dispatch_uid='posts.ranking.removed')
+        scheduling.posts_published.connect(
+            feeds.posts_published, dispatch_uid='posts.feeds.published'
+        )
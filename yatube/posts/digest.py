@@ -0,0 +1,107 @@
+"""Batched e-mail digests of new posts by followed authors."""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import DigestRun, Follow, Post, User
+
+DIGEST_PERIOD = timedelta(days=1)
+BATCH_SIZE: int = 500
+MAX_POSTS: int = 20
+TEMPLATE = 'posts/email/digest.txt'
+
+
+def get_run(now=None):
+    """Returns the unfinished run or opens a new window after the last one."""
+    run = DigestRun.objects.filter(finished__isnull=True).first()
+    if run is not None:
+        return run
+    now = now or timezone.now()
+    last = DigestRun.objects.first()
+    since = last.until if last is not None else now - DIGEST_PERIOD
+    return DigestRun.objects.create(since=since, until=now)
+
+
+def follower_batches(run, batch_size):
+    """Yields ascending batches of follower ids after ``run.last_user_id``."""
+    last_user_id = run.last_user_id
+    while True:
+        batch = list(
+            Follow.objects.filter(user_id__gt=last_user_id)
+            .order_by('user_id')
+            .values_list('user_id', flat=True)
+            .distinct()[:batch_size]
+        )
+        if not batch:
+            return
+        yield batch
+        last_user_id = batch[-1]
+
+
+def collect_posts(run, user_ids, max_posts):
+    """New posts of followed authors for every user in one query.
+
+    Returns ``{user_id: (posts, total)}`` keeping at most ``max_posts``
+    newest posts per user.
+    """
+    rows = Post.objects.published().filter(
+        author__following__user_id__in=user_ids,
+        pub_date__gt=run.since,
+        pub_date__lte=run.until,
+    ).order_by(
+        'author__following__user_id', '-pub_date'
+    ).values_list(
+        'author__following__user_id', 'pk', 'text', 'pub_date',
+        'author__username',
+    )
+    digests = {}
+    for user_id, pk, text, pub_date, author in rows.iterator():
+        posts, total = digests.get(user_id, ([], 0))
+        if len(posts) < max_posts:
+            posts.append({'pk': pk, 'text': text,
+                          'pub_date': pub_date, 'author': author})
+        digests[user_id] = (posts, total + 1)
+    return digests
+
+
+def build_messages(template, run, user_ids, digests):
+    recipients = User.objects.filter(
+        pk__in=[pk for pk in user_ids if pk in digests]
+    ).exclude(email='').values_list('pk', 'username', 'email')
+    for pk, username, email in recipients:
+        posts, total = digests[pk]
+        body = template.render({
+            'username': username,
+            'posts': posts,
+            'more': total - len(posts),
+            'since': run.since,
+        })
+        yield EmailMessage(subject='Новые посты ваших авторов',
+                           body=body,
+                           from_email=settings.DEFAULT_FROM_EMAIL,
+                           to=[email])
+
+
+def send_digests(batch_size=BATCH_SIZE, max_posts=MAX_POSTS, now=None):
+    """Sends digests for the current window; returns the number of e-mails.
+
+    Progress is saved after every batch, so an interrupted run resumes
+    from the first unprocessed follower (a batch in flight may be resent).
+    """
+    run = get_run(now)
+    template = get_template(TEMPLATE)
+    for user_ids in follower_batches(run, batch_size):
+        digests = collect_posts(run, user_ids, max_posts)
+        messages = list(build_messages(template, run, user_ids, digests))
+        if messages:
+            with get_connection() as connection:
+                connection.send_messages(messages)
+        run.last_user_id = user_ids[-1]
+        run.sent += len(messages)
+        run.save(update_fields=('last_user_id', 'sent'))
+    run.finished = timezone.now()
+    run.save(update_fields=('finished',))
+    return run.sent
@@ -0,0 +1,284 @@
+"""Feeds assembled from cached per-source post lists.
+
+Every source (an author, a group or the whole site) keeps its newest
+``RECENT_POSTS`` published posts in the cache as a sorted list of
+``(-pub_date, -post_id)`` keys, newest first. A new, published or
+deleted post drops the lists it belongs to, which are reloaded on the
+next read: there is no read-modify-write of a list to race with. Pages
+are cut from the lists and hydrated with one ``id__in`` query.
+
+The drops only reach the processes sharing the cache: with more than one
+serving process the ``default`` cache has to be a shared backend
+(Memcached, a database table), otherwise other processes keep their
+lists, and post cards, until ``CACHE_TIMEOUT``.
+
+The personal feed is a heap-based k-way merge of the followed sources'
+lists, so it never needs an OR-join over the whole ``Post`` table; the
+followed sources are cached per reader too. A post that comes from two
+sources (a followed author in a followed group) has the same key in both
+and is dropped once.
+
+A list shorter than ``RECENT_POSTS`` holds every post of its source. A
+full list may miss posts older than its tail, so pages past it go to the
+database: one indexed query per full source.
+"""
+import bisect
+import heapq
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import Q
+from django.utils import timezone
+
+from core import metrics
+
+from .models import Follow, GroupFollow, Post
+
+RECENT_POSTS: int = 200
+CACHE_TIMEOUT = timedelta(minutes=15).total_seconds()
+CARD_FRAGMENT = 'post_card'
+AUTHOR = 'author'
+GROUP = 'group'
+EVERYONE = ('all', 0)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def source_key(source):
+    kind, pk = source
+    return f'feed:{kind}:{pk}'
+
+
+def post_key(pub_date, post_id):
+    # Integer microseconds: a float timestamp would not round-trip.
+    return -((pub_date - EPOCH) // MICROSECOND), -post_id
+
+
+def encode_cursor(key):
+    return '{}_{}'.format(-key[0], -key[1])
+
+
+def decode_cursor(cursor):
+    try:
+        micros, post_id = cursor.split('_')
+        return -int(micros), -int(post_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def card_key(post_id):
+    """Key of the ``{% cache %}`` fragment of a post card."""
+    return make_template_fragment_key(CARD_FRAGMENT, [post_id])
+
+
+def sources_of(post):
+    sources = [EVERYONE, (AUTHOR, post.author_id)]
+    if post.group_id is not None:
+        sources.append((GROUP, post.group_id))
+    return sources
+
+
+def source_posts(source):
+    kind, pk = source
+    posts = Post.objects.published()
+    if source == EVERYONE:
+        return posts
+    return posts.filter(**{f'{kind}_id': pk})
+
+
+def load(source, after=None, limit=None):
+    """Keys of a source's newest published posts below key ``after``."""
+    limit = limit or RECENT_POSTS
+    posts = source_posts(source)
+    if after is not None:
+        pub_date = EPOCH - after[0] * MICROSECOND
+        posts = posts.filter(Q(pub_date__lt=pub_date)
+                             | Q(pub_date=pub_date, pk__lt=-after[1]))
+    return [post_key(pub_date, post_id) for pub_date, post_id in
+            posts.order_by('-pub_date', '-pk').values_list(
+                'pub_date', 'pk')[:limit]]
+
+
+def recent(sources):
+    """``{source: keys}`` with one cache round trip for all sources."""
+    keys = {source_key(source): source for source in sources}
+    cached = cache.get_many(list(keys))
+    metrics.record_cache('feed', len(cached), len(keys) - len(cached))
+    lists = {}
+    missing = {}
+    for key, source in keys.items():
+        if key in cached:
+            lists[source] = cached[key]
+        else:
+            lists[source] = missing[key] = load(source)
+    cache.set_many(missing, CACHE_TIMEOUT)
+    return lists
+
+
+def invalidate(sources):
+    """Drops the cached lists of ``sources`` (reloaded on next read)."""
+    cache.delete_many([source_key(source) for source in sources
+                       if source[1] is not None])
+
+
+def take(lists, after, size, horizon=None):
+    """Up to ``size`` distinct keys after ``after`` merged from ``lists``.
+
+    Stops before the first key past ``horizon``.
+    """
+    if after is not None:
+        lists = [entries[bisect.bisect_right(entries, after):]
+                 for entries in lists]
+    taken = []
+    for key in heapq.merge(*lists):
+        if horizon is not None and key > horizon:
+            break
+        if taken and taken[-1] == key:
+            continue
+        taken.append(key)
+        if len(taken) == size:
+            break
+    return taken
+
+
+def page(sources, after=None, size=10):
+    """Post ids of one page of the merged feed and the next cursor."""
+    lists = recent(sources)
+    full = [source for source, entries in lists.items()
+            if len(entries) >= RECENT_POSTS]
+    horizon = min((lists[source][-1] for source in full), default=None)
+    taken = take(lists.values(), after, size + 1, horizon)
+    if len(taken) <= size and full:
+        # Deep page: full lists continue from the database.
+        cursor = taken[-1] if taken else after
+        need = size + 1 - len(taken)
+        rest = [load(source, cursor, need) if source in full else entries
+                for source, entries in lists.items()]
+        taken += take(rest, cursor, need)
+    next_cursor = None
+    if len(taken) > size:
+        next_cursor = encode_cursor(taken[size - 1])
+    return [-post_id for _, post_id in taken[:size]], next_cursor
+
+
+def hydrate(post_ids):
+    """Published posts with ``post_ids`` in the same order."""
+    posts = Post.objects.published().select_related(
+        'author', 'group'
+    ).in_bulk(post_ids)
+    return [posts[pk] for pk in post_ids if pk in posts]
+
+
+class SourceFeed:
+    """Published posts of one source, newest first, for ``Paginator``.
+
+    Pages within the cached list cost one ``id__in`` query; deeper pages
+    and the count of a full list are read from the database.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.entries = recent([source])[source]
+        self.is_full = len(self.entries) >= RECENT_POSTS
+
+    def count(self):
+        if not self.is_full:
+            return len(self.entries)
+        return source_posts(self.source).count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if not self.is_full or (index.stop is not None
+                                and index.stop <= len(self.entries)):
+            return hydrate([-post_id for _, post_id in self.entries[index]])
+        return list(source_posts(self.source).select_related(
+            'author', 'group'
+        ).order_by('-pub_date', '-pk')[index])
+
+
+def follows_key(user_id):
+    return f'feed:follows:{user_id}'
+
+
+def followed_sources(user):
+    """Sources followed by ``user``; cached until a follow changes."""
+    key = follows_key(user.pk)
+    sources = cache.get(key)
+    if sources is None:
+        authors = Follow.objects.filter(user=user).values_list(
+            'author_id', flat=True
+        )
+        groups = GroupFollow.objects.filter(user=user).values_list(
+            'group_id', flat=True
+        )
+        sources = ([(AUTHOR, pk) for pk in authors]
+                   + [(GROUP, pk) for pk in groups])
+        cache.set(key, sources, CACHE_TIMEOUT)
+    return sources
+
+
+def merged_page(sources, cursor=None, size=10):
+    """Posts of ``sources`` after ``cursor``; returns posts and cursor."""
+    if not sources:
+        return [], None
+    post_ids, next_cursor = page(sources, decode_cursor(cursor), size)
+    return hydrate(post_ids), next_cursor
+
+
+def personal_page(user, cursor=None, size=10):
+    """Posts of followed authors and groups; returns posts and cursor."""
+    return merged_page(followed_sources(user), cursor, size)
+
+
+def cursor_after(post):
+    """Cursor of the posts that follow ``post`` in any feed."""
+    return encode_cursor(post_key(post.pub_date, post.pk))
+
+
+def post_saved(sender, instance, created, **kwargs):
+    """``post_save`` receiver: a new published post joins its lists.
+
+    The card is dropped on every save: an edit changes it and a new post
+    may reuse the id of a rolled back one.
+    """
+    cache.delete(card_key(instance.pk))
+    if created and instance.is_published:
+        invalidate(sources_of(instance))
+
+
+def post_removed(sender, instance, **kwargs):
+    """``post_delete`` receiver."""
+    invalidate(sources_of(instance))
+    cache.delete(card_key(instance.pk))
+
+
+def posts_published(sender, post_ids, **kwargs):
+    """``posts_published`` receiver: promoted posts join their lists."""
+    sources = {EVERYONE}
+    for author_id, group_id in Post.objects.filter(
+        pk__in=post_ids
+    ).values_list('author_id', 'group_id'):
+        sources.update([(AUTHOR, author_id), (GROUP, group_id)])
+    invalidate(sources)
+
+
+def author_saved(sender, instance, update_fields=None, **kwargs):
+    """``post_save`` receiver of users: cards show the author's name."""
+    if update_fields is not None and not {'first_name', 'last_name'} & set(
+        update_fields
+    ):
+        return
+    cache.delete_many([card_key(pk) for pk in Post.objects.filter(
+        author=instance
+    ).values_list('pk', flat=True)])
+
+
+def follows_changed(sender, instance, **kwargs):
+    """``post_save`` and ``post_delete`` receiver of follows."""
+    cache.delete(follows_key(instance.user_id))
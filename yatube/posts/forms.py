@@ -1,5 +1,9 @@
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from django.forms import ModelForm
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.forms import DateTimeField, DateTimeInput, Form, ModelForm
+from .images import process_upload
 from .models import Post, Comment
 
 
@@ -18,6 +22,35 @@ class PostForm(ModelForm):
             'image': _('Здесь изображение.')
         }
 
+    image_report = None
+
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not isinstance(image, UploadedFile):
+            return image
+        self.image_report = process_upload(image)
+        return self.image_report.content
+
+
+class ScheduleForm(Form):
+    """Optional publication time of a new post."""
+    scheduled_for = DateTimeField(
+        required=False,
+        label=_('Опубликовать позже'),
+        help_text=_('Оставьте пустым, чтобы опубликовать сразу.'),
+        input_formats=['%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M'],
+        widget=DateTimeInput(attrs={'type': 'datetime-local'},
+                             format='%Y-%m-%dT%H:%M'),
+    )
+
+    def clean_scheduled_for(self):
+        scheduled_for = self.cleaned_data.get('scheduled_for')
+        if scheduled_for is not None and scheduled_for <= timezone.now():
+            raise ValidationError(
+                _('Время публикации должно быть в будущем.')
+            )
+        return scheduled_for
+
 
 class CommentForm(ModelForm):
     class Meta:
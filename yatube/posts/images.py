@@ -0,0 +1,101 @@
+"""Upload stage for post images: limits, re-encoding and deduplication."""
+import logging
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+from core.storage import content_storage, hash_content, sharded_name
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_TO = 'posts'
+MAX_BYTES: int = 10 * 1024 * 1024
+MAX_SIDE: int = 1920
+JPEG_QUALITY: int = 82
+WEBP_QUALITY: int = 80
+
+
+def output_format():
+    """WebP when Pillow is built with it, progressive JPEG otherwise."""
+    return 'WEBP' if features.check('webp') else 'JPEG'
+
+
+class ProcessedImage:
+    """Result of ``process_upload``."""
+
+    def __init__(self, name, content, original_size, stored_size,
+                 elapsed, deduplicated):
+        self.name = name
+        self.content = content
+        self.original_size = original_size
+        self.stored_size = stored_size
+        self.elapsed = elapsed
+        self.deduplicated = deduplicated
+
+    @property
+    def bytes_saved(self):
+        return self.original_size - self.stored_size
+
+    def __str__(self):
+        return (f'{self.name}: {self.original_size} -> {self.stored_size} '
+                f'bytes (saved {self.bytes_saved}) '
+                f'in {self.elapsed * 1000:.1f} ms'
+                f'{", deduplicated" if self.deduplicated else ""}')
+
+
+def encode(uploaded, fmt, max_side):
+    image = Image.open(uploaded)
+    # Let the JPEG decoder downscale while reading huge originals.
+    image.draft('RGB', (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    if image.mode not in ('RGB', 'L'):
+        rgba = image.convert('RGBA')
+        image = Image.new('RGB', rgba.size, (255, 255, 255))
+        image.paste(rgba, mask=rgba.split()[-1])
+    buffer = BytesIO()
+    if fmt == 'WEBP':
+        image.save(buffer, fmt, quality=WEBP_QUALITY, method=4)
+    else:
+        image.save(buffer, fmt, quality=JPEG_QUALITY,
+                   optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def process_upload(uploaded):
+    """Validates, caps and re-encodes an uploaded image.
+
+    Uploads above ``FILE_UPLOAD_MAX_MEMORY_SIZE`` arrive as temporary
+    files and are only read in chunks (for the hash) and by the decoder.
+    Identical uploads map to the same name, so a file that is already
+    stored is reused instead of being encoded and written again.
+    """
+    started = time.perf_counter()
+    max_bytes = getattr(settings, 'POST_IMAGE_MAX_BYTES', MAX_BYTES)
+    if uploaded.size > max_bytes:
+        raise ValidationError(
+            f'Размер изображения не должен превышать '
+            f'{max_bytes // (1024 * 1024)} МБ.'
+        )
+    fmt = output_format()
+    digest = hash_content(uploaded)
+    path = sharded_name(UPLOAD_TO, digest, f'.{fmt}')
+    if content_storage.exists(path):
+        stored_size, content, deduplicated = (content_storage.size(path),
+                                              path, True)
+    else:
+        data = encode(uploaded, fmt,
+                      getattr(settings, 'POST_IMAGE_MAX_SIDE', MAX_SIDE))
+        content = ContentFile(data, name=f'{digest}.{fmt.lower()}')
+        # Name the stored file after the original upload, so the next
+        # identical upload is found without encoding it again.
+        content.content_hash = digest
+        stored_size, deduplicated = len(data), False
+    result = ProcessedImage(path, content, uploaded.size, stored_size,
+                            time.perf_counter() - started, deduplicated)
+    logger.info('Processed post image %s', result)
+    return result
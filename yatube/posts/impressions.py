@@ -0,0 +1,67 @@
+"""Post views and feed impressions.
+
+A viewer counts once per post within ``DEDUP_WINDOW``: the "seen" marks
+live in the shared cache and are checked for a whole feed page with one
+``get_many``. Counts go through buffered counters, so a page view costs
+cache operations only and the database sees periodic bulk UPDATEs.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.core.cache import cache
+
+from core.counters import BufferedCounter
+from .models import Post
+
+DEDUP_WINDOW = timedelta(minutes=30)
+
+post_views = BufferedCounter(Post, 'views_count')
+post_impressions = BufferedCounter(Post, 'impressions_count')
+
+
+def viewer_key(request):
+    """Session key, or a hash of address and user agent without one.
+
+    Sessions are never created here: that would set a cookie on cached
+    pages.
+    """
+    session_key = getattr(request, 'session', None) and (
+        request.session.session_key
+    )
+    if session_key:
+        return session_key
+    raw = '{}|{}'.format(request.META.get('REMOTE_ADDR', ''),
+                         request.META.get('HTTP_USER_AGENT', ''))
+    return hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
+
+
+def record(counter, kind, request, post_ids):
+    """Counts ``post_ids`` not seen by this viewer lately."""
+    if getattr(request, 'is_warm_up', False):
+        return 0
+    viewer = viewer_key(request)
+    keys = {f'{kind}:{viewer}:{post_id}': post_id for post_id in post_ids}
+    if not keys:
+        return 0
+    seen = cache.get_many(list(keys))
+    fresh = {key: 1 for key in keys if key not in seen}
+    cache.set_many(fresh, DEDUP_WINDOW.total_seconds())
+    for key in fresh:
+        counter.add(keys[key])
+    return len(fresh)
+
+
+def record_view(request, post):
+    return record(post_views, 'view', request, [post.pk])
+
+
+def record_impressions(request, posts):
+    return record(post_impressions, 'impression', request,
+                  [post.pk for post in posts])
+
+
+def annotate_views(posts):
+    """Sets ``views_total`` (persisted plus pending views)."""
+    for post in posts:
+        post.views_total = post_views.value(post)
+    return posts
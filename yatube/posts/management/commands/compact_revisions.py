@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import revisions
+
+
+class Command(BaseCommand):
+    help = 'Squashes old post revisions into snapshots.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int,
+                            default=revisions.KEEP_REVISIONS,
+                            help='Newest revisions kept per post.')
+
+    def handle(self, *args, **options):
+        deleted = revisions.compact_all(options['keep'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} revisions'
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts import scheduling
+
+
+class Command(BaseCommand):
+    help = 'Publishes scheduled posts when they become due.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Publish due posts once and exit.')
+        parser.add_argument('--batch', type=int,
+                            default=scheduling.BATCH_SIZE,
+                            help='Posts published per UPDATE.')
+        parser.add_argument('--poll', type=float,
+                            default=scheduling.POLL_INTERVAL,
+                            help='Longest wait between checks, seconds.')
+
+    def handle(self, *args, **options):
+        try:
+            scheduling.run(options['poll'], options['batch'],
+                           options['once'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS('Scheduler stopped'))
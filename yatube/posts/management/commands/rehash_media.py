@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from core.storage import is_immutable
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Moves post images to content-addressed names.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete-old', action='store_true',
+                            help='Remove files stored under old names.')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        storage = Post._meta.get_field('image').storage
+        names = Post.objects.exclude(image='').values_list(
+            'image', flat=True
+        ).order_by('image').distinct()
+        moved = missing = 0
+        for name in names.iterator(chunk_size=options['chunk_size']):
+            if is_immutable(name):
+                continue
+            if not storage.exists(name):
+                missing += 1
+                self.stderr.write(f'Missing file {name}')
+                continue
+            with storage.open(name) as content:
+                new_name = storage.save(name, content)
+            Post.objects.filter(image=name).update(image=new_name)
+            if options['delete_old'] and new_name != name:
+                storage.delete(name)
+            moved += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Rehashed {moved} files, {missing} missing'
+        ))
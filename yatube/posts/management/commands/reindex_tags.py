@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import tagging
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the hashtag and mention index of all posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int,
+                            default=tagging.REINDEX_CHUNK_SIZE,
+                            help='Posts read and indexed per step.')
+
+    def handle(self, *args, **options):
+        total = tagging.reindex(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} posts'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import digest
+
+
+class Command(BaseCommand):
+    help = 'Sends e-mail digests of new posts to followers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=digest.BATCH_SIZE,
+                            help='Followers processed per query.')
+        parser.add_argument('--max-posts', type=int,
+                            default=digest.MAX_POSTS,
+                            help='Posts listed in one digest.')
+
+    def handle(self, *args, **options):
+        sent = digest.send_digests(options['batch_size'],
+                                   options['max_posts'])
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} digests'))
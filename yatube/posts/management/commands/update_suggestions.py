@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from posts import suggestions
+
+
+class Command(BaseCommand):
+    help = 'Recomputes "who to follow" suggestions from the follow graph.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Refresh every user, not only those whose '
+                                 'follows changed.')
+        parser.add_argument('--users', type=int, nargs='+',
+                            help='Refresh only these user ids.')
+        parser.add_argument('--limit', type=int,
+                            default=suggestions.N_SUGGESTIONS,
+                            help='Suggestions stored per user.')
+        parser.add_argument('--batch-size', type=int,
+                            default=suggestions.BATCH_SIZE,
+                            help='Users written per transaction.')
+
+    def handle(self, *args, **options):
+        limit, batch_size = options['limit'], options['batch_size']
+        if options['full']:
+            count = suggestions.refresh(None, limit, batch_size)
+        elif options['users']:
+            count = suggestions.refresh(options['users'], limit, batch_size)
+        else:
+            count = suggestions.refresh_stale(limit, batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {count} users'))
@@ -0,0 +1,47 @@
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from posts import warmup
+
+
+class Command(BaseCommand):
+    help = ('Renders the busiest pages to fill the caches and reports '
+            'the share warmed within the budget and the hit rate of the '
+            'pages right after them.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget', type=float, default=warmup.BUDGET,
+                            help='Seconds after which no page is started.')
+        parser.add_argument('--workers', type=int, default=warmup.WORKERS,
+                            help='Pages rendered in parallel.')
+        parser.add_argument('--pages', type=int, default=warmup.INDEX_PAGES,
+                            help='Pages of the main feed.')
+        parser.add_argument('--groups', type=int, default=warmup.GROUPS,
+                            help='Most followed groups.')
+        parser.add_argument('--profiles', type=int, default=warmup.PROFILES,
+                            help='Most followed authors.')
+        parser.add_argument('--host', default=None,
+                            help='Host the pages are rendered for.')
+
+    def handle(self, *args, **options):
+        if isinstance(caches['default'], (LocMemCache, DummyCache)):
+            self.stderr.write(self.style.WARNING(
+                'The default cache is local to this process: only the '
+                'thumbnail store is warmed for the serving processes. Use '
+                'CACHE_WARM_UP_ON_START to warm their own caches.'
+            ))
+        plan = (options['pages'], options['groups'], options['profiles'])
+        urls = warmup.warm_up_urls(*plan)
+        held_out = warmup.held_out_urls(*plan)
+        result = warmup.warm(options['budget'], options['workers'],
+                             options['host'], urls, check_urls=held_out)
+        for url in result.failed:
+            self.stderr.write(f'Failed: {url}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Warmed {len(result.rendered)} of {len(urls)} pages '
+            f'({result.coverage * 100:.1f}%) in {result.elapsed:.2f} s '
+            f'({result.skipped} over budget); hit rate on '
+            f'{len(held_out)} next pages {(result.hit_rate or 0) * 100:.1f}%'
+        ))
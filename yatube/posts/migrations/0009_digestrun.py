@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_auto_20220926_0052'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('since', models.DateTimeField(verbose_name='Начало окна')),
+                ('until', models.DateTimeField(verbose_name='Конец окна')),
+                ('last_user_id', models.PositiveIntegerField(default=0, verbose_name='Последний обработанный подписчик')),
+                ('sent', models.PositiveIntegerField(default=0, verbose_name='Отправлено писем')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Завершён')),
+            ],
+            options={
+                'verbose_name': 'Рассылка дайджеста',
+                'verbose_name_plural': 'Рассылки дайджеста',
+                'ordering': ('-until',),
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-19 13:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils.http import int_to_base36
+
+
+def set_paths(apps, schema_editor):
+    # Existing comments become top-level threads.
+    Comment = apps.get_model('posts', 'Comment')
+    for pk in Comment.objects.values_list('pk', flat=True).iterator():
+        Comment.objects.filter(pk=pk).update(
+            path=int_to_base36(pk).rjust(8, '0')
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=240, verbose_name='Путь в ветке'),
+        ),
+        migrations.RunPython(set_paths, migrations.RunPython.noop),
+    ]
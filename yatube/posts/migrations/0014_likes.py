@@ -0,0 +1,58 @@
+# Generated by Django 2.2.16 on 2026-10-19 13:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0013_comment_threads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='likes_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Лайки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Лайки'),
+        ),
+        migrations.CreateModel(
+            name='PostLike',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='likes', to='posts.Post', verbose_name='Пост')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_likes', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Лайк поста',
+                'verbose_name_plural': 'Лайки постов',
+            },
+        ),
+        migrations.CreateModel(
+            name='CommentLike',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='likes', to='posts.Comment', verbose_name='Комментарий')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comment_likes', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Лайк комментария',
+                'verbose_name_plural': 'Лайки комментариев',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postlike',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_post_like'),
+        ),
+        migrations.AddConstraint(
+            model_name='commentlike',
+            constraint=models.UniqueConstraint(fields=('user', 'comment'), name='unique_comment_like'),
+        ),
+    ]
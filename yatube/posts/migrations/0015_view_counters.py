@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-19 13:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_likes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='impressions_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Показы в лентах'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='views_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Просмотры'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-19 13:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0015_view_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRevision',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='Номер версии')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата правки')),
+                ('is_snapshot', models.BooleanField(default=False, verbose_name='Полная копия')),
+                ('data', models.TextField(verbose_name='Данные')),
+                ('image', models.CharField(blank=True, max_length=255, verbose_name='Картинка')),
+                ('editor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор правки')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Версия поста',
+                'verbose_name_plural': 'Версии постов',
+                'ordering': ('post', '-number'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postrevision',
+            constraint=models.UniqueConstraint(fields=('post', 'number'), name='unique_revision'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-19 13:18
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def publish_existing(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.update(published_at=F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_postrevision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='published_at',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, editable=False, null=True, verbose_name='Опубликован'),
+        ),
+        migrations.RunPython(publish_existing, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='post',
+            name='scheduled_for',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Запланировано на'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['published_at', 'scheduled_for'], name='post_schedule_idx'),
+        ),
+    ]
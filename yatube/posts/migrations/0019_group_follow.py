@@ -0,0 +1,51 @@
+# Generated by Django 2.2.16 on 2026-10-19 13:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0018_tags_mentions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupFollow',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата публикации')),
+                ('text', models.TextField(help_text='Введите текст', verbose_name='Текст')),
+            ],
+            options={
+                'verbose_name': 'Подписка на группу',
+                'verbose_name_plural': 'Подписки на группы',
+                'ordering': ('-group',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date'], name='post_author_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date'], name='post_group_feed_idx'),
+        ),
+        migrations.AddField(
+            model_name='groupfollow',
+            name='group',
+            field=models.ForeignKey(help_text='Группа заказываемой подписки', on_delete=django.db.models.deletion.CASCADE, related_name='followers', to='posts.Group', verbose_name='Группа'),
+        ),
+        migrations.AddField(
+            model_name='groupfollow',
+            name='user',
+            field=models.ForeignKey(help_text='Пользователь, осуществляющий подписку', on_delete=django.db.models.deletion.CASCADE, related_name='group_follows', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupfollow',
+            constraint=models.UniqueConstraint(fields=('user', 'group'), name='unique_group_following'),
+        ),
+    ]
@@ -1,10 +1,18 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.http import int_to_base36
 from core.models import CreatedModel
+from core.storage import content_storage
 
 
 User = get_user_model()
 
+# Every level of a comment path is the comment pk in base36, zero-padded.
+COMMENT_PATH_STEP: int = 8
+COMMENT_MAX_DEPTH: int = 30
+COMMENT_MAX_INDENT: int = 6
+
 
 class Group(models.Model):
     """Communities model."""
@@ -20,6 +28,18 @@ class Group(models.Model):
         return f"Group {self.title}"
 
 
+class PostQuerySet(models.QuerySet):
+    def published(self):
+        return self.filter(published_at__isnull=False)
+
+    def due(self, now=None):
+        """Scheduled posts whose time has come, oldest first."""
+        return self.filter(
+            published_at__isnull=True,
+            scheduled_for__lte=now or timezone.now()
+        ).order_by('scheduled_for', 'pk')
+
+
 class Post(CreatedModel):
     """Post model."""
 
@@ -39,17 +59,61 @@ class Post(CreatedModel):
     image = models.ImageField(
         verbose_name='Картинка',
         upload_to='posts/',
+        storage=content_storage,
         blank=True
     )
+    # Updated through ``posts.reactions.post_likes`` in batches. Not
+    # positive-only: another process may flush an unlike first.
+    likes_count = models.IntegerField(default=0,
+                                      editable=False,
+                                      verbose_name='Лайки')
+    # Flushed in batches by ``posts.impressions``.
+    views_count = models.PositiveIntegerField(default=0,
+                                              editable=False,
+                                              verbose_name='Просмотры')
+    impressions_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Показы в лентах'
+    )
+    # Empty while a scheduled post waits for ``posts.scheduling``.
+    published_at = models.DateTimeField(null=True,
+                                        blank=True,
+                                        default=timezone.now,
+                                        editable=False,
+                                        verbose_name='Опубликован')
+    scheduled_for = models.DateTimeField(null=True,
+                                         blank=True,
+                                         verbose_name='Запланировано на')
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = (models.Index(fields=['published_at', 'scheduled_for'],
+                                name='post_schedule_idx'),
+                   # Newest posts of one source, for ``posts.feeds``.
+                   models.Index(fields=['author', '-pub_date'],
+                                name='post_author_feed_idx'),
+                   models.Index(fields=['group', '-pub_date'],
+                                name='post_group_feed_idx'))
 
     def __str__(self):
         return f'{self.text[:15]}'
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.scheduled_for is not None and (
+            self.scheduled_for > timezone.now()
+        ):
+            self.published_at = None
+        super().save(*args, **kwargs)
+
+    @property
+    def is_published(self):
+        return self.published_at is not None
+
 
 class Comment(CreatedModel):
     """Comments model."""
@@ -63,6 +127,22 @@ class Comment(CreatedModel):
                                related_name='comments',
                                verbose_name='Автор',
                                help_text='Автор комментария')
+    parent = models.ForeignKey('self',
+                               on_delete=models.CASCADE,
+                               null=True,
+                               blank=True,
+                               related_name='replies',
+                               verbose_name='Ответ на')
+    # Ancestors' path plus own segment: a subtree is one ``path`` range
+    # and sorting by ``path`` puts replies right after their parent.
+    path = models.CharField(max_length=COMMENT_PATH_STEP * COMMENT_MAX_DEPTH,
+                            blank=True,
+                            editable=False,
+                            db_index=True,
+                            verbose_name='Путь в ветке')
+    likes_count = models.IntegerField(default=0,
+                                      editable=False,
+                                      verbose_name='Лайки')
 
     class Meta:
         ordering = ('-pub_date',)
@@ -72,6 +152,30 @@ class Comment(CreatedModel):
     def __str__(self):
         return f'{self.text[:15]}'
 
+    @staticmethod
+    def path_segment(pk):
+        return int_to_base36(pk).rjust(COMMENT_PATH_STEP, '0')
+
+    @property
+    def depth(self):
+        return len(self.path) // COMMENT_PATH_STEP - 1
+
+    @property
+    def indent(self):
+        return min(self.depth, COMMENT_MAX_INDENT)
+
+    def save(self, *args, **kwargs):
+        if self.parent is not None and (
+            self.parent.depth >= COMMENT_MAX_DEPTH - 1
+        ):
+            # Replies below the deepest level join their parent's level.
+            self.parent = self.parent.parent
+        super().save(*args, **kwargs)
+        if not self.path:
+            prefix = self.parent.path if self.parent is not None else ''
+            self.path = prefix + self.path_segment(self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
 
 class Follow(CreatedModel):
     """Following authors' model."""
@@ -92,3 +196,217 @@ class Follow(CreatedModel):
         verbose_name_plural = 'Подписки'
         constraints = (models.UniqueConstraint(fields=['user', 'author'],
                                                name='unique_following'),)
+
+
+class GroupFollow(CreatedModel):
+    """Following groups' model."""
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='group_follows',
+                             verbose_name='Пользователь',
+                             help_text='Пользователь, осуществляющий подписку')
+    group = models.ForeignKey(Group,
+                              on_delete=models.CASCADE,
+                              related_name='followers',
+                              verbose_name='Группа',
+                              help_text='Группа заказываемой подписки')
+
+    class Meta:
+        ordering = ('-group',)
+        verbose_name = 'Подписка на группу'
+        verbose_name_plural = 'Подписки на группы'
+        constraints = (models.UniqueConstraint(fields=['user', 'group'],
+                                               name='unique_group_following'),)
+
+
+class DigestRun(models.Model):
+    """Progress of the follower digest job over the window (since, until]."""
+    since = models.DateTimeField(verbose_name='Начало окна')
+    until = models.DateTimeField(verbose_name='Конец окна')
+    last_user_id = models.PositiveIntegerField(
+        verbose_name='Последний обработанный подписчик',
+        default=0
+    )
+    sent = models.PositiveIntegerField(verbose_name='Отправлено писем',
+                                       default=0)
+    finished = models.DateTimeField(verbose_name='Завершён',
+                                    null=True, blank=True)
+
+    class Meta:
+        ordering = ('-until',)
+        verbose_name = 'Рассылка дайджеста'
+        verbose_name_plural = 'Рассылки дайджеста'
+
+    def __str__(self):
+        return f'Digest {self.since:%Y-%m-%d %H:%M} - {self.until:%H:%M}'
+
+
+class PostScore(models.Model):
+    """Time-decayed popularity of a post.
+
+    ``score`` is log2 of the sum of event weights, each scaled by
+    2 ** (event time / half-life), so a score never has to be decayed in
+    place: later events simply weigh more.
+    """
+    post = models.OneToOneField(Post,
+                                on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='score',
+                                verbose_name='Пост')
+    score = models.FloatField(verbose_name='Рейтинг', db_index=True)
+
+    class Meta:
+        verbose_name = 'Рейтинг поста'
+        verbose_name_plural = 'Рейтинги постов'
+
+    def __str__(self):
+        return f'{self.post_id}: {self.score:.3f}'
+
+
+class FollowSuggestion(models.Model):
+    """Precomputed "who to follow" entry (see ``posts.suggestions``)."""
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='follow_suggestions',
+                             verbose_name='Пользователь')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='+',
+                               verbose_name='Рекомендуемый автор')
+    score = models.FloatField(verbose_name='Оценка')
+    created = models.DateTimeField(verbose_name='Дата расчёта')
+
+    class Meta:
+        ordering = ('user', '-score')
+        verbose_name = 'Рекомендация подписки'
+        verbose_name_plural = 'Рекомендации подписок'
+        constraints = (models.UniqueConstraint(fields=['user', 'author'],
+                                               name='unique_suggestion'),)
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.author_id}: {self.score:.3f}'
+
+
+class PostLike(models.Model):
+    """Like of a post by a user."""
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='post_likes',
+                             verbose_name='Пользователь')
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='likes',
+                             verbose_name='Пост')
+
+    class Meta:
+        verbose_name = 'Лайк поста'
+        verbose_name_plural = 'Лайки постов'
+        constraints = (models.UniqueConstraint(fields=['user', 'post'],
+                                               name='unique_post_like'),)
+
+
+class CommentLike(models.Model):
+    """Like of a comment by a user."""
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='comment_likes',
+                             verbose_name='Пользователь')
+    comment = models.ForeignKey(Comment,
+                                on_delete=models.CASCADE,
+                                related_name='likes',
+                                verbose_name='Комментарий')
+
+    class Meta:
+        verbose_name = 'Лайк комментария'
+        verbose_name_plural = 'Лайки комментариев'
+        constraints = (models.UniqueConstraint(fields=['user', 'comment'],
+                                               name='unique_comment_like'),)
+
+
+class PostRevision(models.Model):
+    """Version of a post's text and image (see ``posts.revisions``)."""
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='revisions',
+                             verbose_name='Пост')
+    number = models.PositiveIntegerField(verbose_name='Номер версии')
+    editor = models.ForeignKey(User,
+                               on_delete=models.SET_NULL,
+                               null=True,
+                               blank=True,
+                               related_name='+',
+                               verbose_name='Автор правки')
+    created = models.DateTimeField(auto_now_add=True,
+                                   verbose_name='Дата правки')
+    # Full text, or the line delta against the previous version.
+    is_snapshot = models.BooleanField(default=False,
+                                      verbose_name='Полная копия')
+    data = models.TextField(verbose_name='Данные')
+    image = models.CharField(max_length=255,
+                             blank=True,
+                             verbose_name='Картинка')
+
+    class Meta:
+        ordering = ('post', '-number')
+        verbose_name = 'Версия поста'
+        verbose_name_plural = 'Версии постов'
+        constraints = (models.UniqueConstraint(fields=['post', 'number'],
+                                               name='unique_revision'),)
+
+    def __str__(self):
+        return f'{self.post_id} v{self.number}'
+
+
+class Tag(models.Model):
+    """Hashtag used in post texts."""
+    name = models.CharField(max_length=50,
+                            unique=True,
+                            verbose_name='Тег')
+    posts_count = models.PositiveIntegerField(default=0,
+                                              editable=False,
+                                              verbose_name='Постов')
+
+    class Meta:
+        ordering = ('name',)
+        verbose_name = 'Тег'
+        verbose_name_plural = 'Теги'
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostTag(models.Model):
+    """Entry of the tag index (see ``posts.tagging``)."""
+    tag = models.ForeignKey(Tag,
+                            on_delete=models.CASCADE,
+                            related_name='post_tags',
+                            verbose_name='Тег')
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='post_tags',
+                             verbose_name='Пост')
+
+    class Meta:
+        verbose_name = 'Тег поста'
+        verbose_name_plural = 'Теги постов'
+        # Also the index of tag feeds: posts of a tag by descending id.
+        constraints = (models.UniqueConstraint(fields=['tag', 'post'],
+                                               name='unique_post_tag'),)
+
+
+class Mention(models.Model):
+    """``@username`` in a post text."""
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='mentions',
+                             verbose_name='Пост')
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='mentions',
+                             verbose_name='Упомянутый пользователь')
+
+    class Meta:
+        verbose_name = 'Упоминание'
+        verbose_name_plural = 'Упоминания'
+        constraints = (models.UniqueConstraint(fields=['post', 'user'],
+                                               name='unique_mention'),)
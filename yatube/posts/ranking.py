@@ -0,0 +1,123 @@
+"""Incrementally maintained "popular" feed.
+
+Comments (and new followers of the author) add time-decayed weight to a
+post's ``PostScore``. The top ``TOP_K`` posts are read from the ``score``
+index into a sorted list of ``(-score, post_id)`` pairs, cached for
+``TOP_TTL`` seconds, so serving a page is a slice of that list plus one
+``pk__in`` query for the posts themselves. Events and deleted posts drop
+the list instead of patching it: concurrent updates cannot lose each
+other, and processes with their own cache catch up within ``TOP_TTL``.
+"""
+import bisect
+import math
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Post, PostScore
+
+EPOCH = datetime(2022, 1, 1, tzinfo=timezone.utc)
+HALF_LIFE = timedelta(hours=24)
+COMMENT_WEIGHT: float = 1.0
+FOLLOW_WEIGHT: float = 2.0
+# A new follower boosts this many of the author's recent posts.
+FOLLOW_BOOST_POSTS: int = 3
+FOLLOW_BOOST_WINDOW = timedelta(days=3)
+TOP_K: int = 500
+TOP_TTL: int = 60
+CACHE_KEY = 'posts:popular'
+
+
+def decayed(weight, when):
+    """log2 of ``weight`` scaled to the common time base."""
+    return math.log2(weight) + (when - EPOCH) / HALF_LIFE
+
+
+def combine(first, second):
+    """log2(2 ** first + 2 ** second) without overflow."""
+    high, low = max(first, second), min(first, second)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def rebuild_top():
+    """Reloads the top list from the ``score`` index."""
+    top = [(-score, post_id) for score, post_id in
+           PostScore.objects.order_by('-score').values_list(
+               'score', 'post_id')[:TOP_K]]
+    cache.set(CACHE_KEY, top, TOP_TTL)
+    return top
+
+
+def get_top():
+    top = cache.get(CACHE_KEY)
+    if top is None:
+        top = rebuild_top()
+    return top
+
+
+def invalidate_top():
+    cache.delete(CACHE_KEY)
+
+
+def post_removed(sender, instance, **kwargs):
+    """``post_delete`` receiver: the post leaves the top list."""
+    invalidate_top()
+
+
+def record(post_id, weight, when=None):
+    """Adds ``weight`` at time ``when`` to the post's score."""
+    value = decayed(weight, when or timezone.now())
+    with transaction.atomic():
+        row = PostScore.objects.select_for_update().filter(
+            post_id=post_id
+        ).first()
+        if row is None:
+            row = PostScore.objects.create(post_id=post_id, score=value)
+        else:
+            row.score = combine(row.score, value)
+            row.save(update_fields=('score',))
+    invalidate_top()
+
+
+def record_comment(post_id, when=None):
+    record(post_id, COMMENT_WEIGHT, when)
+
+
+def record_follow(author_id, when=None):
+    when = when or timezone.now()
+    recent = Post.objects.published().filter(
+        author_id=author_id, pub_date__gte=when - FOLLOW_BOOST_WINDOW
+    ).values_list('pk', flat=True)[:FOLLOW_BOOST_POSTS]
+    for post_id in recent:
+        record(post_id, FOLLOW_WEIGHT, when)
+
+
+def encode_cursor(entry):
+    return f'{-entry[0]!r}_{entry[1]}'
+
+
+def decode_cursor(cursor):
+    try:
+        score, post_id = cursor.rsplit('_', 1)
+        return -float(score), int(post_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def popular_page(cursor=None, size=10):
+    """Posts of one page and the cursor of the next one (or ``None``)."""
+    top = get_top()
+    after = decode_cursor(cursor)
+    start = bisect.bisect_right(top, after) if after else 0
+    entries = top[start:start + size]
+    posts = Post.objects.published().select_related(
+        'author', 'group'
+    ).in_bulk(
+        [post_id for _, post_id in entries]
+    )
+    page = [posts[post_id] for _, post_id in entries if post_id in posts]
+    next_cursor = (encode_cursor(entries[-1])
+                   if start + size < len(top) else None)
+    return page, next_cursor
@@ -0,0 +1,60 @@
+"""Likes of posts and comments.
+
+Who liked what is a unique row per user; the totals shown on pages are
+``likes_count`` columns fed through buffered counters, so a viral post
+does not turn every like into a write on the same row.
+"""
+from django.db import IntegrityError, transaction
+
+from core.counters import BufferedCounter
+from .models import Comment, CommentLike, Post, PostLike
+
+post_likes = BufferedCounter(Post, 'likes_count')
+comment_likes = BufferedCounter(Comment, 'likes_count')
+
+
+def toggle(like_model, counter, user, target, field):
+    """Likes ``target`` or takes the like back; returns the new state."""
+    deleted, _ = like_model.objects.filter(user=user,
+                                           **{field: target}).delete()
+    if deleted:
+        counter.add(target.pk, -1)
+        return False
+    try:
+        with transaction.atomic():
+            like_model.objects.create(user=user, **{field: target})
+    except IntegrityError:
+        # A concurrent request of the same user liked it already.
+        return True
+    counter.add(target.pk, 1)
+    return True
+
+
+def toggle_post_like(user, post):
+    return toggle(PostLike, post_likes, user, post, 'post')
+
+
+def toggle_comment_like(user, comment):
+    return toggle(CommentLike, comment_likes, user, comment, 'comment')
+
+
+def annotate(objects, user, like_model, counter, field):
+    """Sets ``likes_total`` and the viewer's ``liked`` with one query."""
+    objects = list(objects)
+    liked = set()
+    if user.is_authenticated and objects:
+        liked = set(like_model.objects.filter(
+            user=user, **{f'{field}__in': [obj.pk for obj in objects]}
+        ).values_list(f'{field}_id', flat=True))
+    for obj in objects:
+        obj.likes_total = max(counter.value(obj), 0)
+        obj.liked = obj.pk in liked
+    return objects
+
+
+def annotate_posts(posts, user):
+    return annotate(posts, user, PostLike, post_likes, 'post')
+
+
+def annotate_comments(comments, user):
+    return annotate(comments, user, CommentLike, comment_likes, 'comment')
@@ -0,0 +1,138 @@
+"""Edit history of posts.
+
+Every edit adds a ``PostRevision``. Most revisions store only a line
+delta against the previous version; every ``SNAPSHOT_EVERY``-th revision
+(and any revision whose delta would not be smaller) stores the full text,
+so a version is rebuilt from at most ``SNAPSHOT_EVERY`` rows read with
+one range query.
+
+A delta is a JSON list of operations on the previous version's lines: a
+positive int keeps that many lines, a negative int drops them and a
+string is inserted.
+"""
+import json
+from difflib import SequenceMatcher
+
+from django.db import transaction
+from django.db.models import Count, Subquery
+
+from .models import PostRevision
+
+SNAPSHOT_EVERY: int = 10
+KEEP_REVISIONS: int = 20
+
+
+def make_delta(old, new):
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(''.join(new_lines[j1:j2]))
+    return json.dumps(ops, ensure_ascii=False, separators=(',', ':'))
+
+
+def apply_delta(old, delta):
+    lines = old.splitlines(keepends=True)
+    result = []
+    position = 0
+    for op in json.loads(delta):
+        if isinstance(op, str):
+            result.append(op)
+        elif op > 0:
+            result.extend(lines[position:position + op])
+            position += op
+        else:
+            position -= op
+    return ''.join(result)
+
+
+def record_edit(post, previous_text, previous_image, editor=None):
+    """Adds a revision for ``post`` saved over the given previous values.
+
+    The first edit of a post also records its original version.
+    """
+    image = post.image.name or ''
+    previous_image = previous_image or ''
+    if post.text == previous_text and image == previous_image:
+        return None
+    with transaction.atomic():
+        last = PostRevision.objects.select_for_update().filter(
+            post=post
+        ).order_by('-number').only('number').first()
+        if last is None:
+            last = PostRevision.objects.create(post=post, number=1,
+                                               is_snapshot=True,
+                                               data=previous_text,
+                                               image=previous_image)
+        number = last.number + 1
+        delta = make_delta(previous_text, post.text)
+        is_snapshot = ((number - 1) % SNAPSHOT_EVERY == 0
+                       or len(delta) >= len(post.text))
+        return PostRevision.objects.create(
+            post=post, number=number, editor=editor,
+            is_snapshot=is_snapshot,
+            data=post.text if is_snapshot else delta,
+            image=image,
+        )
+
+
+def reconstruct(post_id, number):
+    """``(text, image)`` of a revision, or ``None`` if there is none."""
+    base = PostRevision.objects.filter(
+        post_id=post_id, number__lte=number, is_snapshot=True
+    ).order_by('-number').values('number')[:1]
+    rows = PostRevision.objects.filter(
+        post_id=post_id, number__gte=Subquery(base), number__lte=number
+    ).order_by('number').values_list('number', 'is_snapshot', 'data',
+                                     'image')
+    text = version = None
+    for version, is_snapshot, data, image in rows:
+        text = data if is_snapshot else apply_delta(text, data)
+    if version != number:
+        return None
+    return text, image
+
+
+def history(post):
+    """Revisions of ``post`` without their (possibly large) data."""
+    return post.revisions.select_related('editor').defer('data')
+
+
+def compact(post_id, keep=KEEP_REVISIONS):
+    """Squashes all but the newest ``keep`` revisions into one snapshot.
+
+    Returns the number of deleted revisions.
+    """
+    numbers = list(PostRevision.objects.filter(post_id=post_id).order_by(
+        '-number'
+    ).values_list('number', flat=True)[:keep + 1])
+    if len(numbers) <= keep:
+        return 0
+    base = numbers[-1]
+    version = reconstruct(post_id, base)
+    if version is None:
+        return 0
+    text, image = version
+    with transaction.atomic():
+        PostRevision.objects.filter(post_id=post_id, number=base).update(
+            is_snapshot=True, data=text, image=image
+        )
+        deleted, _ = PostRevision.objects.filter(
+            post_id=post_id, number__lt=base
+        ).delete()
+    return deleted
+
+
+def compact_all(keep=KEEP_REVISIONS):
+    """``compact`` for every post with more than ``keep + 1`` revisions."""
+    post_ids = PostRevision.objects.order_by().values('post_id').annotate(
+        total=Count('pk')
+    ).filter(total__gt=keep + 1).values_list('post_id', flat=True)
+    return sum(compact(post_id, keep) for post_id in list(post_ids))
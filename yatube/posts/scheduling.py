@@ -0,0 +1,65 @@
+"""Promotion of scheduled posts.
+
+Due posts are found through the ``(published_at, scheduled_for)`` index:
+unpublished rows sorted by due time, so a poll reads only what is due
+and the next due time is a single index seek. Bursts are promoted
+``BATCH_SIZE`` posts per UPDATE.
+"""
+import time
+
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Post
+
+BATCH_SIZE: int = 500
+POLL_INTERVAL: float = 60.0
+
+# Sent with ``post_ids`` after every promoted batch, for timeline and
+# cache invalidation.
+posts_published = Signal(providing_args=['post_ids'])
+
+
+def promote_due(now=None, batch_size=BATCH_SIZE):
+    """Publishes every post due at ``now``; returns their ids."""
+    now = now or timezone.now()
+    published = []
+    while True:
+        with transaction.atomic():
+            post_ids = list(Post.objects.due(now).values_list(
+                'pk', flat=True
+            )[:batch_size])
+            if not post_ids:
+                break
+            # Scheduled posts take their place in feeds at the due time.
+            Post.objects.filter(pk__in=post_ids,
+                                published_at__isnull=True).update(
+                published_at=now, pub_date=F('scheduled_for')
+            )
+        posts_published.send(sender=Post, post_ids=post_ids)
+        published.extend(post_ids)
+    return published
+
+
+def next_due():
+    """Due time of the earliest scheduled post, or ``None``."""
+    return Post.objects.filter(
+        published_at__isnull=True, scheduled_for__isnull=False
+    ).order_by('scheduled_for').values_list('scheduled_for',
+                                            flat=True).first()
+
+
+def run(poll_interval=POLL_INTERVAL, batch_size=BATCH_SIZE, once=False):
+    """Promotes posts as they become due, sleeping until the next one."""
+    while True:
+        promote_due(batch_size=batch_size)
+        if once:
+            return
+        due = next_due()
+        wait = poll_interval
+        if due is not None:
+            wait = min(max((due - timezone.now()).total_seconds(), 0),
+                       poll_interval)
+        time.sleep(wait)
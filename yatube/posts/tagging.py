@@ -0,0 +1,162 @@
+"""Hashtag and ``@username`` index of post texts.
+
+``index_post`` runs when a post is created or edited and only writes the
+difference against the post's current index rows. ``reindex`` rebuilds
+the whole index streaming posts in keyset-ordered chunks, so memory
+stays bounded by the chunk size.
+"""
+import re
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Mention, Post, PostTag, Tag, User
+from .tasks import mentions_added
+
+# ``#`` at the start or after a space or an opening bracket or quote, so
+# URL fragments (``/#anchor``) and entities (``&#39;``) are not tags.
+TAG_RE = re.compile(r'(?<![^\s(\[{«"\'])#(\w{1,50})')
+# Username characters allowed by Django, without a trailing dot.
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.@+-]{0,149}[\w@+-])')
+REINDEX_CHUNK_SIZE: int = 1000
+
+
+def extract(text):
+    """``(tags, usernames)`` found in ``text``; tags are lowercased."""
+    tags = {tag.lower() for tag in TAG_RE.findall(text)}
+    return tags, set(MENTION_RE.findall(text))
+
+
+def get_tags(names):
+    """``{name: Tag}``, creating missing tags."""
+    if not names:
+        return {}
+    Tag.objects.bulk_create([Tag(name=name) for name in names],
+                            ignore_conflicts=True)
+    return {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+
+
+def index_post(post):
+    """Updates the index of ``post``; returns ids of newly mentioned users.
+
+    Called after the post has been saved. Newly mentioned users of a
+    published post are notified in one queued task; mentions in a
+    scheduled post are notified by ``notify_published``.
+    """
+    names, usernames = extract(post.text)
+    with transaction.atomic():
+        tag_ids = {tag.pk for tag in get_tags(names).values()}
+        old_tag_ids = set(PostTag.objects.filter(post=post).values_list(
+            'tag_id', flat=True
+        ))
+        added = tag_ids - old_tag_ids
+        removed = old_tag_ids - tag_ids
+        if added:
+            PostTag.objects.bulk_create(
+                [PostTag(post=post, tag_id=tag_id) for tag_id in added]
+            )
+            Tag.objects.filter(pk__in=added).update(
+                posts_count=F('posts_count') + 1
+            )
+        if removed:
+            PostTag.objects.filter(post=post, tag_id__in=removed).delete()
+            Tag.objects.filter(pk__in=removed).update(
+                posts_count=F('posts_count') - 1
+            )
+
+        user_ids = set(User.objects.filter(username__in=usernames).exclude(
+            pk=post.author_id
+        ).values_list('pk', flat=True))
+        old_user_ids = set(Mention.objects.filter(post=post).values_list(
+            'user_id', flat=True
+        ))
+        mentioned = user_ids - old_user_ids
+        Mention.objects.bulk_create(
+            [Mention(post=post, user_id=user_id) for user_id in mentioned]
+        )
+        Mention.objects.filter(
+            post=post, user_id__in=old_user_ids - user_ids
+        ).delete()
+    if mentioned and post.is_published:
+        mentions_added.delay(post_id=post.pk, user_ids=sorted(mentioned))
+    return mentioned
+
+
+def notify_published(sender, post_ids, **kwargs):
+    """``posts_published`` receiver: notifies mentions of promoted posts."""
+    mentions = {}
+    for post_id, user_id in Mention.objects.filter(
+        post_id__in=post_ids
+    ).values_list('post_id', 'user_id'):
+        mentions.setdefault(post_id, []).append(user_id)
+    for post_id, user_ids in mentions.items():
+        mentions_added.delay(post_id=post_id, user_ids=sorted(user_ids))
+
+
+def post_removed(sender, instance, **kwargs):
+    """``pre_delete`` receiver: the post's tags lose one post."""
+    Tag.objects.filter(post_tags__post=instance).update(
+        posts_count=F('posts_count') - 1
+    )
+
+
+def post_chunks(chunk_size=REINDEX_CHUNK_SIZE):
+    last_pk = 0
+    while True:
+        chunk = list(Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                     .values_list('pk', 'author_id', 'text')[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1][0]
+
+
+def reindex(chunk_size=REINDEX_CHUNK_SIZE):
+    """Rebuilds the index of every post; returns the number of posts."""
+    total = 0
+    for chunk in post_chunks(chunk_size):
+        parsed = {pk: (author_id, *extract(text))
+                  for pk, author_id, text in chunk}
+        tags = get_tags(set().union(*(names for _, names, _
+                                      in parsed.values())))
+        users = dict(User.objects.filter(username__in=set().union(
+            *(usernames for _, _, usernames in parsed.values())
+        )).values_list('username', 'pk'))
+        with transaction.atomic():
+            PostTag.objects.filter(post_id__in=parsed).delete()
+            Mention.objects.filter(post_id__in=parsed).delete()
+            PostTag.objects.bulk_create([
+                PostTag(post_id=pk, tag=tags[name])
+                for pk, (_, names, _) in parsed.items() for name in names
+            ])
+            Mention.objects.bulk_create([
+                Mention(post_id=pk, user_id=users[username])
+                for pk, (author_id, _, usernames) in parsed.items()
+                for username in usernames
+                if username in users and users[username] != author_id
+            ])
+        total += len(chunk)
+    # Counts are recomputed once instead of per chunk.
+    Tag.objects.update(posts_count=Coalesce(Subquery(
+        PostTag.objects.filter(tag=OuterRef('pk')).order_by().values(
+            'tag'
+        ).annotate(total=Count('pk')).values('total')
+    ), 0))
+    return total
+
+
+def tag_page(tag, after=None, size=10):
+    """Published posts of ``tag`` below post id ``after``, newest first.
+
+    Returns the posts and the cursor of the next page (or ``None``).
+    """
+    posts = Post.objects.published().filter(post_tags__tag=tag)
+    if after:
+        posts = posts.filter(pk__lt=after)
+    posts = list(posts.select_related('author', 'group').order_by(
+        '-pk'
+    )[:size + 1])
+    if len(posts) > size:
+        return posts[:size], posts[size - 1].pk
+    return posts, None
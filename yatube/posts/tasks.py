@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import task
+from . import feeds, ranking
+from .models import Comment, Post, User
+from .utils import THUMBNAIL_OPTIONS, THUMBNAIL_VARIANTS
+
+
+@task('posts.post_saved')
+def post_saved(post_id):
+    """Side effects of a created or edited post."""
+    # ``tagging`` queues its own task from here.
+    from . import tagging
+
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return
+    tagging.index_post(post)
+    # The card links only indexed mentions.
+    cache.delete(feeds.card_key(post.pk))
+    if post.image:
+        # Render the thumbnails now instead of on the first page view.
+        for geometry in THUMBNAIL_VARIANTS:
+            get_thumbnail(post.image, geometry, **THUMBNAIL_OPTIONS)
+
+
+@task('posts.comment_added')
+def comment_added(comment_id):
+    """The comment's weight in the popular feed."""
+    comment = Comment.objects.filter(pk=comment_id).only(
+        'post_id', 'pub_date'
+    ).first()
+    if comment is not None:
+        ranking.record_comment(comment.post_id, comment.pub_date)
+
+
+@task('posts.mentions_added')
+def mentions_added(post_id, user_ids):
+    """E-mails users mentioned in a post, over one connection."""
+    post = Post.objects.select_related('author').filter(pk=post_id).first()
+    if post is None:
+        return
+    messages = [
+        EmailMessage(
+            subject=f'{post.author.username} упомянул вас в посте',
+            body=render_to_string('posts/email/mention.txt',
+                                  {'username': username, 'post': post}),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[email],
+        )
+        for username, email in User.objects.filter(
+            pk__in=user_ids
+        ).exclude(email='').values_list('username', 'email')
+    ]
+    if messages:
+        with get_connection() as connection:
+            connection.send_messages(messages)
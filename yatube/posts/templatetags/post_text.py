@@ -0,0 +1,46 @@
+import re
+
+from django import template
+from django.urls import reverse
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+
+from posts.tagging import MENTION_RE, TAG_RE
+
+register = template.Library()
+
+TOKEN_RE = re.compile(f'{TAG_RE.pattern}|{MENTION_RE.pattern}')
+
+
+def token_link(match, mentioned):
+    tag, username = match.groups()
+    if tag:
+        return '<a href="{}">#{}</a>'.format(
+            reverse('posts:tag_posts', args=(tag.lower(),)), tag
+        )
+    if username in mentioned:
+        return '<a href="{}">@{}</a>'.format(
+            reverse('posts:profile', args=(username,)), username
+        )
+    return None
+
+
+@register.filter(needs_autoescape=True)
+def linkify(text, post=None, autoescape=True):
+    """Links hashtags to tag feeds and the users ``post`` mentions
+    (its ``Mention`` rows) to their profiles."""
+    escape = conditional_escape if autoescape else str
+    mentioned = set()
+    if post is not None and post.pk is not None and '@' in text:
+        mentioned = set(post.mentions.values_list('user__username',
+                                                  flat=True))
+    parts = []
+    position = 0
+    for match in TOKEN_RE.finditer(text):
+        link = token_link(match, mentioned)
+        if link is None:
+            continue
+        parts += [escape(text[position:match.start()]), link]
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return mark_safe(''.join(parts))
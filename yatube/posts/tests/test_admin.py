@@ -0,0 +1,76 @@
+from django.contrib.admin import helpers
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.groups = [
+            Group.objects.create(title=f'group {i}', slug=f'group_{i}',
+                                 description='test_description')
+            for i in range(5)
+        ]
+        Post.objects.bulk_create(
+            Post(author=cls.admin, text=f'post {i}',
+                 group=cls.groups[i % len(cls.groups)])
+            for i in range(120)
+        )
+        cls.changelist_url = reverse('admin:posts_post_changelist')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(PostAdminTests.admin)
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        # session, user, pk range, count, page, groups for the rows and
+        # for the action form
+        with self.assertNumQueries(7):
+            response = self.client.get(self.changelist_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), 100)
+
+    def test_keyset_navigation(self):
+        response = self.client.get(self.changelist_url)
+        next_url = response.context['cl'].next_keyset_url
+        last_pk = list(response.context['cl'].result_list)[-1].pk
+        self.assertIn(f'after={last_pk}', next_url)
+        response = self.client.get(self.changelist_url + next_url)
+        pks = [post.pk for post in response.context['cl'].result_list]
+        self.assertEqual(len(pks), 20)
+        self.assertTrue(all(pk < last_pk for pk in pks))
+        self.assertIsNone(response.context['cl'].next_keyset_url)
+
+    def test_regroup_action(self):
+        posts = list(Post.objects.values_list('pk', flat=True)[:3])
+        target = PostAdminTests.groups[0]
+        self.client.post(self.changelist_url, {
+            'action': 'regroup',
+            'group': target.pk,
+            helpers.ACTION_CHECKBOX_NAME: posts,
+        })
+        self.assertEqual(
+            Post.objects.filter(pk__in=posts, group=target).count(), 3
+        )
+
+    def test_delete_in_chunks_action(self):
+        post = Post.objects.first()
+        Comment.objects.create(post=post, author=PostAdminTests.admin,
+                               text='comment')
+        data = {'action': 'delete_in_chunks', 'select_across': '1',
+                'index': 0, helpers.ACTION_CHECKBOX_NAME: [post.pk]}
+        response = self.client.post(self.changelist_url, data)
+        self.assertContains(response, 'Будет удалено постов: 120')
+        self.assertEqual(Post.objects.count(), 120)
+        self.client.post(self.changelist_url, {**data, 'post': 'yes'})
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
@@ -33,3 +34,16 @@ class CacheTests(TestCase):
                 response = self.authorized_client.get(reverse(address))
                 content2 = response.content
                 self.assertEqual(content, content2)
+
+    def test_cached_index_is_per_visitor(self):
+        cache.clear()
+        other = User.objects.create_user(username='Другой')
+        self.authorized_client.get(reverse(CacheTests.index_url_name))
+        other_client = Client()
+        other_client.force_login(other)
+        response = other_client.get(reverse(CacheTests.index_url_name))
+        self.assertContains(response, f'Пользователь: {other.username}')
+        self.assertNotContains(response,
+                               f'Пользователь: {CacheTests.user.username}')
+        response = Client().get(reverse(CacheTests.index_url_name))
+        self.assertNotContains(response, 'Выйти')
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import digest
+from ..models import DigestRun, Follow, Post
+
+User = get_user_model()
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+)
+class DigestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.followers = [
+            User.objects.create_user(username=f'reader{i}',
+                                     email=f'reader{i}@example.com')
+            for i in range(3)
+        ]
+        cls.no_email = User.objects.create_user(username='no_email')
+        for user in cls.followers + [cls.no_email]:
+            Follow.objects.create(user=user, author=cls.author)
+        for i in range(3):
+            Post.objects.create(author=cls.author, text=f'digest post {i}')
+
+    def test_sends_one_digest_per_follower(self):
+        sent = digest.send_digests(batch_size=2, max_posts=2)
+        self.assertEqual(sent, 3)
+        self.assertEqual(len(mail.outbox), 3)
+        body = mail.outbox[0].body
+        self.assertIn('digest post 2', body)
+        self.assertNotIn('digest post 0', body)
+        self.assertIn('И ещё постов: 1', body)
+        self.assertTrue(DigestRun.objects.get().finished)
+
+    def test_next_run_starts_after_previous_window(self):
+        digest.send_digests()
+        mail.outbox = []
+        self.assertEqual(digest.send_digests(), 0)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_resumes_unfinished_run(self):
+        now = timezone.now()
+        DigestRun.objects.create(since=now - timedelta(days=1), until=now,
+                                 last_user_id=self.followers[1].pk,
+                                 sent=2)
+        self.assertEqual(digest.send_digests(), 3)
+        self.assertEqual([m.to for m in mail.outbox],
+                         [[self.followers[2].email]])
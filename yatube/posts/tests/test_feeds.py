@@ -0,0 +1,213 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import feeds, scheduling
+from ..models import Follow, Group, GroupFollow, Post
+
+User = get_user_model()
+
+
+class FeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        GroupFollow.objects.create(user=cls.reader, group=cls.group)
+        start = timezone.now() - timedelta(days=1)
+        kinds = (
+            # By a followed author, in a followed group.
+            (cls.author, cls.group),
+            (cls.author, None),
+            (cls.other, cls.group),
+            (cls.other, None),
+        )
+        for number in range(20):
+            author, group = kinds[number % len(kinds)]
+            Post.objects.create(author=author, group=group,
+                                text=f'Пост {number}')
+        for number, post in enumerate(Post.objects.order_by('pk')):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=start + timedelta(minutes=number)
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def expected(self):
+        return list(Post.objects.exclude(
+            author=self.other, group__isnull=True
+        ).order_by('-pub_date', '-pk').values_list('pk', flat=True))
+
+    def walk(self, size):
+        post_ids, cursor = [], None
+        while True:
+            posts, cursor = feeds.personal_page(self.reader, cursor, size)
+            post_ids += [post.pk for post in posts]
+            if cursor is None:
+                return post_ids
+
+    def test_merges_sources_without_duplicates(self):
+        self.assertEqual(self.walk(4), self.expected())
+
+    def test_deep_pages_continue_from_database(self):
+        with mock.patch.object(feeds, 'RECENT_POSTS', 2):
+            self.assertEqual(self.walk(2), self.expected())
+            self.assertEqual(self.walk(5), self.expected())
+
+    def test_cached_page_needs_no_post_query(self):
+        feeds.personal_page(self.reader)
+        # Only the ``id__in`` hydration.
+        with self.assertNumQueries(1):
+            feeds.personal_page(self.reader)
+
+    def test_follows_change_sources(self):
+        self.walk(100)
+        Follow.objects.create(user=self.reader, author=self.other)
+        self.assertEqual(len(self.walk(100)), 20)
+        Follow.objects.filter(user=self.reader, author=self.other).delete()
+        GroupFollow.objects.filter(user=self.reader).delete()
+        self.assertEqual(
+            self.walk(100),
+            list(self.author.posts.order_by('-pub_date').values_list(
+                'pk', flat=True
+            ))
+        )
+
+    def test_lists_follow_new_and_deleted_posts(self):
+        self.walk(100)
+        post = Post.objects.create(author=self.other, group=self.group,
+                                   text='new')
+        self.assertEqual(self.walk(100)[0], post.pk)
+        post.delete()
+        self.assertEqual(self.walk(100), self.expected())
+
+    def test_promoted_post_joins_lists(self):
+        self.walk(100)
+        due = timezone.now() + timedelta(hours=1)
+        post = Post.objects.create(author=self.author, text='later',
+                                   scheduled_for=due)
+        self.assertNotIn(post.pk, self.walk(100))
+        scheduling.promote_due(due)
+        self.assertEqual(self.walk(100)[0], post.pk)
+
+    def test_edit_moves_post_between_groups(self):
+        self.walk(100)
+        post = Post.objects.filter(author=self.other,
+                                   group=self.group).first()
+        self.client.force_login(self.other)
+        self.client.post(reverse('posts:post_edit', args=(post.pk,)),
+                         {'text': post.text})
+        self.assertEqual(self.walk(100), self.expected())
+        self.assertNotIn(post.pk, self.walk(100))
+
+    def test_author_rename_drops_cards(self):
+        author = User.objects.get(pk=self.author.pk)
+        post_ids = list(author.posts.values_list('pk', flat=True))
+        cache.set_many({feeds.card_key(pk): 'card' for pk in post_ids})
+        cache.set(feeds.card_key(0), 'card')
+        author.last_login = timezone.now()
+        author.save(update_fields=['last_login'])
+        self.assertEqual(len(cache.get_many(
+            [feeds.card_key(pk) for pk in post_ids]
+        )), len(post_ids))
+        author.first_name = 'Новое имя'
+        author.save()
+        self.assertEqual(cache.get_many(
+            [feeds.card_key(pk) for pk in post_ids]
+        ), {})
+        self.assertEqual(cache.get(feeds.card_key(0)), 'card')
+
+    def test_group_follow_views(self):
+        GroupFollow.objects.all().delete()
+        url = reverse('posts:group_follow', args=(self.group.slug,))
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(self.reader.group_follows.count(), 1)
+        self.client.get(reverse('posts:group_unfollow',
+                                args=(self.group.slug,)))
+        self.assertFalse(self.reader.group_follows.exists())
+
+    def test_follow_index_cursor(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            self.expected()[:10]
+        )
+        response = self.client.get(reverse('posts:follow_index'),
+                                   {'after': response.context['next_cursor']})
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            self.expected()[10:]
+        )
+        self.assertIsNone(response.context['next_cursor'])
+
+
+class SourceFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        for number in range(15):
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text=f'Пост {number}')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def expected(self):
+        return list(Post.objects.order_by('-pub_date', '-pk').values_list(
+            'pk', flat=True
+        ))
+
+    def pages(self, url):
+        return [[post.pk for post in self.client.get(
+            url, {'page': number}
+        ).context['page_obj']] for number in (1, 2)]
+
+    def test_pages_from_cached_list(self):
+        feed = feeds.SourceFeed(feeds.EVERYONE)
+        self.assertEqual(feed.count(), 15)
+        with self.assertNumQueries(1):
+            posts = feed[10:15]
+        self.assertEqual([post.pk for post in posts], self.expected()[10:])
+
+    def test_deep_pages_fall_back_to_database(self):
+        with mock.patch.object(feeds, 'RECENT_POSTS', 12):
+            feed = feeds.SourceFeed((feeds.GROUP, self.group.pk))
+            self.assertTrue(feed.is_full)
+            self.assertEqual(feed.count(), 15)
+            self.assertEqual([post.pk for post in feed[10:15]],
+                             self.expected()[10:])
+
+    def test_feed_views(self):
+        expected = self.expected()
+        for url in (reverse('posts:index'),
+                    reverse('posts:group_list', args=(self.group.slug,)),
+                    reverse('posts:profile', args=(self.author.username,))):
+            with self.subTest(url=url):
+                self.assertEqual(self.pages(url),
+                                 [expected[:10], expected[10:]])
+
+    def test_card_follows_edits(self):
+        url = reverse('posts:group_list', args=(self.group.slug,))
+        self.client.get(url)
+        post = Post.objects.get(pk=self.expected()[0])
+        post.text = 'Исправленный пост'
+        post.save()
+        self.assertContains(self.client.get(url), 'Исправленный пост')
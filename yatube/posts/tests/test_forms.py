@@ -67,12 +67,11 @@ class PostCreateFormTests(TestCase):
             data=form_data,
         )
         self.assertEqual(Post.objects.count(), posts_count + 1)
-        self.assertTrue(
-            Post.objects.filter(
-                text='new_post_text',
-                author=PostCreateFormTests.user,
-                image='posts/small.gif'
-            ).exists()
+        post = Post.objects.get(text='new_post_text',
+                                author=PostCreateFormTests.user)
+        self.assertRegex(
+            post.image.name,
+            r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{32}\.(jpeg|webp)$'
         )
 
     def test_create_post_only_for_authorized(self):
@@ -0,0 +1,81 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+MORE_RE = re.compile(r'class="[^"]*js-load-more" href="([^"]+)"')
+
+
+class FragmentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(25):
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text=f'Пост номер {number}')
+        cls.post = Post.objects.first()
+        for number in range(15):
+            Comment.objects.create(post=cls.post, author=cls.reader,
+                                   text=f'Комментарий {number}')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def walk(self, url, pattern=r'Пост номер \d+'):
+        """Texts of the cards on a page and on every fragment after it."""
+        response = self.client.get(url)
+        texts = re.findall(pattern, response.content.decode())
+        more = MORE_RE.search(response.content.decode())
+        while more:
+            response = self.client.get(more.group(1).replace('&amp;', '&'))
+            content = response.content.decode()
+            self.assertNotIn('<html', content)
+            texts += re.findall(pattern, content)
+            more = MORE_RE.search(content)
+        return texts
+
+    def test_feeds_continue_with_fragments(self):
+        expected = [f'Пост номер {number}' for number in range(24, -1, -1)]
+        for url in (reverse('posts:index'),
+                    reverse('posts:group_list', args=(self.group.slug,)),
+                    reverse('posts:profile', args=(self.author.username,)),
+                    reverse('posts:follow_index')):
+            with self.subTest(url=url):
+                self.assertEqual(self.walk(url), expected)
+
+    def test_comments_continue_with_fragments(self):
+        self.assertEqual(
+            self.walk(reverse('posts:post_detail', args=(self.post.pk,)),
+                      r'Комментарий \d+'),
+            [f'Комментарий {number}' for number in range(14, -1, -1)]
+        )
+
+    def test_invalid_cursor_starts_over(self):
+        response = self.client.get(reverse('posts:index_more'),
+                                   {'after': 'garbage'})
+        self.assertEqual(len(response.context['posts']), 10)
+        self.assertEqual(response.context['posts'][0].text, 'Пост номер 24')
+
+    def test_like_forms_return_to_the_page(self):
+        page = reverse('posts:group_list', args=(self.group.slug,))
+        for url in (reverse('posts:index_more'),
+                    reverse('posts:comment_threads', args=(self.post.pk,))):
+            with self.subTest(url=url):
+                response = self.client.get(url, {'next': page})
+                self.assertContains(
+                    response, f'name="next" value="{page}"'
+                )
+                self.assertNotContains(response, 'value="/more/')
@@ -0,0 +1,74 @@
+import random
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from ..forms import PostForm
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+def make_upload(seed, size=(3000, 100), name='big.png'):
+    length = size[0] * size[1] * 3
+    noise = random.Random(seed).getrandbits(length * 8).to_bytes(length,
+                                                                 'little')
+    buffer = BytesIO()
+    Image.frombytes('RGB', size, noise).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def submit(self, upload):
+        form = PostForm(data={'text': 'image post'},
+                        files={'image': upload})
+        self.assertTrue(form.is_valid(), form.errors)
+        form.instance.author = ImageUploadTests.user
+        return form
+
+    def test_image_is_capped_and_reencoded(self):
+        form = self.submit(make_upload(1))
+        report = form.image_report
+        self.assertFalse(report.deduplicated)
+        self.assertGreater(report.bytes_saved, 0)
+        self.assertGreaterEqual(report.elapsed, 0)
+        post = form.save()
+        with default_storage.open(post.image.name) as stored:
+            image = Image.open(stored)
+            self.assertEqual(max(image.size), settings.POST_IMAGE_MAX_SIDE)
+            self.assertIn(image.format, ('JPEG', 'WEBP'))
+
+    def test_identical_uploads_are_stored_once(self):
+        first = self.submit(make_upload(2, name='a.png'))
+        first.save()
+        second = self.submit(make_upload(2, name='b.png'))
+        self.assertTrue(second.image_report.deduplicated)
+        self.assertEqual(second.cleaned_data['image'],
+                         first.instance.image.name)
+
+    @override_settings(POST_IMAGE_MAX_BYTES=100)
+    def test_oversized_upload_is_rejected(self):
+        form = PostForm(data={'text': 'image post'},
+                        files={'image': make_upload(3)})
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import impressions
+from ..models import Post
+
+User = get_user_model()
+
+
+class ImpressionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='viewer')
+        cls.posts = [Post.objects.create(author=cls.user, text=f'post {i}')
+                     for i in range(3)]
+
+    def setUp(self):
+        cache.clear()
+        for counter in (impressions.post_views,
+                        impressions.post_impressions):
+            counter.clear()
+            self.addCleanup(counter.clear)
+        self.client = Client()
+
+    def test_views_are_deduplicated_per_viewer(self):
+        url = reverse('posts:post_detail', args=(self.posts[0].pk,))
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.context['post'].views_total, 1)
+        other = Client(HTTP_USER_AGENT='other')
+        response = other.get(url)
+        self.assertEqual(response.context['post'].views_total, 2)
+
+    def test_views_are_flushed_in_bulk(self):
+        for post in self.posts:
+            self.client.get(reverse('posts:post_detail', args=(post.pk,)))
+        self.assertEqual(impressions.post_views.flush(), 1)
+        self.assertEqual(
+            set(Post.objects.values_list('views_count', flat=True)), {1}
+        )
+
+    def test_feed_records_impressions(self):
+        self.client.get(reverse('posts:profile',
+                                args=(self.user.username,)))
+        self.client.get(reverse('posts:profile',
+                                args=(self.user.username,)))
+        self.assertEqual(
+            [impressions.post_impressions.pending(post.pk)
+             for post in self.posts],
+            [1, 1, 1]
+        )
+
+    def test_cached_index_counts_impressions_with_seen(self):
+        ids = ','.join(str(post.pk) for post in self.posts)
+        for number in range(5):
+            viewer = Client(HTTP_USER_AGENT=f'browser {number}')
+            viewer.get(reverse('posts:index'))
+            response = viewer.get(reverse('posts:seen'), {'ids': ids})
+        self.assertEqual(
+            [impressions.post_impressions.pending(post.pk)
+             for post in self.posts],
+            [5, 5, 5]
+        )
+        self.assertEqual(response.json(),
+                         {str(post.pk): 0 for post in self.posts})
+
+    def test_logged_in_viewer_uses_session(self):
+        self.client.force_login(self.user)
+        url = reverse('posts:post_detail', args=(self.posts[1].pk,))
+        self.client.get(url)
+        self.client.get(url, HTTP_USER_AGENT='another browser')
+        self.assertEqual(impressions.post_views.pending(self.posts[1].pk), 1)
@@ -0,0 +1,108 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core import tasks
+from .. import ranking
+from ..models import Post, PostScore
+
+User = get_user_model()
+
+
+class RankingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'ranked post {i}')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_newer_events_outweigh_older(self):
+        now = timezone.now()
+        old, new = self.posts[0], self.posts[1]
+        for _ in range(3):
+            ranking.record_comment(old.pk, now - timedelta(days=3))
+        ranking.record_comment(new.pk, now)
+        posts, _ = ranking.popular_page()
+        self.assertEqual([post.pk for post in posts], [new.pk, old.pk])
+
+    def test_combine_matches_direct_sum(self):
+        now = timezone.now()
+        ranking.record_comment(self.posts[0].pk, now)
+        ranking.record_comment(self.posts[0].pk, now)
+        score = PostScore.objects.get(post=self.posts[0]).score
+        self.assertAlmostEqual(score, ranking.decayed(2, now))
+
+    def test_comment_view_updates_ranking(self):
+        self.client.post(
+            reverse('posts:add_comment', args=(self.posts[2].pk,)),
+            {'text': 'comment'}
+        )
+        self.assertFalse(PostScore.objects.exists())
+        tasks.run_pending()
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(list(response.context['posts']), [self.posts[2]])
+
+    def test_follow_boosts_recent_posts(self):
+        self.client.get(reverse('posts:profile_follow',
+                                args=(self.author.username,)))
+        self.assertEqual(PostScore.objects.count(), len(self.posts))
+
+    def test_cursor_pagination(self):
+        for post in self.posts:
+            ranking.record_comment(post.pk)
+        first, cursor = ranking.popular_page(size=2)
+        second, last_cursor = ranking.popular_page(cursor, size=2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertIsNone(last_cursor)
+        self.assertFalse(set(first) & set(second))
+
+    def test_page_does_not_aggregate(self):
+        for post in self.posts:
+            ranking.record_comment(post.pk)
+        url = reverse('posts:popular')
+        self.client.get(url)
+        # Session, user, the posts of the page and the viewer's likes:
+        # no score queries.
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+    def test_rebuilds_after_cache_loss(self):
+        ranking.record_comment(self.posts[0].pk)
+        cache.clear()
+        posts, _ = ranking.popular_page()
+        self.assertEqual(posts, [self.posts[0]])
+
+    def test_deleted_post_leaves_top(self):
+        for post in self.posts:
+            ranking.record_comment(post.pk)
+        ranking.popular_page()
+        Post.objects.filter(pk=self.posts[0].pk).delete()
+        posts, _ = ranking.popular_page(size=3)
+        self.assertEqual(len(posts), 2)
+        self.assertNotIn(self.posts[0], posts)
+
+    def test_top_list_catches_up_with_other_processes(self):
+        ranking.record_comment(self.posts[0].pk)
+        ranking.popular_page()
+        # Scored in another process, whose invalidation this cache misses.
+        PostScore.objects.create(post=self.posts[1], score=1e6)
+        later = time.time() + ranking.TOP_TTL + 1
+        with mock.patch('time.time', return_value=later):
+            posts, _ = ranking.popular_page()
+        self.assertEqual(posts, [self.posts[1], self.posts[0]])
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import reactions
+from ..models import Comment, Post, PostLike
+
+User = get_user_model()
+
+
+class ReactionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='liker')
+        cls.posts = [Post.objects.create(author=cls.user, text=f'post {i}')
+                     for i in range(3)]
+        cls.comment = Comment.objects.create(post=cls.posts[0],
+                                             author=cls.user, text='comment')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.addCleanup(reactions.post_likes.flush)
+        self.addCleanup(reactions.comment_likes.flush)
+
+    def test_like_toggles(self):
+        url = reverse('posts:post_like', args=(self.posts[0].pk,))
+        self.client.post(url)
+        self.assertTrue(PostLike.objects.filter(user=self.user).exists())
+        self.assertEqual(reactions.post_likes.pending(self.posts[0].pk), 1)
+        self.client.post(url)
+        self.assertFalse(PostLike.objects.exists())
+        self.assertEqual(reactions.post_likes.pending(self.posts[0].pk), 0)
+
+    def test_like_requires_post(self):
+        response = self.client.get(
+            reverse('posts:post_like', args=(self.posts[0].pk,))
+        )
+        self.assertEqual(response.status_code, 405)
+
+    def test_like_redirects_to_next(self):
+        response = self.client.post(
+            reverse('posts:post_like', args=(self.posts[0].pk,)),
+            {'next': reverse('posts:group_list', args=('missing',))}
+        )
+        self.assertRedirects(response, '/group/missing/',
+                             fetch_redirect_response=False)
+
+    def test_comment_like(self):
+        self.client.post(reverse('posts:comment_like',
+                                 args=(self.posts[0].pk, self.comment.pk)))
+        reactions.comment_likes.flush()
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.likes_count, 1)
+
+    def test_page_state_in_one_query(self):
+        reactions.toggle_post_like(self.user, self.posts[1])
+        with self.assertNumQueries(1):
+            posts = reactions.annotate_posts(self.posts, self.user)
+        self.assertEqual([post.liked for post in posts],
+                         [False, True, False])
+        self.assertEqual([post.likes_total for post in posts], [0, 1, 0])
+
+    def test_cached_index_has_no_viewer_state(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        reactions.toggle_post_like(self.user, self.posts[1])
+        self.client.get(reverse('posts:index'))
+        response = Client().get(reverse('posts:index'))
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+        self.assertNotContains(response, 'btn-danger')
+        self.assertContains(response, 'class="js-like"', count=3)
+
+    def test_like_buttons(self):
+        reactions.toggle_post_like(self.user, self.posts[1])
+        ids = ','.join(str(post.pk) for post in self.posts)
+        response = self.client.get(reverse('posts:like_buttons'),
+                                   {'ids': ids, 'next': '/?page=2'})
+        self.assertContains(response, 'csrfmiddlewaretoken', count=3)
+        self.assertContains(response, 'btn-danger"', count=1)
+        self.assertContains(response, 'value="/?page=2"', count=3)
@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import revisions
+from ..models import Post, PostRevision
+
+User = get_user_model()
+
+
+class DeltaTests(TestCase):
+    def test_round_trip(self):
+        old = 'first\nsecond\nthird\n'
+        new = 'first\nchanged\nthird\nfourth'
+        delta = revisions.make_delta(old, new)
+        self.assertEqual(revisions.apply_delta(old, delta), new)
+        self.assertNotIn('first', delta)
+
+
+class RevisionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='editor')
+
+    def setUp(self):
+        self.post = Post.objects.create(author=self.user, text='v1\n')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def edit(self, text):
+        previous = self.post.text
+        self.post.text = text
+        self.post.save()
+        return revisions.record_edit(self.post, previous, '', self.user)
+
+    def test_edit_view_records_original_and_new_version(self):
+        original = 'a long enough first paragraph\n' * 5
+        Post.objects.filter(pk=self.post.pk).update(text=original)
+        self.client.post(reverse('posts:post_edit', args=(self.post.pk,)),
+                         {'text': original + 'one more line'})
+        self.assertEqual(
+            list(self.post.revisions.values_list('number', 'is_snapshot')),
+            [(2, False), (1, True)]
+        )
+        self.assertEqual(revisions.reconstruct(self.post.pk, 1)[0],
+                         original)
+        self.assertEqual(revisions.reconstruct(self.post.pk, 2)[0],
+                         original + 'one more line')
+
+    def test_edits_are_recorded_in_order(self):
+        url = reverse('posts:post_edit', args=(self.post.pk,))
+        original = self.post.text
+        self.client.post(url, {'text': 'second version'})
+        self.client.post(url, {'text': 'third version'})
+        self.assertEqual(
+            [revisions.reconstruct(self.post.pk, number)[0]
+             for number in (1, 2, 3)],
+            [original, 'second version', 'third version']
+        )
+
+    def test_small_texts_are_stored_whole(self):
+        self.assertTrue(self.edit('v2\n').is_snapshot)
+
+    def test_unchanged_edit_is_not_recorded(self):
+        self.assertIsNone(self.edit(self.post.text))
+
+    def test_snapshots_bound_reconstruction(self):
+        for i in range(2, 3 * revisions.SNAPSHOT_EVERY):
+            self.edit('header line\n' * 10 + f'line {i}\n')
+        number = 2 * revisions.SNAPSHOT_EVERY + 5
+        with self.assertNumQueries(1):
+            text, _ = revisions.reconstruct(self.post.pk, number)
+        self.assertEqual(text, 'header line\n' * 10 + f'line {number}\n')
+        self.assertEqual(
+            self.post.revisions.filter(is_snapshot=True).count(), 4
+        )
+
+    def test_compact_keeps_newest_versions(self):
+        texts = {1: 'v1\n'}
+        for i in range(2, 31):
+            texts[i] = f'v{i}\n'
+            self.edit(texts[i])
+        deleted = revisions.compact(self.post.pk, keep=5)
+        self.assertEqual(deleted, 24)
+        for number in range(25, 31):
+            self.assertEqual(revisions.reconstruct(self.post.pk, number)[0],
+                             texts[number])
+        self.assertIsNone(revisions.reconstruct(self.post.pk, 3))
+
+    def test_history_is_author_only(self):
+        self.edit('v2\n')
+        url = reverse('posts:post_history', args=(self.post.pk,))
+        response = self.client.get(url, {'revision': 1})
+        self.assertEqual(response.context['version'], ('v1\n', ''))
+        other = Client()
+        other.force_login(User.objects.create_user(username='other'))
+        self.assertRedirects(
+            other.get(url),
+            reverse('posts:post_detail', args=(self.post.pk,))
+        )
+        self.assertEqual(PostRevision.objects.count(), 2)
@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import scheduling
+from ..models import Post
+
+User = get_user_model()
+
+
+class SchedulingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='planner')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def schedule(self, text, delay):
+        return Post.objects.create(
+            author=self.author, text=text,
+            scheduled_for=timezone.now() + delay
+        )
+
+    def test_scheduled_post_is_hidden_until_due(self):
+        post = self.schedule('later', timedelta(hours=1))
+        self.assertFalse(post.is_published)
+        response = Client().get(reverse('posts:index'))
+        self.assertNotIn(post, response.context['page_obj'])
+        self.assertEqual(
+            Client().get(reverse('posts:post_detail',
+                                 args=(post.pk,))).status_code,
+            404
+        )
+        response = self.client.get(reverse('posts:profile',
+                                           args=(self.author.username,)))
+        self.assertEqual(list(response.context['scheduled']), [post])
+
+    def test_profile_count_leaves_out_scheduled_posts(self):
+        Post.objects.create(author=self.author, text='now')
+        self.schedule('later', timedelta(hours=1))
+        response = Client().get(reverse('posts:profile',
+                                        args=(self.author.username,)))
+        self.assertContains(response, 'Всего постов: 1')
+        self.assertNotContains(response, 'Всего постов: 2')
+
+    def test_create_view_schedules(self):
+        when = timezone.localtime() + timedelta(days=1)
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'scheduled from form',
+            'scheduled_for': when.strftime('%Y-%m-%dT%H:%M'),
+        })
+        post = Post.objects.get(text='scheduled from form')
+        self.assertIsNone(post.published_at)
+
+    def test_past_time_is_rejected(self):
+        response = self.client.post(reverse('posts:post_create'), {
+            'text': 'too late',
+            'scheduled_for': '2000-01-01T00:00',
+        })
+        self.assertTrue(response.context['schedule_form'].errors)
+        self.assertFalse(Post.objects.filter(text='too late').exists())
+
+    def test_promotes_burst_in_batches(self):
+        due = timezone.now() - timedelta(minutes=1)
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'burst {i}', scheduled_for=due,
+                 published_at=None)
+            for i in range(25)
+        )
+        later = self.schedule('later', timedelta(hours=1))
+        received = []
+
+        def receiver(sender, post_ids, **kwargs):
+            received.append(len(post_ids))
+
+        scheduling.posts_published.connect(receiver)
+        self.addCleanup(scheduling.posts_published.disconnect, receiver)
+        # Select and update per batch inside a savepoint, the mentions
+        # lookup of ``tagging.notify_published``, the feed keys of
+        # ``feeds.posts_published`` and a last empty select: no per-post
+        # statements.
+        with self.assertNumQueries(3 * 6 + 3):
+            published = scheduling.promote_due(batch_size=10)
+        self.assertEqual(len(published), 25)
+        self.assertEqual(received, [10, 10, 5])
+        self.assertEqual(Post.objects.published().count(), 25)
+        self.assertEqual(scheduling.next_due(), later.scheduled_for)
+        promoted = Post.objects.get(text='burst 0')
+        self.assertEqual(promoted.pub_date, due)
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import suggestions
+from ..models import Follow, FollowSuggestion
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    def test_friends_of_friends_and_co_follows(self):
+        # 1 follows 2; 2 follows 3; 4 follows 2 and 5.
+        graph = suggestions.FollowGraph([1, 2, 4, 4], [2, 3, 2, 5])
+        index = graph.indices_of([1])[0]
+        authors, scores = graph.suggest(index)
+        self.assertCountEqual(authors, [3, 5])
+        self.assertTrue(all(scores > 0))
+
+    def test_excludes_self_and_followed(self):
+        graph = suggestions.FollowGraph([1, 1, 2, 3], [2, 3, 1, 2])
+        authors, _ = graph.suggest(graph.indices_of([1])[0])
+        self.assertEqual(list(authors), [])
+
+    def test_unknown_users_are_skipped(self):
+        graph = suggestions.FollowGraph([1], [2])
+        self.assertEqual(list(graph.ids[graph.indices_of([2, 7])]), [2])
+
+
+class RefreshTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = {name: User.objects.create_user(username=name)
+                     for name in ('reader', 'friend', 'author', 'other')}
+        cls.follow('reader', 'friend')
+        cls.follow('friend', 'author')
+
+    @classmethod
+    def follow(cls, user, author):
+        Follow.objects.create(user=cls.users[user],
+                              author=cls.users[author])
+
+    def test_refresh_stores_suggestions(self):
+        self.assertEqual(suggestions.refresh(), 2)
+        self.assertEqual(
+            list(FollowSuggestion.objects.filter(
+                user=self.users['reader']
+            ).values_list('author__username', flat=True)),
+            ['author']
+        )
+
+    def test_incremental_refresh_only_changed_users(self):
+        suggestions.refresh()
+        self.follow('other', 'friend')
+        self.assertEqual(suggestions.stale_users(), [self.users['other'].pk])
+        self.assertEqual(suggestions.refresh_stale(), 1)
+        self.assertTrue(FollowSuggestion.objects.filter(
+            user=self.users['other'], author=self.users['author']
+        ).exists())
+
+    def test_follow_index_shows_suggestions(self):
+        suggestions.refresh()
+        client = Client()
+        client.force_login(self.users['reader'])
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['suggestions'],
+                         [self.users['author']])
+        self.assertContains(response, 'Кого почитать', count=1)
+        title = response.content.decode().split('</title>')[0]
+        self.assertNotIn('Кого почитать', title)
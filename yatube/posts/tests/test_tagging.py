@@ -0,0 +1,130 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import tasks
+from .. import scheduling, tagging
+from ..models import Mention, Post, PostTag, Tag
+from ..templatetags.post_text import linkify
+
+User = get_user_model()
+
+
+@override_settings(
+    TASK_QUEUE_MODE=tasks.MODE_SYNC,
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+)
+class TaggingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.reader = User.objects.create_user(username='reader.one',
+                                              email='reader@example.com')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def create(self, text):
+        self.client.post(reverse('posts:post_create'), {'text': text})
+        return Post.objects.get(text=text)
+
+    def test_extract(self):
+        tags, usernames = tagging.extract(
+            'Hi @reader.one. #Django and #django, mail a@b.com &#39;'
+        )
+        self.assertEqual(tags, {'django'})
+        self.assertEqual(usernames, {'reader.one'})
+
+    def test_extract_skips_url_fragments(self):
+        tags, _ = tagging.extract('See http://example.com/#anchor, (#real)')
+        self.assertEqual(tags, {'real'})
+
+    def test_linkify_links_only_mentioned_users(self):
+        post = self.create('#news for @reader.one and @nobody, '
+                           'see http://example.com/#anchor')
+        text = linkify(post.text, post)
+        self.assertIn(
+            '<a href="{}">@reader.one</a>'.format(
+                reverse('posts:profile', args=('reader.one',))
+            ), text
+        )
+        self.assertIn(
+            '<a href="{}">#news</a>'.format(
+                reverse('posts:tag_posts', args=('news',))
+            ), text
+        )
+        self.assertNotIn(reverse('posts:profile', args=('nobody',)), text)
+        self.assertIn('@nobody', text)
+        self.assertIn('http://example.com/#anchor', text)
+
+    def test_linkify_escapes_text(self):
+        link = reverse('posts:tag_posts', args=('quoted',))
+        self.assertEqual(
+            linkify('<b>#tag</b> & "#quoted"'),
+            f'&lt;b&gt;#tag&lt;/b&gt; &amp; &quot;<a href="{link}">#quoted</a>'
+            '&quot;'
+        )
+
+    def test_create_indexes_and_notifies(self):
+        post = self.create('#news for @reader.one and @writer')
+        self.assertEqual(Tag.objects.get(name='news').posts_count, 1)
+        self.assertEqual(list(post.mentions.values_list('user', flat=True)),
+                         [self.reader.pk])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
+
+    def test_edit_updates_difference_only(self):
+        post = self.create('#one #two @reader.one')
+        self.client.post(reverse('posts:post_edit', args=(post.pk,)),
+                         {'text': '#two #three @reader.one'})
+        self.assertEqual(
+            dict(Tag.objects.values_list('name', 'posts_count')),
+            {'one': 0, 'two': 1, 'three': 1}
+        )
+        # The reader was already mentioned: no second e-mail.
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_delete_updates_counts(self):
+        post = self.create('#gone')
+        post.delete()
+        self.assertEqual(Tag.objects.get(name='gone').posts_count, 0)
+
+    def test_tag_feed_cursor(self):
+        for i in range(3):
+            self.create(f'#paged post {i}')
+        tag = Tag.objects.get(name='paged')
+        first, cursor = tagging.tag_page(tag, size=2)
+        second, last = tagging.tag_page(tag, cursor, size=2)
+        self.assertEqual([post.text for post in first + second],
+                         [f'#paged post {i}' for i in (2, 1, 0)])
+        self.assertIsNone(last)
+        response = self.client.get(reverse('posts:tag_posts',
+                                           args=('Paged',)))
+        self.assertContains(response, 'href="/tags/paged/"')
+
+    def test_reindex(self):
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'#bulk @reader.one {i}')
+            for i in range(5)
+        )
+        self.assertEqual(tagging.reindex(chunk_size=2), 5)
+        self.assertEqual(Tag.objects.get(name='bulk').posts_count, 5)
+        self.assertEqual(PostTag.objects.count(), 5)
+        self.assertEqual(Mention.objects.count(), 5)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_scheduled_post_notifies_on_publication(self):
+        post = Post.objects.create(
+            author=self.author, text='soon @reader.one',
+            scheduled_for=timezone.now() + timedelta(minutes=5)
+        )
+        tagging.index_post(post)
+        self.assertEqual(len(mail.outbox), 0)
+        scheduling.promote_due(timezone.now() + timedelta(minutes=10))
+        self.assertEqual(len(mail.outbox), 1)
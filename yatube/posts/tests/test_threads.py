@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import threads
+from ..models import COMMENT_MAX_DEPTH, Comment, Post
+
+User = get_user_model()
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='commenter')
+        cls.post = Post.objects.create(author=cls.user, text='thread post')
+        cls.root = cls.comment('root')
+        cls.first = cls.comment('first', cls.root)
+        cls.nested = cls.comment('nested', cls.first)
+        cls.second = cls.comment('second', cls.root)
+
+    @classmethod
+    def comment(cls, text, parent=None):
+        return Comment.objects.create(post=cls.post, author=cls.user,
+                                      text=text, parent=parent)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_path_orders_subtree_depth_first(self):
+        replies, next_after = threads.more_replies(self.root)
+        self.assertEqual(replies, [self.first, self.nested, self.second])
+        self.assertEqual([reply.depth for reply in replies], [1, 2, 1])
+        self.assertIsNone(next_after)
+
+    def test_more_replies_continues_after_cursor(self):
+        replies, next_after = threads.more_replies(self.root, limit=2)
+        self.assertEqual(replies, [self.first, self.nested])
+        rest, _ = threads.more_replies(self.root, next_after, limit=2)
+        self.assertEqual(rest, [self.second])
+
+    def test_depth_is_capped(self):
+        parent = self.root
+        for level in range(COMMENT_MAX_DEPTH + 2):
+            parent = self.comment(f'level {level}', parent)
+        self.assertEqual(parent.depth, COMMENT_MAX_DEPTH - 1)
+
+    def test_add_reply(self):
+        self.client.post(
+            reverse('posts:add_comment', args=(self.post.pk,)),
+            {'text': 'reply', 'parent': self.nested.pk}
+        )
+        reply = Comment.objects.get(text='reply')
+        self.assertEqual(reply.parent, self.nested)
+        self.assertTrue(reply.path.startswith(self.nested.path))
+
+    def test_post_detail_queries_are_bounded(self):
+        for i in range(threads.REPLIES_PER_PAGE + 5):
+            self.comment(f'reply {i}', self.second)
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        # Session, user, post, thread count, threads, one range each and
+        # the viewer's post and comment likes.
+        with self.assertNumQueries(8):
+            response = self.client.get(url)
+        thread = response.context['comments'][0]
+        self.assertEqual(len(thread.replies), threads.REPLIES_PER_PAGE)
+        self.assertIsNotNone(thread.next_after)
+
+    def test_replies_fragment(self):
+        response = self.client.get(
+            reverse('posts:comment_replies',
+                    args=(self.post.pk, self.root.pk)),
+            {'after': self.nested.path}
+        )
+        self.assertEqual(response.context['replies'], [self.second])
+        self.assertNotContains(response, '<html')
@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+
+from .. import thumbnails
+from ..models import Post
+from ..tasks import post_saved
+from ..utils import THUMBNAIL_OPTIONS, THUMBNAIL_VARIANTS
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPrefetchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def fresh_process(self):
+        """Empty cache and in-process memos."""
+        cache.clear()
+        default.backend._wrapped = thumbnails.ThumbnailBackend()
+        default.kvstore._wrapped = thumbnails.KVStore()
+
+    def setUp(self):
+        # Thumbnails memoized by an earlier test would skip the store.
+        self.fresh_process()
+        self.posts = []
+        for i in range(3):
+            buffer = BytesIO()
+            Image.new('RGB', (100, 50), (i, 0, 0)).save(buffer, 'JPEG')
+            post = Post(author=ThumbnailPrefetchTests.user, text=f'{i}')
+            post.image.save(f'{i}.jpg', ContentFile(buffer.getvalue()),
+                            save=False)
+            post.save()
+            post_saved(post_id=post.pk)
+            self.posts.append(post)
+        self.fresh_process()
+
+    def resolve_all(self):
+        for post in self.posts:
+            for geometry in THUMBNAIL_VARIANTS:
+                get_thumbnail(post.image, geometry, **THUMBNAIL_OPTIONS)
+
+    def test_page_is_resolved_with_one_query(self):
+        with self.assertNumQueries(1):
+            thumbnails.prefetch_thumbnails(self.posts)
+        with self.assertNumQueries(0):
+            self.resolve_all()
+        self.assertEqual(default.kvstore.lookups, 1)
+
+    def test_resolved_thumbnails_skip_the_store(self):
+        thumbnails.prewarm()
+        lookups = default.kvstore.lookups
+        with self.assertNumQueries(0):
+            thumbnails.prefetch_thumbnails(self.posts)
+            self.resolve_all()
+        self.assertEqual(default.kvstore.lookups, lookups)
+
+    def test_image_without_small_variant(self):
+        get = default.backend.get_thumbnail
+
+        def failing_small(file_, geometry, **options):
+            if geometry == '480x170':
+                raise OSError
+            return get(file_, geometry, **options)
+
+        with mock.patch.object(default.backend, 'get_thumbnail',
+                               side_effect=failing_small):
+            response = self.client.get(
+                reverse('posts:post_detail', args=(self.posts[0].pk,))
+            )
+        self.assertContains(response, '<img class="card-img my-2"')
+        self.assertNotContains(response, 'srcset')
@@ -0,0 +1,142 @@
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from yatube import startup
+from .. import warmup
+from ..impressions import post_impressions
+from ..models import Follow, Group, GroupFollow, Post
+
+User = get_user_model()
+
+
+class WarmUpTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.quiet = User.objects.create_user(username='quiet')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Описание')
+        cls.empty = Group.objects.create(title='Пустая', slug='empty',
+                                         description='Описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        GroupFollow.objects.create(user=cls.reader, group=cls.group)
+        for number in range(15):
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text=f'Пост номер {number}')
+        Post.objects.create(author=cls.quiet, text='Тихий пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_urls_follow_popularity(self):
+        urls = warmup.warm_up_urls(index_pages=2, groups=1, profiles=1,
+                                   pages=1)
+        self.assertEqual(urls, [
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:popular'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+        ])
+
+    def test_held_out_urls_follow_the_plan(self):
+        urls = warmup.held_out_urls(index_pages=2, groups=1, profiles=1,
+                                    pages=1)
+        self.assertEqual(urls, [
+            reverse('posts:index') + '?page=3',
+            reverse('posts:group_list', args=(self.group.slug,)) + '?page=2',
+            reverse('posts:profile', args=(self.author.username,))
+            + '?page=2',
+        ])
+
+    def test_held_out_pages_use_warmed_caches(self):
+        plan = {'index_pages': 1, 'groups': 1, 'profiles': 1, 'pages': 1}
+        result = warmup.warm(workers=1, thumbnails=0,
+                             urls=warmup.warm_up_urls(**plan),
+                             check_urls=warmup.held_out_urls(**plan))
+        self.assertEqual(result.failed, [])
+        self.assertEqual(result.skipped, 0)
+        self.assertEqual(result.coverage, 1.0)
+        self.assertIn(reverse('posts:index'), result.rendered)
+        # The lists are warm; the cards of older posts are not.
+        self.assertGreater(result.hit_rate, 0)
+        self.assertLess(result.hit_rate, 1)
+
+    def test_no_hit_rate_without_check_urls(self):
+        result = warmup.warm(workers=1, thumbnails=0)
+        self.assertIsNone(result.hit_rate)
+
+    def test_budget_skips_remaining_pages(self):
+        urls = warmup.warm_up_urls()
+        result = warmup.warm(budget=-1, workers=1, urls=urls, thumbnails=0)
+        self.assertEqual(result.rendered, [])
+        self.assertEqual(result.skipped, len(urls))
+        self.assertEqual(result.coverage, 0)
+
+    def test_warm_up_is_not_counted_as_impressions(self):
+        post = Post.objects.filter(author=self.author).first()
+        before = post_impressions.value(post)
+        warmup.warm(workers=1, thumbnails=0)
+        self.assertEqual(post_impressions.value(post), before)
+
+    def test_command_reports_coverage_and_hit_rate(self):
+        out = StringIO()
+        call_command('warm_caches', '--workers=1', '--groups=1',
+                     '--profiles=1', '--pages=1', stdout=out,
+                     stderr=StringIO())
+        self.assertRegex(out.getvalue(),
+                         r'Warmed 6 of 6 pages \(100\.0%\) in [\d.]+ s '
+                         r'\(0 over budget\); hit rate on 3 next pages '
+                         r'[\d.]+%')
+
+    def test_command_warns_about_a_local_cache(self):
+        err = StringIO()
+        call_command('warm_caches', '--workers=1', '--groups=1',
+                     '--profiles=1', '--pages=1', stdout=StringIO(),
+                     stderr=err)
+        self.assertIn('local to this process', err.getvalue())
+
+
+@mock.patch('core.counters.start_flusher')
+class StartupTests(SimpleTestCase):
+    def test_only_thumbnails_unless_enabled(self, start_flusher):
+        with mock.patch('posts.thumbnails.prewarm') as prewarm:
+            with mock.patch('posts.warmup.warm') as warm:
+                startup.start()
+        start_flusher.assert_called_once()
+        prewarm.assert_called_once_with(settings.THUMBNAIL_PREWARM_POSTS)
+        warm.assert_not_called()
+
+    @override_settings(CACHE_WARM_UP_ON_START=True)
+    def test_warm_up_when_enabled(self, start_flusher):
+        with mock.patch('posts.warmup.warm') as warm:
+            startup.start()
+        warm.assert_called_once()
+
+    def test_start_returns_its_connection(self, start_flusher):
+        with mock.patch.object(startup, 'warm_up',
+                               side_effect=DatabaseError):
+            with mock.patch.object(connection, 'close') as close:
+                with self.assertRaises(DatabaseError):
+                    startup.start()
+        close.assert_called_once()
+
+    def test_wsgi_starts_on_first_request(self, start_flusher):
+        application = startup.started(lambda environ, start_response: [])
+        self.addCleanup(startup._started.clear)
+        startup._started.clear()
+        with mock.patch.object(startup.threading, 'Thread') as thread:
+            application({}, None)
+            application({}, None)
+        thread.assert_called_once_with(target=startup.start, name='startup',
+                                       daemon=True)
@@ -0,0 +1,69 @@
+"""Comment threads read by ``path`` ranges.
+
+A post page shows a page of top-level comments and, under each, the first
+``REPLIES_PER_PAGE`` replies of its subtree in path order (depth first),
+so deep or huge threads cost a bounded number of rows. The rest is
+fetched by ``more_replies`` from where the previous batch stopped.
+"""
+from .models import Comment
+from .utils import form_page_obj
+
+THREADS_PER_PAGE: int = 10
+REPLIES_PER_PAGE: int = 50
+# Sorts after every base36 digit: ``path < prefix + PATH_END`` bounds a
+# subtree.
+PATH_END = '~'
+
+
+class Thread:
+    def __init__(self, root, replies, next_after):
+        self.root = root
+        self.replies = replies
+        self.next_after = next_after
+
+
+def more_replies(root, after=None, limit=REPLIES_PER_PAGE):
+    """Replies under ``root`` following path ``after`` (one range query).
+
+    Returns ``(replies, next_after)``; ``next_after`` is ``None`` when the
+    subtree is exhausted.
+    """
+    if not after or not after.startswith(root.path):
+        after = root.path
+    rows = list(
+        Comment.objects.filter(path__gt=after,
+                               path__lt=root.path + PATH_END)
+        .select_related('author').order_by('path')[:limit + 1]
+    )
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1].path
+    return rows, None
+
+
+def roots_of(post):
+    # By ``pk``, so that ``threads_after`` can continue from any page.
+    return post.comments.filter(parent=None).select_related(
+        'author'
+    ).order_by('-pk')
+
+
+def thread_page(request, post):
+    """Paginated top-level comments of ``post`` with their first replies."""
+    page_obj = form_page_obj(request, roots_of(post), THREADS_PER_PAGE)
+    page_obj.object_list = [Thread(root, *more_replies(root))
+                            for root in page_obj]
+    return page_obj
+
+
+def threads_after(post, after=None, limit=THREADS_PER_PAGE):
+    """Threads of top-level comments older than comment ``after``.
+
+    Returns ``(threads, next_after)`` like ``more_replies``.
+    """
+    roots = roots_of(post)
+    if after:
+        roots = roots.filter(pk__lt=after)
+    roots = list(roots[:limit + 1])
+    next_after = roots[limit - 1].pk if len(roots) > limit else None
+    return [Thread(root, *more_replies(root))
+            for root in roots[:limit]], next_after
@@ -0,0 +1,185 @@
+"""sorl-thumbnail backend and KV store tuned for feed pages.
+
+Stock sorl resolves every ``{% thumbnail %}`` tag with its own cache
+lookup (and a DB query on a miss) and deserializes the result each time.
+Here the thumbnails of a whole page are resolved with one ``get_many``
+plus at most one DB query, and resolved thumbnails stay in a per-process
+LRU: thumbnail names are derived from the (content-addressed) source name
+and options, so an entry never changes.
+"""
+import threading
+from collections import OrderedDict
+
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend as BaseThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from core import metrics
+
+from .models import Post
+from .utils import THUMBNAIL_OPTIONS, THUMBNAIL_VARIANTS
+
+MEMO_SIZE: int = 10000
+PREWARM_POSTS: int = 200
+
+generated = metrics.REGISTRY.counter(
+    'yatube_thumbnails_generated_total', 'Thumbnails rendered and stored.'
+)
+
+
+class LRU:
+    """Thread-safe bounded mapping."""
+
+    def __init__(self, size=MEMO_SIZE):
+        self.size = size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+
+class KVStore(cached_db_kvstore.KVStore):
+    """Cached DB store with batched reads."""
+
+    def __init__(self):
+        super().__init__()
+        self._memo = LRU()
+        self.lookups = 0
+
+    def _get_raw(self, key):
+        value = self._memo.get(key)
+        if value is not None:
+            return value
+        self.lookups += 1
+        return super()._get_raw(key)
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        self._memo.set(key, value)
+
+    def _delete_raw(self, *keys):
+        super()._delete_raw(*keys)
+        for key in keys:
+            self._memo.discard(key)
+
+    def prefetch(self, keys):
+        """Loads image ``keys`` with one cache and at most one DB query."""
+        raw_keys = [add_prefix(key) for key in keys]
+        raw_keys = [key for key in raw_keys if key not in self._memo]
+        if not raw_keys:
+            return
+        self.lookups += 1
+        values = self.cache.get_many(raw_keys)
+        missing = [key for key in raw_keys if key not in values]
+        metrics.record_cache('thumbnail', len(values), len(missing))
+        if missing:
+            stored = dict(KVStoreModel.objects.filter(
+                key__in=missing
+            ).values_list('key', 'value'))
+            self.cache.set_many(
+                {key: stored.get(key, cached_db_kvstore.EMPTY_VALUE)
+                 for key in missing},
+                settings.THUMBNAIL_CACHE_TIMEOUT
+            )
+            values.update(stored)
+        for key, value in values.items():
+            if value != cached_db_kvstore.EMPTY_VALUE:
+                self._memo.set(key, value)
+
+
+class ThumbnailBackend(BaseThumbnailBackend):
+    """Remembers resolved thumbnails per source, geometry and options."""
+
+    def __init__(self):
+        super().__init__()
+        self._memo = LRU()
+
+    @staticmethod
+    def memo_key(file_, geometry_string, options):
+        return (getattr(file_, 'name', file_), geometry_string,
+                tuple(sorted(options.items())))
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        key = self.memo_key(file_, geometry_string, options)
+        thumbnail = self._memo.get(key)
+        if thumbnail is None:
+            thumbnail = super().get_thumbnail(file_, geometry_string,
+                                              **options)
+            # Only remember thumbnails that made it to the KV store (they
+            # have a size); a missing source must be retried next time.
+            if getattr(thumbnail, '_size', None):
+                self._memo.set(key, thumbnail)
+        return thumbnail
+
+    def _create_thumbnail(self, *args, **kwargs):
+        super()._create_thumbnail(*args, **kwargs)
+        generated.inc()
+
+    def is_resolved(self, file_, geometry_string, **options):
+        return self.memo_key(file_, geometry_string, options) in self._memo
+
+    def thumbnail_key(self, file_, geometry_string, **options):
+        """KV store key ``get_thumbnail`` looks up for these arguments."""
+        source = ImageFile(file_)
+        if settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage).key
+
+
+def prefetch_thumbnails(posts, variants=THUMBNAIL_VARIANTS):
+    """Resolves the feed thumbnails of ``posts`` in a single lookup."""
+    backend = default.backend
+    if not hasattr(default.kvstore, 'prefetch') or not hasattr(
+        backend, 'thumbnail_key'
+    ):
+        return
+    keys = [
+        backend.thumbnail_key(post.image, geometry, **THUMBNAIL_OPTIONS)
+        for post in posts if post.image
+        for geometry in variants
+        if not backend.is_resolved(post.image, geometry, **THUMBNAIL_OPTIONS)
+    ]
+    if keys:
+        default.kvstore.prefetch(keys)
+
+
+def prewarm(n_posts=PREWARM_POSTS):
+    """Resolves thumbnails of the newest ``n_posts`` posts."""
+    posts = Post.objects.exclude(image='').only('image')[:n_posts]
+    prefetch_thumbnails(posts)
+    for post in posts:
+        for geometry in THUMBNAIL_VARIANTS:
+            default.backend.get_thumbnail(post.image, geometry,
+                                          **THUMBNAIL_OPTIONS)
@@ -4,14 +4,41 @@ from . import views
 app_name = 'posts'
 urlpatterns = [
     path('', views.index, name='index'),
+    path('more/', views.index_more, name='index_more'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('group/<slug:slug>/more/',
+         views.group_posts_more,
+         name='group_list_more'),
+    path('group/<slug:slug>/follow/',
+         views.group_follow,
+         name='group_follow'),
+    path('group/<slug:slug>/unfollow/',
+         views.group_unfollow,
+         name='group_unfollow'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('profile/<str:username>/more/',
+         views.profile_more,
+         name='profile_more'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path('posts/<int:post_id>/history/',
+         views.post_history, name='post_history'),
     path('posts/<int:post_id>/comment/',
          views.add_comment, name='add_comment'),
+    path('posts/<int:post_id>/like/', views.post_like, name='post_like'),
+    path('likes/', views.like_buttons, name='like_buttons'),
+    path('seen/', views.seen, name='seen'),
+    path('posts/<int:post_id>/comments/<int:comment_id>/like/',
+         views.comment_like, name='comment_like'),
+    path('posts/<int:post_id>/comments/more/',
+         views.comment_threads, name='comment_threads'),
+    path('posts/<int:post_id>/comments/<int:comment_id>/replies/',
+         views.comment_replies, name='comment_replies'),
+    path('popular/', views.popular, name='popular'),
+    path('tags/<str:name>/', views.tag_posts, name='tag_posts'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/more/', views.follow_index_more, name='follow_index_more'),
     path('profile/<str:username>/follow/',
          views.profile_follow,
          name='profile_follow'),
@@ -1,8 +1,16 @@
 from django.core.paginator import Paginator
+from django.shortcuts import redirect
+from django.utils.http import is_safe_url
 
 
 TOP_N_ENTRIES: int = 10
 
+# Must match the ``{% thumbnail %}`` tags in the post templates.
+THUMBNAIL_GEOMETRY: str = '960x339'
+# Responsive variants offered through ``srcset``.
+THUMBNAIL_VARIANTS: tuple = ('480x170', THUMBNAIL_GEOMETRY)
+THUMBNAIL_OPTIONS: dict = {'crop': 'center', 'upscale': True}
+
 
 def form_page_obj(request, entry_instance,
                   n_entries=TOP_N_ENTRIES):
@@ -10,3 +18,12 @@ def form_page_obj(request, entry_instance,
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def redirect_back(request, fallback, *args, **kwargs):
+    """Redirects to the local ``next`` parameter or to ``fallback``."""
+    next_url = request.POST.get('next') or request.GET.get('next')
+    if next_url and is_safe_url(next_url, {request.get_host()},
+                                request.is_secure()):
+        return redirect(next_url)
+    return redirect(fallback, *args, **kwargs)
@@ -1,52 +1,194 @@
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.decorators.cache import cache_page
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_POST
 
-from .models import Post, Group, User, Follow
-from .forms import PostForm, CommentForm
+from core.viewcache import cached_view
 
-from .utils import form_page_obj
+from . import (feeds, impressions, ranking, reactions, revisions,
+               suggestions, tagging, threads)
+from .models import Comment, Post, Group, GroupFollow, Tag, User, Follow
+from .forms import CommentForm, PostForm, ScheduleForm
+from .tasks import comment_added, post_saved
+from .thumbnails import prefetch_thumbnails
 
+from .utils import TOP_N_ENTRIES, form_page_obj, redirect_back
 
-@cache_page(20, key_prefix="index_page")
+
+def prepare_feed(request, posts, record=True):
+    """Extras of the post cards on a feed page, resolved for the page.
+
+    Cached pages pass ``record=False`` and count impressions with the
+    ``seen`` request their script sends.
+    """
+    prefetch_thumbnails(posts)
+    reactions.annotate_posts(posts, request.user)
+    impressions.annotate_views(posts)
+    if record:
+        impressions.record_impressions(request, posts)
+
+
+def more_url(view_name, cursor, *args):
+    """URL of the fragment with the posts after ``cursor``."""
+    if not cursor:
+        return None
+    return '{}?{}'.format(reverse(view_name, args=args),
+                          urlencode({'after': cursor}))
+
+
+def page_more_url(view_name, page_obj, *args):
+    """Fragment URL continuing a numbered page, if there is more."""
+    if not page_obj.has_next():
+        return None
+    return more_url(view_name, feeds.cursor_after(page_obj[-1]), *args)
+
+
+def feed_fragment(request, view_name, sources, *args):
+    """Post cards after the ``after`` cursor, without the page around."""
+    template = 'posts/includes/feed_fragment.html'
+    posts, next_cursor = feeds.merged_page(
+        sources, request.GET.get('after'), TOP_N_ENTRIES
+    )
+    prepare_feed(request, posts)
+    # Like forms return to the page the fragment is loaded into.
+    context = {'posts': posts, 'next': request.GET.get('next', ''),
+               'more_url': more_url(view_name, next_cursor, *args)}
+    return render(request, template, context)
+
+
+@cached_view(20, key_prefix="index_page")
 def index(request):
     """View for main page."""
     template = 'posts/index.html'
-    posts = Post.objects.select_related('group')
+    posts = feeds.SourceFeed(feeds.EVERYONE)
     page_obj = form_page_obj(request, posts)
-    context = {'page_obj': page_obj}
+    prepare_feed(request, page_obj, record=False)
+    # The page is cached: like buttons come from ``like_buttons``,
+    # impressions and view counts from ``seen``.
+    context = {'page_obj': page_obj, 'deferred_likes': True,
+               'more_url': page_more_url('posts:index_more', page_obj)}
     return render(request, template, context)
 
 
+def index_more(request):
+    """Fragment of the main page feed."""
+    return feed_fragment(request, 'posts:index_more', [feeds.EVERYONE])
+
+
 def group_posts(request, slug):
     """View for posts of defined group based on slug."""
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    following = request.user.is_authenticated and (
+        GroupFollow.objects.filter(user=request.user, group=group).exists()
+    )
+    posts = feeds.SourceFeed((feeds.GROUP, group.pk))
     page_obj = form_page_obj(request, posts)
-    context = {'group': group, 'page_obj': page_obj}
+    prepare_feed(request, page_obj)
+    context = {'group': group, 'page_obj': page_obj, 'following': following,
+               'more_url': page_more_url('posts:group_list_more', page_obj,
+                                         group.slug)}
     return render(request, template, context)
 
 
+def group_posts_more(request, slug):
+    """Fragment of the group feed."""
+    group = get_object_or_404(Group, slug=slug)
+    return feed_fragment(request, 'posts:group_list_more',
+                         [(feeds.GROUP, group.pk)], group.slug)
+
+
 def profile(request, username):
     template = 'posts/profile.html'
     author = get_object_or_404(User, username=username)
     following = request.user.is_authenticated and (Follow.objects.filter(
         user=request.user, author=author
     ).exists())
-    posts = author.posts.select_related('group')
+    posts = feeds.SourceFeed((feeds.AUTHOR, author.pk))
     page_obj = form_page_obj(request, posts)
-    context = {'author': author, 'page_obj': page_obj, 'following': following}
+    prepare_feed(request, page_obj)
+    scheduled = author.posts.none()
+    if request.user.pk == author.pk:
+        scheduled = author.posts.filter(
+            published_at__isnull=True
+        ).order_by('scheduled_for')
+    context = {'author': author, 'page_obj': page_obj, 'following': following,
+               'suggestions': suggestions.for_user(request.user),
+               'scheduled': scheduled,
+               'more_url': page_more_url('posts:profile_more', page_obj,
+                                         author.username)}
     return render(request, template, context)
 
 
+def profile_more(request, username):
+    """Fragment of the profile feed."""
+    author = get_object_or_404(User, username=username)
+    return feed_fragment(request, 'posts:profile_more',
+                         [(feeds.AUTHOR, author.pk)], author.username)
+
+
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.select_related('post')
+    post = get_object_or_404(Post.objects.select_related('author', 'group'),
+                             pk=post_id)
+    if not post.is_published and request.user.pk != post.author_id:
+        raise Http404
+    comments = threads.thread_page(request, post)
+    reactions.annotate_posts([post], request.user)
+    impressions.record_view(request, post)
+    impressions.annotate_views([post])
+    reactions.annotate_comments(
+        [comment for thread in comments
+         for comment in (thread.root, *thread.replies)],
+        request.user
+    )
+    reply_to = request.GET.get('reply_to', '')
+    reply_to = reply_to.isdigit() and post.comments.filter(
+        pk=reply_to
+    ).select_related('author').first()
     form = CommentForm()
+    threads_more_url = None
+    if comments.has_next():
+        threads_more_url = more_url('posts:comment_threads',
+                                    comments[-1].root.pk, post.pk)
     context = {'post': post, 'user': request.user,
-               'form': form, 'comments': comments}
+               'form': form, 'comments': comments, 'reply_to': reply_to,
+               'more_url': threads_more_url}
+    return render(request, template, context)
+
+
+def comment_threads(request, post_id):
+    """Fragment with the next top-level comments and their replies."""
+    template = 'posts/includes/comment_threads.html'
+    post = get_object_or_404(Post.objects.published(), pk=post_id)
+    after = request.GET.get('after', '')
+    comments, next_after = threads.threads_after(
+        post, int(after) if after.isdigit() else None
+    )
+    reactions.annotate_comments(
+        [comment for thread in comments
+         for comment in (thread.root, *thread.replies)],
+        request.user
+    )
+    context = {'comments': comments, 'next': request.GET.get('next', ''),
+               'more_url': more_url('posts:comment_threads', next_after,
+                                    post.pk)}
+    return render(request, template, context)
+
+
+def comment_replies(request, post_id, comment_id):
+    """Fragment with the next replies of a comment thread."""
+    template = 'posts/includes/comment_replies.html'
+    root = get_object_or_404(Comment, pk=comment_id, post_id=post_id)
+    replies, next_after = threads.more_replies(root,
+                                               request.GET.get('after'))
+    reactions.annotate_comments(replies, request.user)
+    context = {'root': root, 'replies': replies, 'next_after': next_after,
+               'next': request.GET.get('next', '')}
     return render(request, template, context)
 
 
@@ -58,12 +200,16 @@ def post_create(request):
 
     form = PostForm(request.POST or None,
                     files=request.FILES or None)
-    if form.is_valid():
+    schedule_form = ScheduleForm(request.POST or None)
+    if form.is_valid() and schedule_form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
+        post.scheduled_for = schedule_form.cleaned_data['scheduled_for']
         post.save()
+        post_saved.delay(post_id=post.pk)
         return redirect('posts:profile', user.username)
     return render(request, template, {'form': form,
+                                      'schedule_form': schedule_form,
                                       'is_edit': is_edit,
                                       'user': user})
 
@@ -77,11 +223,22 @@ def post_edit(request, post_id):
     if request.user.pk != post.author.pk:
         return redirect('posts:post_detail', post.pk)
 
+    # The form writes cleaned values into ``post`` while validating.
+    previous_text, previous_image = post.text, post.image.name
+    previous_group_id = post.group_id
     form = PostForm(request.POST or None,
                     files=request.FILES or None,
                     instance=post)
     if form.is_valid():
         form.save()
+        # Revisions are deltas against the previous text: record them in
+        # the order the edits are saved.
+        revisions.record_edit(post, previous_text, previous_image,
+                              request.user)
+        if post.group_id != previous_group_id:
+            feeds.invalidate([(feeds.GROUP, previous_group_id),
+                              (feeds.GROUP, post.group_id)])
+        post_saved.delay(post_id=post.pk)
         return redirect('posts:post_detail', post.pk)
 
     return render(request, template, context={
@@ -89,29 +246,128 @@ def post_edit(request, post_id):
     })
 
 
+@login_required
+def post_history(request, post_id):
+    """Edit history of a post, with any version rebuilt on request."""
+    template = 'posts/post_history.html'
+    post = get_object_or_404(Post, pk=post_id)
+    if request.user.pk != post.author_id:
+        return redirect('posts:post_detail', post.pk)
+    number = request.GET.get('revision', '')
+    version = number.isdigit() and revisions.reconstruct(post.pk,
+                                                         int(number))
+    context = {'post': post, 'revisions': revisions.history(post),
+               'version': version, 'number': number}
+    return render(request, template, context)
+
+
 @login_required
 def add_comment(request, post_id):
     template = 'posts:post_detail'
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.published(), pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        parent = request.POST.get('parent', '')
+        if parent.isdigit():
+            comment.parent = post.comments.filter(pk=parent).first()
         comment.save()
+        comment_added.delay(comment_id=comment.pk)
     return redirect(template, post_id=post_id)
 
 
+@login_required
+@require_POST
+def post_like(request, post_id):
+    """Like a post or take the like back."""
+    post = get_object_or_404(Post.objects.published(), pk=post_id)
+    reactions.toggle_post_like(request.user, post)
+    return redirect_back(request, 'posts:post_detail', post_id=post.pk)
+
+
+@login_required
+def like_buttons(request):
+    """The viewer's like buttons of the posts listed in ``ids``."""
+    template = 'posts/includes/like_buttons.html'
+    ids = [int(pk) for pk in request.GET.get('ids', '').split(',')
+           if pk.isdigit()][:TOP_N_ENTRIES]
+    posts = reactions.annotate_posts(
+        Post.objects.published().filter(pk__in=ids), request.user
+    )
+    context = {'posts': posts, 'next': request.GET.get('next', '')}
+    return render(request, template, context)
+
+
+@never_cache
+def seen(request):
+    """Counts impressions of the posts listed in ``ids``; returns their
+    current view counts."""
+    ids = [int(pk) for pk in request.GET.get('ids', '').split(',')
+           if pk.isdigit()][:TOP_N_ENTRIES]
+    posts = list(Post.objects.published().filter(pk__in=ids).only('pk'))
+    impressions.record_impressions(request, posts)
+    impressions.annotate_views(posts)
+    return JsonResponse({post.pk: post.views_total for post in posts})
+
+
+@login_required
+@require_POST
+def comment_like(request, post_id, comment_id):
+    """Like a comment or take the like back."""
+    comment = get_object_or_404(Comment, pk=comment_id, post_id=post_id)
+    reactions.toggle_comment_like(request.user, comment)
+    return redirect_back(request, 'posts:post_detail', post_id=post_id)
+
+
+def tag_posts(request, name):
+    """View for published posts with a hashtag."""
+    template = 'posts/tag_list.html'
+    tag = get_object_or_404(Tag, name=name.lower())
+    after = request.GET.get('after', '')
+    posts, next_cursor = tagging.tag_page(
+        tag, int(after) if after.isdigit() else None, TOP_N_ENTRIES
+    )
+    prepare_feed(request, posts)
+    context = {'tag': tag, 'posts': posts, 'next_cursor': next_cursor}
+    return render(request, template, context)
+
+
+def popular(request):
+    """View for posts ranked by recent comments and follows."""
+    template = 'posts/popular.html'
+    posts, next_cursor = ranking.popular_page(request.GET.get('after'),
+                                              TOP_N_ENTRIES)
+    prepare_feed(request, posts)
+    context = {'posts': posts, 'next_cursor': next_cursor, 'popular': True}
+    return render(request, template, context)
+
+
 @login_required
 def follow_index(request):
-    """View for posts of all followed authors."""
+    """View for posts of all followed authors and groups."""
     template = 'posts/follow.html'
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = form_page_obj(request, posts)
-    context = {'page_obj': page_obj}
+    posts, next_cursor = feeds.personal_page(
+        request.user, request.GET.get('after'), TOP_N_ENTRIES
+    )
+    # A single page: the feed is navigated by ``next_cursor``.
+    page_obj = Paginator(posts, TOP_N_ENTRIES).page(1)
+    prepare_feed(request, page_obj)
+    context = {'page_obj': page_obj, 'next_cursor': next_cursor,
+               'more_url': more_url('posts:follow_index_more', next_cursor),
+               'follow': True,
+               'suggestions': suggestions.for_user(request.user)}
     return render(request, template, context)
 
 
+@login_required
+def follow_index_more(request):
+    """Fragment of the feed of followed authors and groups."""
+    return feed_fragment(request, 'posts:follow_index_more',
+                         feeds.followed_sources(request.user))
+
+
 @login_required
 def profile_follow(request, username):
     """Subscribe for posts by this author."""
@@ -122,6 +378,7 @@ def profile_follow(request, username):
     if user_is_author or subscription_exists:
         return redirect('posts:follow_index')
     Follow.objects.create(user=request.user, author=author)
+    ranking.record_follow(author.pk)
     return redirect('posts:follow_index')
 
 
@@ -133,3 +390,19 @@ def profile_unfollow(request, username):
     if subscription.exists():
         subscription.delete()
     return redirect('posts:follow_index')
+
+
+@login_required
+def group_follow(request, slug):
+    """Subscribe for posts of this group."""
+    group = get_object_or_404(Group, slug=slug)
+    GroupFollow.objects.get_or_create(user=request.user, group=group)
+    return redirect('posts:group_list', group.slug)
+
+
+@login_required
+def group_unfollow(request, slug):
+    """Unsubscribe for posts of this group."""
+    group = get_object_or_404(Group, slug=slug)
+    GroupFollow.objects.filter(user=request.user, group=group).delete()
+    return redirect('posts:group_list', group.slug)
@@ -0,0 +1,228 @@
+"""Cache warm-up after deploys and restarts.
+
+The first pages of the main feed, of the most followed groups and
+authors and the popular feed are rendered through the full middleware
+stack as an anonymous visitor. That fills the cached view entries,
+the per-source post lists, the post card fragments, compressed bodies
+and the thumbnail store, in order of traffic, until the time budget runs
+out. Warm-up requests are not counted as views or impressions.
+
+The report gives the share of the planned pages warmed within the budget
+and, when asked, the cache hit rate of pages the warm-up did not render
+(``held_out_urls``): what the warmed caches do for the traffic around
+the warmed pages.
+
+The in-memory cache and compiled templates live in the serving process,
+which is where ``yatube.startup`` runs this with
+``CACHE_WARM_UP_ON_START``. ``manage.py warm_caches`` warms shared caches
+(and the thumbnail store) from outside.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections
+from django.db.models import Count
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from core.asgi import build_environ
+from .models import Group, User
+from .thumbnails import prewarm
+
+BUDGET: float = 60.0
+WORKERS: int = 4
+INDEX_PAGES: int = 5
+GROUPS: int = 20
+PROFILES: int = 20
+PAGES_PER_SOURCE: int = 2
+MISSING = object()
+
+
+def default_host():
+    hosts = [host for host in settings.ALLOWED_HOSTS
+             if host not in ('*', '') and not host.startswith('.')]
+    return hosts[0] if hosts else 'localhost'
+
+
+def paged(url, number):
+    return url if number == 1 else url + '?' + urlencode({'page': number})
+
+
+def source_urls(groups, profiles):
+    """Most followed groups and authors (with posts), most followed first."""
+    slugs = Group.objects.annotate(
+        total=Count('followers')
+    ).order_by('-total', 'pk').values_list('slug', flat=True)[:groups]
+    usernames = User.objects.annotate(
+        total=Count('following')
+    ).filter(posts__isnull=False).distinct().order_by(
+        '-total', 'pk'
+    ).values_list('username', flat=True)[:profiles]
+    return ([reverse('posts:group_list', args=(slug,)) for slug in slugs]
+            + [reverse('posts:profile', args=(username,))
+               for username in usernames])
+
+
+def warm_up_urls(index_pages=INDEX_PAGES, groups=GROUPS, profiles=PROFILES,
+                 pages=PAGES_PER_SOURCE):
+    """Paths to render, most visited first."""
+    index = reverse('posts:index')
+    urls = [paged(index, number) for number in range(1, index_pages + 1)]
+    urls.append(reverse('posts:popular'))
+    sources = source_urls(groups, profiles)
+    for number in range(1, pages + 1):
+        urls += [paged(url, number) for url in sources]
+    return urls
+
+
+def held_out_urls(index_pages=INDEX_PAGES, groups=GROUPS, profiles=PROFILES,
+                  pages=PAGES_PER_SOURCE):
+    """The page after the warmed ones of each feed.
+
+    The warm-up does not render them, so their hit rate shows how much of
+    the traffic past the planned pages the warmed lists, cards and
+    thumbnails cover.
+    """
+    return ([paged(reverse('posts:index'), index_pages + 1)]
+            + [paged(url, pages + 1)
+               for url in source_urls(groups, profiles)])
+
+
+class Warmer:
+    """Renders pages in-process as a cookieless visitor of ``host``."""
+
+    def __init__(self, host=None):
+        self.host = host or default_host()
+        self.handler = BaseHandler()
+        self.handler.load_middleware()
+
+    def render(self, url):
+        path, _, query = url.partition('?')
+        environ = build_environ({
+            'method': 'GET',
+            'path': path,
+            'query_string': query.encode(),
+            'headers': [(b'host', self.host.encode()),
+                        (b'accept-encoding', b'gzip, br')],
+            'server': (self.host, 80),
+        }, b'')
+        request = WSGIRequest(environ)
+        request.is_warm_up = True
+        response = self.handler.get_response(request)
+        response.close()
+        return response.status_code
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = self.misses = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@contextmanager
+def counting_cache(alias='default'):
+    """Counts hits and misses of this thread's ``alias`` cache."""
+    cache = caches[alias]
+    stats = CacheStats()
+    get, get_many = cache.get, cache.get_many
+
+    def counting_get(key, default=None, version=None):
+        value = get(key, MISSING, version=version)
+        if value is MISSING:
+            stats.misses += 1
+            return default
+        stats.hits += 1
+        return value
+
+    def counting_get_many(keys, version=None):
+        keys = list(keys)
+        found = get_many(keys, version=version)
+        stats.hits += len(found)
+        stats.misses += len(keys) - len(found)
+        return found
+
+    cache.get, cache.get_many = counting_get, counting_get_many
+    try:
+        yield stats
+    finally:
+        del cache.get, cache.get_many
+
+
+class Report:
+    def __init__(self, planned):
+        self.planned = planned
+        self.rendered = []
+        self.failed = []
+        self.skipped = 0
+        self.elapsed = 0.0
+        self.hit_rate = None
+
+    @property
+    def coverage(self):
+        """Share of the planned pages warmed within the budget."""
+        return len(self.rendered) / self.planned if self.planned else 1.0
+
+
+def run_all(job, items, workers):
+    if workers <= 1:
+        for item in items:
+            job(item)
+        return
+
+    def pooled_job(item):
+        try:
+            job(item)
+        finally:
+            close_old_connections()
+
+    with ThreadPoolExecutor(max_workers=workers,
+                            thread_name_prefix='warmup') as pool:
+        list(pool.map(pooled_job, items))
+
+
+def warm(budget=BUDGET, workers=WORKERS, host=None, urls=None,
+         thumbnails=None, check_urls=None):
+    """Warms caches within ``budget`` seconds; returns a ``Report``.
+
+    ``check_urls`` (pages not being warmed, see ``held_out_urls``) are
+    requested afterwards to measure the cache hit rate they get.
+    """
+    started = time.monotonic()
+    deadline = started + budget
+    lock = threading.Lock()
+    if thumbnails is None:
+        thumbnails = settings.THUMBNAIL_PREWARM_POSTS
+    if thumbnails:
+        prewarm(thumbnails)
+    if urls is None:
+        urls = warm_up_urls()
+    report = Report(len(urls))
+    warmer = Warmer(host)
+
+    def job(url):
+        if time.monotonic() > deadline:
+            with lock:
+                report.skipped += 1
+            return
+        status = warmer.render(url)
+        with lock:
+            (report.rendered if status < 400 else report.failed).append(url)
+
+    run_all(job, urls, workers)
+    report.elapsed = time.monotonic() - started
+    if check_urls:
+        with counting_cache() as stats:
+            for url in check_urls:
+                warmer.render(url)
+        report.hit_rate = stats.hit_rate
+    return report
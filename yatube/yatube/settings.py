@@ -1,4 +1,5 @@
 import os
+import sys
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -18,6 +19,9 @@ SECRET_KEY = '8u12g88+z%)(=utzl7vp$4ihloev8v%^cce88ozo_lykjasjvr'
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# ``manage.py test`` or py.test.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
 ALLOWED_HOSTS = [
     'localhost',
     '127.0.0.1',
@@ -44,7 +48,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -55,12 +62,21 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'yatube.urls'
 
+# HTML templates are minified as they are loaded (``core.loaders``); the
+# cached loader compiles each of them once per process.
+TEMPLATE_LOADERS = [
+    'core.loaders.FilesystemLoader',
+    'core.loaders.AppDirectoriesLoader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': (TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ]),
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -74,15 +90,41 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+ASGI_APPLICATION = 'yatube.asgi.application'
+# Threads running Django code (and the ORM) under ASGI.
+ASGI_THREADS = 20
+# Read views whose fresh ``core.viewcache.cached_view`` entries the ASGI
+# handler serves straight from the event loop: view name -> cache key prefix.
+ASGI_CACHED_VIEWS = {
+    'posts:index': 'index_page',
+}
+
+# Background tasks: 'db' (run by ``manage.py run_tasks``), 'thread'
+# (in-process pool) or 'sync' (inline).
+TASK_QUEUE_MODE = 'db'
+TASK_QUEUE_WORKERS = 4
 
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Threads take connections from a per-process pool (``core.pool``) and
+# return them when Django closes them after each request; the pool keeps
+# them open, checks idle ones and replaces them after ``MAX_AGE`` seconds.
+# It holds a connection for each thread that may use one: the ASGI and task
+# threads, the counter flusher and startup threads and the four threads of
+# ``posts.warmup``.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'SIZE': ASGI_THREADS + TASK_QUEUE_WORKERS + 2 + 4,
+            'TIMEOUT': 10,
+            'MAX_AGE': 300,
+            'CHECK_AFTER': 30,
+        },
     }
 }
 
@@ -126,14 +168,67 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# Content-hashed names plus .gz/.br siblings (``core.storage``).
+STATICFILES_STORAGE = 'core.storage.StaticStorage'
+# Single-box deployments serve the collected files in-process.
+SERVE_STATIC = not DEBUG
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-
+# Media is read straight from disk (no DB access); content-addressed
+# names are sent with ``Cache-Control: immutable``. Turn off only when a
+# web server in front serves ``MEDIA_ROOT`` with the same headers.
+SERVE_MEDIA = True
+
+# Feed lists, post cards and cached pages are invalidated by deleting
+# their keys, which only reaches processes sharing the cache: with more
+# than one serving process use a shared backend (e.g. Memcached).
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+
+# Post images: uploads above the memory limit are streamed to a temporary
+# file; stored images are capped and re-encoded by ``posts.images``.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+POST_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+POST_IMAGE_MAX_SIDE = 1920
+
+# sorl-thumbnail: feed pages resolve their thumbnails in one batch and
+# serving processes prewarm the entries of the newest posts.
+THUMBNAIL_BACKEND = 'posts.thumbnails.ThumbnailBackend'
+THUMBNAIL_KVSTORE = 'posts.thumbnails.KVStore'
+THUMBNAIL_PREWARM_POSTS = 200
+
+# Buffered counters (``core.counters``): seconds between background
+# flushes in serving processes.
+COUNTER_FLUSH_INTERVAL = 5
+
+# Whether a serving process renders the busiest pages into its caches
+# when it starts (``yatube.startup``; thumbnails are prewarmed either way),
+# and the seconds it spends on them (``posts.warmup``); a budget of 0 only
+# prewarms thumbnails. ``manage.py warm_caches`` warms shared caches on
+# demand.
+CACHE_WARM_UP_ON_START = False
+CACHE_WARM_UP_BUDGET = 10
+
+# Metrics (``core.metrics``, served at /metrics/ to the scraper below):
+# worker processes share their totals through files in this directory.
+METRICS_DIR = None if DEBUG else os.path.join(BASE_DIR, 'metrics')
+# Without a token the endpoint is open to these addresses. Behind a
+# reverse proxy every client comes from the proxy's address: set
+# METRICS_TOKEN there, which is then required as ``Authorization: Bearer``.
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+METRICS_TOKEN = None
+
+# Sampled SQL statistics (``core.querylog``): share of requests timed,
+# statements logged with their plan, and where processes leave their
+# totals for ``manage.py slow_queries`` (also under ``runserver``). Test
+# runs time nothing and write nothing.
+QUERY_LOG_SAMPLE_RATE = 0 if TESTING else 1.0 if DEBUG else 0.05
+QUERY_LOG_SLOW_MS = 100
+QUERY_LOG_DIR = None if TESTING else os.path.join(BASE_DIR, 'query_stats')
@@ -0,0 +1,61 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+_started = threading.Event()
+_start_lock = threading.Lock()
+
+
+def warm_up(pages=True):
+    """Fills in-process caches before a serving process takes requests;
+    only the thumbnails unless ``pages``."""
+    from posts.thumbnails import prewarm
+    from posts.warmup import warm
+
+    try:
+        if pages and settings.CACHE_WARM_UP_BUDGET:
+            warm(settings.CACHE_WARM_UP_BUDGET)
+        else:
+            prewarm(settings.THUMBNAIL_PREWARM_POSTS)
+    except DatabaseError:
+        # E.g. the very first start before ``migrate``.
+        logger.exception('Cache warm-up failed')
+
+
+def start():
+    """Background work of a serving process, once it is forked.
+
+    Run by the ASGI lifespan startup and, for WSGI, on the first request
+    (``started``) or from the server's post-fork hook (gunicorn's
+    ``post_worker_init``). Prewarms the thumbnails, and renders the
+    busiest pages only with ``CACHE_WARM_UP_ON_START``.
+    """
+    from django.db import connection
+
+    from core.counters import start_flusher
+
+    start_flusher(settings.COUNTER_FLUSH_INTERVAL)
+    try:
+        warm_up(pages=settings.CACHE_WARM_UP_ON_START)
+    finally:
+        # Return the pooled connection of the warm-up thread.
+        connection.close()
+
+
+def started(application):
+    """WSGI ``application`` that runs ``start`` in the background once the
+    process serves its first request."""
+    def wrapper(environ, start_response):
+        if not _started.is_set():
+            with _start_lock:
+                if not _started.is_set():
+                    threading.Thread(target=start, name='startup',
+                                     daemon=True).start()
+                    _started.set()
+        return application(environ, start_response)
+
+    return wrapper
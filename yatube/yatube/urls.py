@@ -1,7 +1,8 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from core.views import media, metrics, static
 
 handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'
@@ -11,13 +12,19 @@ urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
     path('auth/', include('users.urls', namespace='users')),
     path('about/', include('about.urls', namespace='about')),
+    path('metrics/', metrics, name='metrics'),
     # Default admin
     path('admin/', admin.site.urls),
     # Default auth
     path('auth/', include('django.contrib.auth.urls'))
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+if settings.SERVE_MEDIA:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), media),
+    ]
+
+if settings.SERVE_STATIC:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % settings.STATIC_URL.lstrip('/'), static),
+    ]